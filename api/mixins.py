@@ -0,0 +1,42 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+from core.models import ResourceVersion
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified handling to list and retrieve actions.
+
+    Validators are derived from the ResourceVersion counter named by
+    `version_key`, so an unchanged collection is answered with
+    304 Not Modified before any rows are fetched or serialized.
+    """
+    version_key = None
+
+    def _resource_version(self):
+        if not hasattr(self, '_cached_resource_version'):
+            self._cached_resource_version = ResourceVersion.current(self.version_key)
+        return self._cached_resource_version
+
+    def _etag(self, request, *args, **kwargs):
+        version, _ = self._resource_version()
+        # Query string (page, fields, embed) and format change the body, so they are part of the tag.
+        fmt = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+        raw = f"{self.version_key}:{version}:{fmt}:{request.get_full_path()}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _last_modified(self, request, *args, **kwargs):
+        _, updated_at = self._resource_version()
+        return updated_at
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        decorated = condition(etag_func=self._etag, last_modified_func=self._last_modified)(handler)
+        return decorated(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,12 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination for the API collections that opt in with pagination_class
+    (users, roles, tenders, contracts); the log list keeps its plain-list shape.
+    Clients may ask for larger pages with ?page_size=, up to max_page_size.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,22 @@
+from rest_framework import permissions
+from core.models import RoleOperation
+
+
+class HasSoapOperation(permissions.IsAuthenticated):
+    """
+    Grants access to users holding an active RoleOperation for the view's
+    `soap_operation`, the same check require_soap_permission applies to the
+    live call. Superusers pass.
+    """
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        user = request.user
+        if user.is_superuser:
+            return True
+        return RoleOperation.objects.filter(
+            role__users__user=user,
+            operation_name=view.soap_operation,
+            is_active=True
+        ).exists()
@@ -0,0 +1,17 @@
+from rest_framework.renderers import JSONRenderer
+
+from services import fastjson
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by services.fastjson
+    (orjson when available). Typed SOAP result models can be returned directly.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return fastjson.dumps(data, indent=bool(indent))
@@ -1,23 +1,116 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from core.models import Role, SoapRequestLog
+from core.models import Role, SoapRequestLog, Tender, TenderLot, Contract, ContractLot
+from services.read_model import freshness
+
+
+def requested_embeds(request):
+    """Parse the comma-separated ?embed= query parameter into a set of names."""
+    if request is None:
+        return set()
+    raw = request.query_params.get('embed', '')
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Restricts the serialized fields to those named in ?fields=a,b,c.
+    Fields listed in Meta.embeddable are only included when requested via ?embed=.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        embeds = requested_embeds(request)
+        for name in getattr(self.Meta, 'embeddable', ()):
+            if name not in embeds:
+                self.fields.pop(name, None)
+
+        requested = request.query_params.get('fields')
+        if requested:
+            allowed = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - allowed - embeds:
+                self.fields.pop(name)
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    roles = serializers.SerializerMethodField()
 
-class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_staff']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'roles']
+        embeddable = ['roles']
 
-class RoleSerializer(serializers.ModelSerializer):
+    def get_roles(self, obj):
+        # Relies on the viewset prefetching user_roles__role when ?embed=roles is set.
+        return [{'id': ur.role.id, 'name': ur.role.name} for ur in obj.user_roles.all()]
+
+class RoleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Role
         fields = ['id', 'name']
 
+class SoapRequestLogListSerializer(serializers.ModelSerializer):
+    """
+    Slim representation for log listings. Payloads are left out and fetched
+    per-row from the detail or payload endpoints.
+    """
+    timestamp = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = SoapRequestLog
+        fields = ['id', 'user', 'operation', 'status', 'duration', 'timestamp', 'error_message', 'cache_status']
+
 class SoapRequestLogSerializer(serializers.ModelSerializer):
     timestamp = serializers.DateTimeField(read_only=True)
-    
+    # Inline on older rows, in a shared PayloadBlob on newer ones
+    request_payload = serializers.CharField(source='request_content', read_only=True)
+    response_payload = serializers.CharField(source='response_content', read_only=True, allow_null=True)
+
     class Meta:
         model = SoapRequestLog
-        fields = '__all__'
+        exclude = ['request_blob', 'response_blob']
+
+class TenderLotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TenderLot
+        fields = ['lot_number', 'lot_name', 'description', 'amount', 'unit']
+
+class TenderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Tender from the local read model; `freshness` says when the hub last returned it."""
+    lots = TenderLotSerializer(many=True, read_only=True)
+    freshness = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tender
+        fields = ['id', 'ref_number', 'ref_name', 'pe_code', 'pe_name', 'tender_type', 'tender_method',
+                  'public_date', 'open_date', 'deadline_date', 'lots', 'data', 'freshness']
+        embeddable = ['data']
+
+    def get_freshness(self, obj):
+        return freshness(obj.synced_at)
+
+class ContractLotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContractLot
+        fields = ['lot_number', 'lot_name', 'amount']
+
+class ContractSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Contract from the local read model; ?embed=data adds the full hub record."""
+    lots = ContractLotSerializer(many=True, read_only=True)
+    freshness = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Contract
+        fields = ['id', 'contract_number', 'serial_number', 'contract_name', 'contract_date', 'contract_amount',
+                  'currency', 'pe_name', 'pe_tin_number', 'supplier_name', 'supplier_tin_number',
+                  'tender_ref_number', 'lots', 'data', 'freshness']
+        embeddable = ['data']
+
+    def get_freshness(self, obj):
+        return freshness(obj.synced_at)
 
 class SoapExecuteSerializer(serializers.Serializer):
     """
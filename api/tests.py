@@ -0,0 +1,191 @@
+import gzip
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import Role, RoleOperation, UserRole, SoapRequestLog, Contract
+from services import read_model, samples
+from services.results import parse_response
+from core.testing import QueryBudgetTestMixin
+
+
+class UserRoleApiTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('apiadmin', 'apiadmin@example.com', 'password')
+        self.role = Role.objects.get(name='Admin')
+        for i in range(5):
+            user = User.objects.create_user(username=f'user{i}', password='password')
+            UserRole.objects.create(user=user, role=self.role)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_users_are_paginated(self):
+        response = self.client.get('/api/users/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_sparse_fields(self):
+        response = self.client.get('/api/users/', {'fields': 'id,username'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+
+    def test_embedded_roles_are_prefetched(self):
+        # version lookup + count + users page + prefetched user_roles
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/users/', {'embed': 'roles'})
+        user = next(u for u in response.data['results'] if u['username'] == 'user0')
+        self.assertEqual(user['roles'], [{'id': self.role.id, 'name': 'Admin'}])
+
+    def test_roles_not_embedded_by_default(self):
+        response = self.client.get('/api/users/')
+        self.assertNotIn('roles', response.data['results'][0])
+
+    def test_unchanged_collection_returns_304(self):
+        response = self.client.get('/api/roles/')
+        etag = response['ETag']
+        response = self.client.get('/api/roles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Role.objects.create(name='Auditor')
+        response = self.client.get('/api/roles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LogApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='logreader', password='password')
+        self.envelope = '<soapenv:Envelope>' + 'x' * 5000 + '</soapenv:Envelope>'
+        self.log = SoapRequestLog.objects.create(
+            user=self.user, operation='getTenderInformation', request_payload=self.envelope,
+            response_payload='<ok/>', status='SUCCESS', duration=0.5,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_omits_payloads(self):
+        response = self.client.get('/api/logs/')
+        row = response.data[0]
+        self.assertNotIn('request_payload', row)
+        self.assertNotIn('response_payload', row)
+
+    def test_detail_includes_payloads(self):
+        response = self.client.get(f'/api/logs/{self.log.pk}/')
+        self.assertEqual(response.data['request_payload'], self.envelope)
+
+    def test_payload_range(self):
+        url = f'/api/logs/{self.log.pk}/payload/request/'
+        response = self.client.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.envelope[:10].encode())
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{len(self.envelope)}')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.content, self.envelope[-5:].encode())
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.envelope)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_list_date_bounds(self):
+        SoapRequestLog.objects.filter(pk=self.log.pk).update(timestamp=timezone.now() - timedelta(days=10))
+        day = (timezone.localtime() - timedelta(days=10)).date()
+        self.assertEqual(len(self.client.get('/api/logs/', {'since': day.isoformat()}).data), 1)
+        self.assertEqual(len(self.client.get('/api/logs/', {'until': (day - timedelta(days=1)).isoformat()}).data), 0)
+        self.assertEqual(len(self.client.get('/api/logs/', {'since': (day + timedelta(days=1)).isoformat()}).data), 0)
+        # Without ?since= the list covers LOG_API_WINDOW_DAYS up to ?until= or today
+        SoapRequestLog.objects.filter(pk=self.log.pk).update(timestamp=timezone.now() - timedelta(days=45))
+        day = (timezone.localtime() - timedelta(days=45)).date()
+        self.assertEqual(len(self.client.get('/api/logs/').data), 0)
+        self.assertEqual(len(self.client.get('/api/logs/', {'until': (day + timedelta(days=29)).isoformat()}).data), 1)
+        self.assertEqual(len(self.client.get('/api/logs/', {'until': (day + timedelta(days=30)).isoformat()}).data), 0)
+        self.assertEqual(len(self.client.get('/api/logs/', {'since': day.isoformat()}).data), 1)
+        self.assertEqual(self.client.get('/api/logs/', {'since': '10 days ago'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/logs/', {'until': '2026-13-01'}).status_code, 400)
+
+    def test_payload_gzip(self):
+        response = self.client.get(f'/api/logs/{self.log.pk}/payload/request/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.envelope.encode())
+
+
+class ReadModelApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='password')
+        role = Role.objects.create(name='Reference reader')
+        for operation in ('getTenderInformation', 'getContractInformation'):
+            RoleOperation.objects.create(role=role, operation_name=operation)
+        UserRole.objects.create(user=self.user, role=role)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        read_model.sync_tenders(parse_response('getTenderInformation', samples.tender_response(tenders=3, lots=2)))
+        read_model.sync_contracts(parse_response('getContractInformation', samples.contract_response(contracts=61, lots=2)))
+
+    def test_tender_search_by_pe_and_deadline(self):
+        response = self.client.get('/api/tenders/', {'pe_name': 'Ministry 1', 'deadline_from': '2026-11-01',
+                                                     'deadline_to': '2026-11-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['ref_number'] for t in response.data['results']], ['T-000001'])
+        tender = response.data['results'][0]
+        self.assertEqual(len(tender['lots']), 2)
+        self.assertFalse(tender['freshness']['stale'])
+        self.assertNotIn('data', tender)
+
+        response = self.client.get('/api/tenders/', {'deadline_to': '30/11/2026'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/tenders/', {'deadline_from': '2026-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_contract_search_by_supplier_tin(self):
+        with self.assertNumQueries(4):  # role check, count, page, lots prefetch
+            response = self.client.get('/api/contracts/', {'supplier_tin': '200000007', 'embed': 'data'})
+        self.assertEqual([c['contract_number'] for c in response.data['results']], ['C-000007', 'C-000060'])
+        self.assertEqual(response.data['results'][0]['data']['supplierTINNumber'], '200000007')
+
+    def test_requires_the_lookup_operation(self):
+        outsider = User.objects.create_user(username='outsider', password='password')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get('/api/tenders/').status_code, 403)
+        self.assertEqual(self.client.get('/api/contracts/').status_code, 403)
+
+        # An inactive grant is no grant
+        role = Role.objects.create(name='Tender reader')
+        grant = RoleOperation.objects.create(role=role, operation_name='getTenderInformation', is_active=False)
+        UserRole.objects.create(user=outsider, role=role)
+        self.assertEqual(self.client.get('/api/tenders/').status_code, 403)
+        grant.is_active = True
+        grant.save()
+        self.assertEqual(self.client.get('/api/tenders/').status_code, 200)
+        self.assertEqual(self.client.get('/api/contracts/').status_code, 403)
+
+    def test_superuser_needs_no_role(self):
+        admin = User.objects.create_superuser('refadmin', 'refadmin@example.com', 'password')
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(self.client.get('/api/contracts/').status_code, 200)
+
+    def test_resync_updates_in_place(self):
+        read_model.sync_contracts(parse_response('getContractInformation', samples.contract_response(contracts=1, lots=3)))
+        self.assertEqual(Contract.objects.count(), 61)
+        self.assertEqual(Contract.objects.get(contract_number='C-000000').lots.count(), 3)
+
+
+class ApiQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('budgetapi', 'budgetapi@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.add_users(2)
+
+    def add_users(self, count):
+        role = Role.objects.get(name='Manager')
+        for _ in range(count):
+            user = User.objects.create_user(username=f'member{User.objects.count()}', password='password')
+            UserRole.objects.create(user=user, role=role)
+            SoapRequestLog.objects.create(user=user, operation='getTenderInformation', status='SUCCESS', duration=0.1)
+
+    def test_listings_do_not_query_per_row(self):
+        for url, params in (('/api/users/', {'embed': 'roles'}), ('/api/logs/', {})):
+            with self.subTest(url=url):
+                self.assertQueryCountStable(lambda: self.client.get(url, params), lambda: self.add_users(5))
+                self.assertWithinQueryBudget(self.client.get(url, params))
@@ -1,13 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
-from .views import UserViewSet, RoleViewSet, LogViewSet, SoapViewSet
+from .views import UserViewSet, RoleViewSet, LogViewSet, SoapViewSet, TenderViewSet, ContractViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'roles', RoleViewSet)
 router.register(r'logs', LogViewSet)
 router.register(r'soap', SoapViewSet, basename='soap')
+router.register(r'tenders', TenderViewSet)
+router.register(r'contracts', ContractViewSet)
 
 urlpatterns = [
     path('auth/login/', obtain_auth_token, name='api_token_auth'),
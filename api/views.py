@@ -1,26 +1,220 @@
 from rest_framework import viewsets, status, views
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import permissions
 
+import gzip
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from core.models import Role, SoapRequestLog
-from api.serializers import UserSerializer, RoleSerializer, SoapRequestLogSerializer, SoapExecuteSerializer
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from core.models import Role, UserRole, SoapRequestLog, Tender, Contract
+from api.mixins import ConditionalGetMixin
+from api.pagination import StandardPagination
+from api.permissions import HasSoapOperation
+from api.serializers import UserSerializer, RoleSerializer, SoapRequestLogSerializer, SoapRequestLogListSerializer, SoapExecuteSerializer, TenderSerializer, ContractSerializer, requested_embeds
+from services.log_partitions import day_range
 from services.soap_client import SoapClient
+from services.registry import get_registry
+from services.retry import Deadline
+from services.stale_cache import Staleness
+
+# Time budget for a synchronous SOAP call made from the API, retries included
+SOAP_API_DEADLINE = getattr(settings, 'SOAP_API_DEADLINE', 25)
+# Days of logs the log list covers when ?since= is not given, so it reads only recent partitions
+LOG_API_WINDOW_DAYS = getattr(settings, 'LOG_API_WINDOW_DAYS', 30)
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
+    pagination_class = StandardPagination
+    version_key = 'users'
 
-class RoleViewSet(viewsets.ModelViewSet):
-    queryset = Role.objects.all()
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'roles' in requested_embeds(self.request):
+            # One extra query for all roles on the page instead of one per user
+            queryset = queryset.prefetch_related(
+                Prefetch('user_roles', queryset=UserRole.objects.select_related('role'))
+            )
+        return queryset
+
+class RoleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Role.objects.all().order_by('id')
     serializer_class = RoleSerializer
+    pagination_class = StandardPagination
+    version_key = 'roles'
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:  # well formed but impossible, e.g. 2026-02-30
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+    return parsed
+
+class TenderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Tenders mirrored from the hub. Filters: ?q= (reference name or number),
+    ?pe_name=, ?deadline_from= and ?deadline_to= (YYYY-MM-DD).
+    """
+    queryset = Tender.objects.prefetch_related('lots').order_by('deadline_date', 'id')
+    serializer_class = TenderSerializer
+    pagination_class = StandardPagination
+    permission_classes = [HasSoapOperation]
+    soap_operation = 'getTenderInformation'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('q'):
+            queryset = queryset.filter(Q(ref_number__icontains=params['q']) | Q(ref_name__icontains=params['q']))
+        if params.get('pe_name'):
+            queryset = queryset.filter(pe_name__icontains=params['pe_name'])
+        deadline_from = _date_param(self.request, 'deadline_from')
+        if deadline_from:
+            queryset = queryset.filter(deadline_date__gte=deadline_from)
+        deadline_to = _date_param(self.request, 'deadline_to')
+        if deadline_to:
+            queryset = queryset.filter(deadline_date__lte=deadline_to)
+        return queryset
+
+class ContractViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Contracts mirrored from the hub. Filters: ?pe_name=, ?pe_tin=, ?supplier_tin=,
+    ?tender_ref_number=, ?contract_date_from= and ?contract_date_to= (YYYY-MM-DD).
+    """
+    queryset = Contract.objects.prefetch_related('lots').order_by('contract_number', 'serial_number')
+    serializer_class = ContractSerializer
+    pagination_class = StandardPagination
+    permission_classes = [HasSoapOperation]
+    soap_operation = 'getContractInformation'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('pe_name'):
+            queryset = queryset.filter(pe_name__icontains=params['pe_name'])
+        for param, field in (('pe_tin', 'pe_tin_number'), ('supplier_tin', 'supplier_tin_number'),
+                             ('tender_ref_number', 'tender_ref_number')):
+            if params.get(param):
+                queryset = queryset.filter(**{field: params[param]})
+        date_from = _date_param(self.request, 'contract_date_from')
+        if date_from:
+            queryset = queryset.filter(contract_date__gte=date_from)
+        date_to = _date_param(self.request, 'contract_date_to')
+        if date_to:
+            queryset = queryset.filter(contract_date__lte=date_to)
+        return queryset
+
+PAYLOAD_FIELDS = {
+    'request': 'request_payload',
+    'response': 'response_payload',
+}
+# Below this size gzip costs more CPU than it saves on the wire
+PAYLOAD_GZIP_MIN_BYTES = 1024
+
+def _parse_byte_range(header, size):
+    """
+    Parse a single-range 'bytes=' header into an inclusive (start, end) tuple.
+    Returns None when the header should be ignored (absent, malformed or multi-range)
+    and raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start_str, sep, end_str = header[len('bytes='):].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if start_str == '':
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            start, end = max(size - length, 0), size - 1
+            if length <= 0:
+                start = size
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
 
 class LogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    SOAP request logs, newest first. Filters: ?since= and ?until= (YYYY-MM-DD,
+    both inclusive). Without ?since= the list covers the LOG_API_WINDOW_DAYS days
+    up to ?until= (or today), so it only reads the matching monthly partitions.
+    """
     queryset = SoapRequestLog.objects.all().order_by('-timestamp')
     serializer_class = SoapRequestLogSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.defer('request_payload', 'response_payload')
+            since, until = _date_param(self.request, 'since'), _date_param(self.request, 'until')
+            if since is None:
+                since = (until or timezone.localdate()) - timedelta(days=LOG_API_WINDOW_DAYS - 1)
+            queryset = queryset.filter(day_range(since, until))
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('request_blob', 'response_blob')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SoapRequestLogListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, methods=['get'], url_path='payload/(?P<which>request|response)')
+    def payload(self, request, pk=None, which=None):
+        """
+        Raw request or response envelope for a single log entry.
+        URL: /api/logs/<id>/payload/<request|response>/
+        Supports 'Range: bytes=...' for paging through large envelopes and
+        gzip when the client sends 'Accept-Encoding: gzip' without a Range.
+        """
+        field = PAYLOAD_FIELDS[which]
+        blob = f'{which}_blob'
+        log = get_object_or_404(self.get_queryset().select_related(blob).only('id', field, f'{blob}__content'), pk=pk)
+        body = (getattr(log, f'{which}_content') or '').encode('utf-8')
+        size = len(body)
+        content_type = 'text/xml; charset=utf-8' if body.lstrip().startswith(b'<') else 'application/json'
+
+        try:
+            byte_range = _parse_byte_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is not None:
+            start, end = byte_range
+            response = HttpResponse(body[start:end + 1], content_type=content_type, status=status.HTTP_206_PARTIAL_CONTENT)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        elif size >= PAYLOAD_GZIP_MIN_BYTES and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(gzip.compress(body), content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(body, content_type=content_type)
+
+        response['Accept-Ranges'] = 'bytes'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
 class SoapViewSet(viewsets.ViewSet):
     """
     Gateway to SOAP Operations.
@@ -29,16 +223,7 @@ class SoapViewSet(viewsets.ViewSet):
 
     def list(self, request):
         """List available SOAP operations."""
-        # Hardcoded list or introspection of SoapClient
-        operations = [
-            'getTenderInformation',
-            'sendAdvancePaymentInformation',
-            'sendBidSecurityInformation',
-            'getContractInformation',
-            'sendCreditLineFacility',
-            'sendPerformSecurityInformation',
-        ]
-        return Response({'operations': operations})
+        return Response({'operations': get_registry().operation_names})
 
     @action(detail=False, methods=['post'], url_path='execute/(?P<operation>[^/.]+)')
     def execute_operation(self, request, operation=None):
@@ -47,29 +232,15 @@ class SoapViewSet(viewsets.ViewSet):
         URL: /api/soap/execute/<operationName>/
         Body: JSON payload (id, password, other args...)
         """
-        # 1. Map URL operation name to Python method name
-        # Convention: camelCase matches direct method calls in our client wrapper?
-        # Our SoapClient methods are snake_case: get_tender_information
-        # But decorators track camelCase: getTenderInformation
-        # Let's map manually or strict snake_case.
-        
-        # Simple mapper for safety
-        method_map = {
-            'getTenderInformation': 'get_tender_information',
-            'sendAdvancePaymentInformation': 'send_advance_payment_information',
-            'sendBidSecurityInformation': 'send_bid_security_information',
-            'getContractInformation': 'get_contract_information',
-            'sendCreditLineFacility': 'send_credit_line_facility',
-            'sendPerformSecurityInformation': 'send_perform_security_information',
-        }
-        
-        if operation not in method_map:
+        # 1. Map URL operation name to the SoapClient method via the WSDL registry
+        spec = get_registry().get(operation)
+        if spec is None:
             return Response({'error': f"Unknown operation '{operation}'"}, status=status.HTTP_400_BAD_REQUEST)
         
-        method_name = method_map[operation]
+        method_name = spec.method_name
         
-        # 2. Instantiate Client
-        client = SoapClient()
+        # 2. Instantiate Client with this request's time budget
+        client = SoapClient(deadline=Deadline(SOAP_API_DEADLINE))
         
         # 3. Call Method
         try:
@@ -86,9 +257,14 @@ class SoapViewSet(viewsets.ViewSet):
             method = getattr(client, method_name)
             result = method(user=request.user, **kwargs)
             
-            # Result might be a Zeep object, need serialization
-            from zeep.helpers import serialize_object
-            return Response(serialize_object(result))
+            # Typed result models and guardrail dicts are encoded directly by FastJSONRenderer
+            response = Response(result)
+            if client.staleness:
+                # Served from the last-known-good cache
+                response['Age'] = str(int(client.staleness.age))
+                response['Warning'] = ('111 - "Revalidation Failed"' if client.staleness.reason == Staleness.UPSTREAM_ERROR
+                                       else '110 - "Response is Stale"')
+            return response
             
         except TypeError as e:
             return Response({'error': f"Invalid arguments: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
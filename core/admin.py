@@ -1,5 +1,76 @@
+import json
+
 from django.contrib import admin
-from .models import Role, UserRole, RoleOperation, SoapRequestLog
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.views.decorators.clickjacking import xframe_options_sameorigin
+from .models import Role, UserRole, RoleOperation, SoapRequestLog, SoapJob, BulkSubmission, RequestProfile, SlowCall
+
+# Changelists counting more rows than this show the planner's estimate (PostgreSQL)
+ADMIN_EXACT_COUNT_LIMIT = 10000
+# How long list filter choices are reused before they are read again
+ADMIN_FILTER_CACHE_SECONDS = 300
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Skips COUNT(*) over large result sets: on PostgreSQL the planner's row
+    estimate is used when it is above ADMIN_EXACT_COUNT_LIMIT, so the page
+    count is approximate but costs a plan instead of a scan.
+    """
+
+    @cached_property
+    def count(self):
+        if connection.vendor == 'postgresql':
+            plan = json.loads(self.object_list.order_by().explain(format='json'))
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate > ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class CachedChoicesFilter(admin.SimpleListFilter):
+    """
+    Choices are the values of `field` in the newest `sample_rows` rows, read
+    once per ADMIN_FILTER_CACHE_SECONDS instead of with a DISTINCT over the
+    whole table on every page load. Values not seen lately still filter when
+    given in the URL.
+    """
+    field = None
+    sample_rows = 10000
+
+    def lookups(self, request, model_admin):
+        key = f"admin-filter:{model_admin.model._meta.label_lower}:{self.field}"
+        values = cache.get(key)
+        if values is None:
+            # Walks the primary key index backwards; no scan, however large the table
+            newest = model_admin.model.objects.order_by('-pk').values_list(self.field, flat=True)[:self.sample_rows]
+            values = sorted(set(newest))
+            cache.set(key, values, ADMIN_FILTER_CACHE_SECONDS)
+        return [(value, value) for value in values]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field: self.value()})
+        return queryset
+
+
+class LogStatusFilter(CachedChoicesFilter):
+    title = 'status'
+    parameter_name = 'status__exact'
+    field = 'status'
+
+
+class LogOperationFilter(CachedChoicesFilter):
+    title = 'operation'
+    parameter_name = 'operation__exact'
+    field = 'operation'
 
 class RoleOperationInline(admin.TabularInline):
     model = RoleOperation
@@ -25,9 +96,134 @@ class RoleOperationAdmin(admin.ModelAdmin):
 @admin.register(SoapRequestLog)
 class SoapRequestLogAdmin(admin.ModelAdmin):
     list_display = ('timestamp', 'operation', 'user', 'status', 'duration')
-    list_filter = ('status', 'operation', 'timestamp')
-    search_fields = ('operation', 'user__username', 'request_payload')
-    readonly_fields = ('timestamp', 'operation', 'user', 'request_payload', 'response_payload', 'status', 'duration', 'error_message')
+    list_filter = (LogStatusFilter, LogOperationFilter, 'timestamp')
+    list_select_related = ('user',)
+    # Payload columns are left out: a LIKE over every envelope is a sequential scan of the table
+    search_fields = ('operation', 'user__username', '=trace_id')
+    # Counting is the slow part of a changelist over millions of rows
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    exclude = ('request_payload', 'response_payload', 'request_blob', 'response_blob')
+    readonly_fields = ('timestamp', 'operation', 'user', 'status', 'duration', 'error_message', 'hedges', 'hedge_wins',
+                       'timings', 'trace_id', 'cache_status', 'request_viewer', 'response_viewer')
+    payload_fields = {'request': 'request_payload', 'response': 'response_payload'}
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        # Envelopes are only read by payload_view, when a viewer is opened
+        return super().get_queryset(request).defer(*self.payload_fields.values())
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/payload/<str:which>/', self.admin_site.admin_view(self.payload_view),
+                 name='core_soaprequestlog_payload'),
+        ] + super().get_urls()
+
+    @xframe_options_sameorigin
+    def payload_view(self, request, pk, which):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        field = self.payload_fields.get(which)
+        if field is None:
+            raise Http404
+        blob = f'{which}_blob'
+        log = get_object_or_404(SoapRequestLog.objects.select_related(blob).only('id', field, f'{blob}__content'), pk=pk)
+        return HttpResponse(getattr(log, f'{which}_content') or '', content_type='text/plain; charset=utf-8')
+
+    def _viewer(self, obj, which):
+        url = reverse('admin:core_soaprequestlog_payload', args=[obj.pk, which])
+        # The frame of a closed <details> is only fetched once it is opened
+        return format_html(
+            '<details><summary>Show {} (<a href="{}" target="_blank">open in a new tab</a>)</summary>'
+            '<iframe src="{}" loading="lazy" style="width: 100%; height: 30em; border: 1px solid #ccc"></iframe>'
+            '</details>', which, url, url,
+        )
+
+    @admin.display(description='Request payload')
+    def request_viewer(self, obj):
+        return self._viewer(obj, 'request')
+
+    @admin.display(description='Response payload')
+    def response_viewer(self, obj):
+        return self._viewer(obj, 'response')
+
+@admin.register(SoapJob)
+class SoapJobAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'operation', 'user', 'status', 'finished_at')
+    list_filter = ('status', 'operation')
+    readonly_fields = ('operation', 'user', 'status', 'result', 'error_message', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(BulkSubmission)
+class BulkSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'operation', 'file_name', 'user', 'status', 'processed_rows', 'total_rows', 'failed_rows')
+    list_filter = ('status', 'operation')
+    exclude = ('source', 'result')
+    readonly_fields = ('operation', 'file_name', 'user', 'status', 'total_rows', 'processed_rows', 'succeeded_rows',
+                       'failed_rows', 'error_message', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'mode', 'method', 'path', 'status_code', 'duration', 'query_count', 'user')
+    list_filter = ('mode', 'view_name')
+    search_fields = ('path', 'view_name', 'user__username')
+    exclude = ('summary', 'data')
+    readonly_fields = ('created_at', 'user', 'mode', 'method', 'path', 'view_name', 'status_code', 'duration',
+                       'query_count', 'download', 'summary_text')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view), name='core_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        record = get_object_or_404(RequestProfile, pk=pk)
+        content_type = 'application/octet-stream' if record.mode == RequestProfile.MODE_CPROFILE else 'text/plain'
+        response = HttpResponse(bytes(record.data), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{record.file_name}"'
+        return response
+
+    @admin.display(description='Profile file')
+    def download(self, obj):
+        hint = 'python -m pstats, snakeviz or flameprof' if obj.mode == RequestProfile.MODE_CPROFILE else 'flamegraph.pl or speedscope'
+        return format_html('<a href="{}">{}</a> (open with {})',
+                           reverse('admin:core_requestprofile_download', args=[obj.pk]), obj.file_name, hint)
+
+    @admin.display(description='Summary')
+    def summary_text(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.summary)
+
+@admin.register(SlowCall)
+class SlowCallAdmin(admin.ModelAdmin):
+    list_display = ('severity_display', 'kind', 'name', 'duration', 'threshold', 'reason', 'status', 'created_at', 'user')
+    list_filter = ('kind', 'reason', 'name')
+    search_fields = ('name', 'user__username', '=trace_id')
+    ordering = ('-severity',)
+    readonly_fields = ('kind', 'name', 'created_at', 'duration', 'threshold', 'reason', 'severity', 'status', 'user',
+                       'trace_id', 'log', 'error_message', 'timings', 'pool_state', 'request_payload', 'response_payload')
 
     def has_add_permission(self, request):
         return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Severity', ordering='severity')
+    def severity_display(self, obj):
+        return f"{obj.severity:.1f}x"
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import log_archive, payload_store
+
+
+class Command(BaseCommand):
+    help = ('Move old SOAP request logs to compressed NDJSON files under LOG_ARCHIVE_DIR (by day and operation) '
+            'and delete them from the table, chunk by chunk (run from cron; safe to interrupt and re-run)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=float, default=log_archive.LOG_RETENTION_DAYS,
+                            help='Archive rows older than this many days (default LOG_RETENTION_DAYS)')
+        parser.add_argument('--keep-rows', type=int, help='Also archive all but this many newest rows, to bound the table')
+        parser.add_argument('--chunk-size', type=int, default=log_archive.LOG_ARCHIVE_CHUNK, help='Rows per chunk')
+        parser.add_argument('--max-chunks', type=int, help='Stop after this many chunks')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to wait between chunks')
+        parser.add_argument('--directory', help='Archive directory (default LOG_ARCHIVE_DIR)')
+        parser.add_argument('--no-archive', action='store_true', help='Delete the rows without writing them anywhere')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        root = Path(options['directory']) if options['directory'] else log_archive.LOG_ARCHIVE_DIR
+        report = log_archive.archive(
+            older_than_days=options['older_than'], keep_rows=options['keep_rows'], chunk_size=options['chunk_size'],
+            root=root, write=not options['no_archive'], pause=options['pause'], max_chunks=options['max_chunks'],
+        )
+        action = 'Deleted' if options['no_archive'] else f"Archived to {report.files} file(s) under {root} and deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {report.rows} log row(s) in {report.chunks} chunk(s)"))
+        if report.rows:
+            self.stdout.write(f"Deleted {payload_store.collect_garbage()} payload(s) no longer referenced")
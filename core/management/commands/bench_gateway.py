@@ -0,0 +1,69 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services import benchmarks
+
+BENCHMARK_BASELINE_PATH = getattr(settings, 'BENCHMARK_BASELINE_PATH', os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'))
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the SOAP gateway hot path offline; store baselines and flag regressions against them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', help='Run only cases whose name starts with, or whose group is, one of these')
+        parser.add_argument('--repeat', type=int, default=7, help='Timed samples per case')
+        parser.add_argument('--baseline', default=BENCHMARK_BASELINE_PATH, help='Baseline results file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+        parser.add_argument('--compare', action='store_true', help='Fail if a case is slower than the baseline beyond --threshold')
+        parser.add_argument('--threshold', type=float, default=benchmarks.BENCHMARK_REGRESSION_THRESHOLD,
+                            help='Allowed slowdown as a fraction, e.g. 0.2 for 20%%')
+        parser.add_argument('--output', help='Also write the results to this file')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except FileNotFoundError:
+                raise CommandError(f"No baseline at {options['baseline']}; create one with --save-baseline")
+
+        progress = None if options['json'] else (lambda name: self.stderr.write(f"  {name}", ending='\n'))
+        results = benchmarks.run(options['only'], options['repeat'], progress)
+
+        comparison = None
+        if baseline is not None:
+            if baseline['environment'] != results['environment']:
+                self.stderr.write(self.style.WARNING("Baseline was recorded in a different environment; ratios may not be meaningful"))
+            comparison = benchmarks.compare(results, baseline, options['threshold'])
+            results['comparison'] = comparison
+
+        for path in filter(None, [options['output'], options['baseline'] if options['save_baseline'] else None]):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(benchmarks.dump({k: v for k, v in results.items() if k != 'comparison'} if path == options['baseline'] else results))
+
+        if options['json']:
+            self.stdout.write(benchmarks.dump(results))
+        else:
+            self._report(results, comparison)
+
+        regressions = [row['case'] for row in comparison or [] if row['regression']]
+        if regressions:
+            raise CommandError(f"{len(regressions)} case(s) regressed beyond {options['threshold']:.0%}: {', '.join(regressions)}")
+
+    def _report(self, results, comparison):
+        ratios = {row['case']: row for row in comparison or []}
+        for name, case in results['cases'].items():
+            line = f"{name:>52}: {case['best_us']:>12.1f} us (median {case['median_us']:.1f}, x{case['loops']})"
+            if 'retained_bytes' in case:
+                line += f", {case['retained_bytes']} bytes retained"
+            row = ratios.get(name)
+            if row:
+                style = self.style.ERROR if row['regression'] else self.style.SUCCESS
+                line += style(f"  {row['ratio']:.2f}x baseline")
+            self.stdout.write(line)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services import payload_store
+
+
+def _size(n: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024
+
+
+class Command(BaseCommand):
+    help = ('Report how much storage content-addressed SOAP log payloads save; optionally move inline payloads '
+            'of older rows to shared blobs and delete blobs no row references any more')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help='Move payloads still stored inline to shared blobs')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows converted per transaction')
+        parser.add_argument('--max-chunks', type=int, help='Stop converting after this many chunks')
+        parser.add_argument('--gc', action='store_true', help='Delete unreferenced blobs (after PAYLOAD_GC_GRACE_HOURS)')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        if options['convert']:
+            converted = payload_store.convert(chunk_size=options['chunk_size'], max_chunks=options['max_chunks'])
+            self.stdout.write(f"Moved the payloads of {converted} log row(s) to shared blobs")
+        if options['gc']:
+            self.stdout.write(f"Deleted {payload_store.collect_garbage()} unreferenced payload(s)")
+
+        report = payload_store.report()
+        self.stdout.write(f"{report.rows} log row(s), {report.blobs} distinct payload(s)")
+        self.stdout.write(f"Payloads: {_size(report.logical_bytes)} as logged, {_size(report.stored_bytes)} stored")
+        self.stdout.write(self.style.SUCCESS(f"Saved {_size(report.saved_bytes)} ({report.ratio:.1f}x smaller)"))
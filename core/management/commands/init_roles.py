@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from core.models import Role, RoleOperation
+from services.registry import get_registry
 
 class Command(BaseCommand):
     help = 'Initialize default roles and permissions'
@@ -17,14 +18,7 @@ class Command(BaseCommand):
                 self.stdout.write(f'Role already exists: {role_name}')
 
         # 2. Define Permissions (Operations per Role)
-        operations = [
-            'getTenderInformation',
-            'sendAdvancePaymentInformation',
-            'sendBidSecurityInformation',
-            'getContractInformation',
-            'sendCreditLineFacility',
-            'sendPerformSecurityInformation',
-        ]
+        operations = get_registry().operation_names
 
         # Admin and Underwriter get all operations
         # Manager gets none (View Only)
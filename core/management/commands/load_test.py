@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Load-test a running instance with a mix of API, web form, dashboard and export requests. '
+            'Run the hub stand-in (soap_standin) and start the server with SOAP_SERVICE_ADDRESS and LOAD_TEST_HEADERS=True.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--username', default='admin', help='A superuser or Admin/Underwriter account')
+        parser.add_argument('--password', default=os.environ.get('LOAD_TEST_PASSWORD'),
+                            help='Defaults to the LOAD_TEST_PASSWORD environment variable')
+        parser.add_argument('--mix', help="Weighted targets, e.g. 'api:getTenderInformation=3,web:sendBidSecurityInformation=1,"
+                                          "dashboard=1,export=1'. Default: every operation via API and web, plus dashboard and export")
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients (the in-flight cap with --rate)')
+        parser.add_argument('--rate', type=float, help='Requests per second to start (open loop); default is closed loop')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--seed', type=int, help='Seed for the target sequence, for repeatable runs')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--json', action='store_true', help='Print the JSON report')
+
+    def handle(self, *args, **options):
+        if not options['password']:
+            raise CommandError("Give --password or set LOAD_TEST_PASSWORD")
+        try:
+            mix = loadtest.parse_mix(options['mix']) if options['mix'] else loadtest.default_mix()
+            report = loadtest.run(
+                options['base_url'], options['username'], options['password'], mix, options['duration'],
+                options['concurrency'], rate=options['rate'], timeout=options['timeout'], seed=options['seed'],
+            )
+        except loadtest.LoadTestError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+
+        overall = report['overall']
+        self.stdout.write(f"{overall['requests']} requests in {report['elapsed_seconds']}s: "
+                          f"{overall['throughput_rps']} req/s, {overall['error_rate']:.1%} errors")
+        self.stdout.write(f"{'target':>40} {'req':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'queries':>8}")
+        for name, stats in [('overall', overall), *report['targets'].items()]:
+            latency = stats['latency_ms']
+            queries = stats.get('db_queries', {}).get('mean', '-')
+            self.stdout.write(f"{name:>40} {stats['requests']:>6} {stats['error_rate']:>6.1%} {latency['p50']:>8} "
+                              f"{latency['p95']:>8} {latency['p99']:>8} {latency['max']:>8} {queries:>8}")
+        if 'worker_saturation' in report:
+            saturation = report['worker_saturation']
+            self.stdout.write(f"Job pool busy {saturation['busy_share_mean']:.0%} on average, "
+                              f"{saturation['busy_share_max']:.0%} at peak, up to {saturation['queued_max']} queued")
+        if 'client_lag_ms' in report:
+            self.stdout.write(self.style.WARNING(
+                f"Requests started up to {report['client_lag_ms']['max']} ms late; raise --concurrency if this grows"))
+        for kind, count in report['error_kinds'].items():
+            self.stdout.write(self.style.ERROR(f"{count:>6} x {kind}"))
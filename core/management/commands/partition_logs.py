@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import log_archive, log_partitions, payload_store
+
+
+class Command(BaseCommand):
+    help = ('Keep the monthly partitions of the SOAP request log (PostgreSQL): create the coming months and '
+            'drop, after archiving them under LOG_ARCHIVE_DIR, those past the retention period (run daily from cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=log_partitions.LOG_PARTITION_MONTHS_AHEAD,
+                            help='Months to create beyond the current one (default LOG_PARTITION_MONTHS_AHEAD)')
+        parser.add_argument('--drop-older-than', type=float,
+                            help='Drop partitions whose rows are all older than this many days')
+        parser.add_argument('--directory', help='Archive directory (default LOG_ARCHIVE_DIR)')
+        parser.add_argument('--no-archive', action='store_true', help='Drop partitions without writing their rows anywhere')
+
+    def handle(self, *args, **options):
+        if not log_partitions.is_partitioned():
+            raise CommandError("The SOAP request log is not partitioned (PostgreSQL only, see core migration 0017)")
+        if options['months_ahead'] < 0:
+            raise CommandError("--months-ahead cannot be negative")
+
+        for name in log_partitions.ensure_partitions(options['months_ahead']):
+            self.stdout.write(f"Created {name}")
+        if options['drop_older_than'] is not None:
+            root = Path(options['directory']) if options['directory'] else log_archive.LOG_ARCHIVE_DIR
+            dropped = log_partitions.drop_expired(options['drop_older_than'], archive=not options['no_archive'], root=root)
+            for name, rows in dropped:
+                self.stdout.write(f"Dropped {name}" + ('' if options['no_archive'] else f" after archiving {rows} row(s) to {root}"))
+            if dropped:
+                self.stdout.write(f"Deleted {payload_store.collect_garbage()} payload(s) no longer referenced")
+
+        for partition in log_partitions.partitions():
+            bounds = 'default' if partition.default else f"{partition.start or '-'} .. {partition.end}"
+            self.stdout.write(f"  {partition.name}: {bounds}")
+        self.stdout.write(self.style.SUCCESS("Log partitions up to date"))
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Contract, Tender
+from services.read_model import TenderInfo
+from services.soap_client import SOAP_CREDENTIALS, SoapClient
+
+
+class Command(BaseCommand):
+    help = 'Re-fetch tenders and contracts in the local read model that the hub has not returned recently (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=float, default=24, help='Refresh records last synced more than this many hours ago')
+        parser.add_argument('--limit', type=int, default=500, help='Maximum records to refresh per kind')
+        parser.add_argument('--only', choices=['tenders', 'contracts'], help='Refresh one kind of record only')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than'])
+        client = SoapClient()
+        credentials = {'id': SOAP_CREDENTIALS['id_val'], 'password': SOAP_CREDENTIALS['password']}
+
+        if options['only'] != 'contracts':
+            tenders = Tender.objects.filter(synced_at__lt=cutoff).order_by('synced_at')[:options['limit']]
+            infos = [TenderInfo.from_tender(tender) for tender in tenders]
+            failed = sum(
+                not self._ok(client.call_operation('getTenderInformation', use_cache=False, tenderInfoRequest={
+                    **credentials, 'tenderRefName': info.ref_name, 'tenderRefNumber': info.ref_number,
+                }))
+                for info in infos
+            )
+            self._report('tenders', len(infos), failed)
+
+        if options['only'] != 'tenders':
+            contracts = list(Contract.objects.filter(synced_at__lt=cutoff).order_by('synced_at')
+                             .values_list('contract_number', 'serial_number')[:options['limit']])
+            failed = sum(
+                not self._ok(client.call_operation('getContractInformation', use_cache=False, contractInfoRequest={
+                    **credentials, 'contractNumber': number, 'contractSerialNumber': serial,
+                }))
+                for number, serial in contracts
+            )
+            self._report('contracts', len(contracts), failed)
+
+    @staticmethod
+    def _ok(result):
+        # Successful replies are written to the read model by SoapClient itself
+        return not isinstance(result, dict) and result is not None and result.resultCode == '0000'
+
+    def _report(self, kind, total, failed):
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Refreshed {total - failed}/{total} {kind}" + (f", {failed} failed" if failed else "")))
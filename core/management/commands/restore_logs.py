@@ -0,0 +1,38 @@
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import log_archive
+
+
+class Command(BaseCommand):
+    help = 'Load archived SOAP request logs (see archive_logs) back into the table for an investigation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='Archive files to restore; default: select by --from/--to/--operation')
+        parser.add_argument('--from', dest='start', help='First day, YYYY-MM-DD')
+        parser.add_argument('--to', dest='end', help='Last day, YYYY-MM-DD')
+        parser.add_argument('--operation', help='Only this operation')
+        parser.add_argument('--directory', help='Archive directory (default LOG_ARCHIVE_DIR)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        if options['files']:
+            paths = [Path(f) for f in options['files']]
+            missing = [str(p) for p in paths if not p.is_file()]
+            if missing:
+                raise CommandError(f"No such archive file: {', '.join(missing)}")
+        else:
+            if not (start or end or options['operation']):
+                raise CommandError("Give archive files, or select them with --from, --to and/or --operation")
+            root = Path(options['directory']) if options['directory'] else log_archive.LOG_ARCHIVE_DIR
+            paths = list(log_archive.archive_files(root, start, end, options['operation']))
+
+        restored = log_archive.restore(paths)
+        self.stdout.write(self.style.SUCCESS(f"Restored {restored} log row(s) from {len(paths)} file(s)"))
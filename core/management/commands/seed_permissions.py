@@ -1,19 +1,13 @@
 from django.core.management.base import BaseCommand
 from core.models import Role, RoleOperation
+from services.registry import get_registry
 
 class Command(BaseCommand):
     help = 'Seeds permissions for all roles to access all operations'
 
     def handle(self, *args, **options):
         roles = Role.objects.all()
-        operations = [
-            'getTenderInformation',
-            'sendAdvancePaymentInformation',
-            'sendBidSecurityInformation',
-            'getContractInformation',
-            'sendCreditLineFacility',
-            'sendPerformSecurityInformation',
-        ]
+        operations = get_registry().operation_names
 
         count = 0
         for role in roles:
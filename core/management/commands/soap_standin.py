@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from services.standin import StandinServer
+
+
+class Command(BaseCommand):
+    help = 'Serve canned hub replies locally (set SOAP_SERVICE_ADDRESS to its URL) for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8084)
+        parser.add_argument('--latency', type=float, default=50, help='Mean reply delay in milliseconds')
+        parser.add_argument('--jitter', type=float, default=10, help='Standard deviation of the delay in milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a SOAP fault')
+        parser.add_argument('--contracts', type=int, default=1, help='Contracts in each getContractInformation reply')
+        parser.add_argument('--tenders', type=int, default=1, help='Tenders in each getTenderInformation reply')
+
+    def handle(self, *args, **options):
+        server = StandinServer(
+            (options['host'], options['port']), latency=options['latency'] / 1000, jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'], contracts=options['contracts'], tenders=options['tenders'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stand-in hub on http://{options['host']}:{options['port']}/ "
+            f"({options['latency']:.0f}±{options['jitter']:.0f} ms, {options['error_rate']:.0%} faults); Ctrl-C to stop"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {server.requests} requests, {server.faults} faults")
@@ -0,0 +1,204 @@
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.models import SlowCall
+from core.utils import user_has_role
+from services import profiling, slow_calls, tracing
+from services.jobs import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Per-request allowance; QUERY_BUDGETS overrides it per URL name
+QUERY_BUDGET_DEFAULT = getattr(settings, 'QUERY_BUDGET_DEFAULT', {'queries': 20, 'sql_ms': 250})
+QUERY_BUDGETS = getattr(settings, 'QUERY_BUDGETS', {})
+# Slow-call name for requests no URL pattern matched (404s, static files): one bucket,
+# so arbitrary paths cannot grow the per-name latency windows
+UNRESOLVED_REQUEST_NAME = 'unresolved'
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ms(self) -> float:
+        return round(self.seconds * 1000, 1)
+
+
+def query_budget(url_name):
+    """The budget of the view named url_name: the default with any per-view overrides applied."""
+    return {**QUERY_BUDGET_DEFAULT, **QUERY_BUDGETS.get(url_name, {})}
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the queries each request runs and the time spent in them, kept on
+    request.query_stats. A request over its budget (see query_budget) gets an
+    X-Query-Budget-Exceeded header and a warning in the log; X-Query-Count and
+    X-Query-Time-Ms are added to every response with QUERY_BUDGET_HEADERS or
+    LOAD_TEST_HEADERS, and to those over budget.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.always_report = (getattr(settings, 'QUERY_BUDGET_HEADERS', False)
+                              or getattr(settings, 'LOAD_TEST_HEADERS', False))
+
+    def __call__(self, request):
+        stats = request.query_stats = QueryStats()
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.count += 1
+                stats.seconds += time.perf_counter() - start
+
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        budget = query_budget(url_name)
+        exceeded = [name for name, used in (('queries', stats.count), ('sql_ms', stats.ms))
+                    if budget.get(name) is not None and used > budget[name]]
+
+        if exceeded or self.always_report:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time-Ms'] = str(stats.ms)
+        if exceeded:
+            response['X-Query-Budget-Exceeded'] = ','.join(exceeded)
+            logger.warning(
+                f"Query budget exceeded by {request.method} {request.path} ({url_name}): "
+                f"{stats.count} queries, {stats.ms} ms SQL; budget {budget.get('queries')} queries, {budget.get('sql_ms')} ms"
+            )
+        return response
+
+
+class TracingMiddleware:
+    """
+    Opens the request's trace (see services.tracing), continuing the caller's
+    when it sends a traceparent header, and returns its id in X-Trace-Id.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracing.trace(f"{request.method} {request.path}", request.headers.get('traceparent'),
+                           **{'http.request.method': request.method, 'url.path': request.path}) as root:
+            response = self.get_response(request)
+            if root.sampled:
+                match = request.resolver_match
+                if match:
+                    # Name by route so that spans of one view group together
+                    root.name = f"{request.method} {match.route}"
+                    root.set(**{'http.route': match.route})
+                root.set(**{'http.response.status_code': response.status_code,
+                            'enduser.id': request.user.pk if getattr(request, 'user', None) else None})
+                if response.status_code >= 500:
+                    root.status = tracing.STATUS_ERROR
+        response['X-Trace-Id'] = root.trace_id
+        return response
+
+
+class SlowRequestMiddleware:
+    """Stores web requests over their latency threshold in the slow-call store (services.slow_calls)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        match = request.resolver_match
+        stats = getattr(request, 'query_stats', None)
+        timings = {'total': round(seconds * 1000, 3)}
+        if stats:
+            timings.update(sql=stats.ms, queries=stats.count)
+        name = (match.url_name or match.route) if match else UNRESOLVED_REQUEST_NAME
+        slow_calls.record(SlowCall.KIND_WEB, name, seconds,
+                          status=str(response.status_code), user=getattr(request, 'user', None),
+                          request_payload=f"{request.method} {request.get_full_path()}", timings=timings)
+        return response
+
+
+class LoadTestHeadersMiddleware:
+    """
+    Reports this process's job pool load on each response for the load_test
+    command as X-Soap-Workers ("busy/workers/queued"); the request's query count
+    comes from QueryBudgetMiddleware. Off unless LOAD_TEST_HEADERS.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LOAD_TEST_HEADERS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        pool = pool_stats()
+        response['X-Soap-Workers'] = f"{pool['busy']}/{pool['workers']}/{pool['queued']}"
+        return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a single request for an administrator who asks for it with
+    ?_profile=1 (cProfile) or ?_profile=sample, or the X-Profile header with the
+    same values. The profile is stored as a RequestProfile (see the admin) and
+    its id returned in X-Profile-Id. Other requests only pay for the flag lookup.
+    Turned off entirely with PROFILING_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = request.headers.get('X-Profile')
+        if flag is None and '_profile=' in request.META.get('QUERY_STRING', ''):
+            flag = request.GET.get('_profile')
+        if not flag:
+            return self.get_response(request)
+
+        mode = profiling.MODES.get(flag)
+        user = self._user(request)
+        if mode is None or not user_has_role(user, ['Admin']):
+            return self.get_response(request)
+
+        response, summary, data, seconds = profiling.profile(mode, lambda: self.get_response(request))
+        stats = getattr(request, 'query_stats', None)
+        record = profiling.save(
+            user=user, mode=mode, method=request.method, path=request.get_full_path()[:2000],
+            view_name=request.resolver_match.view_name if request.resolver_match else '',
+            status_code=response.status_code, duration=seconds, query_count=stats.count if stats else None,
+            summary=summary, data=data,
+        )
+        response['X-Profile-Id'] = str(record.pk)
+        return response
+
+    @staticmethod
+    def _user(request):
+        """The session user, or for API calls the owner of the request's token."""
+        if request.user.is_authenticated:
+            return request.user
+        header = request.headers.get('Authorization', '').split()
+        if len(header) == 2 and header[0] == 'Token':
+            try:
+                return TokenAuthentication().authenticate_credentials(header[1])[0]
+            except AuthenticationFailed:
+                pass
+        return request.user
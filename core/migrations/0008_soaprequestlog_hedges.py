@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_soapjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='hedges',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Duplicate requests fired for slow reads'),
+        ),
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='hedge_wins',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Hedges that answered before the original'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_soaprequestlog_hedges'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soapjob',
+            name='stale_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='soapjob',
+            name='stale_reason',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_bulksubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tender',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ref_number', models.CharField(max_length=255, unique=True)),
+                ('ref_name', models.CharField(max_length=500)),
+                ('pe_code', models.CharField(blank=True, max_length=50)),
+                ('pe_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('tender_type', models.CharField(blank=True, max_length=100)),
+                ('tender_method', models.CharField(blank=True, max_length=100)),
+                ('public_date', models.DateField(blank=True, null=True)),
+                ('open_date', models.DateField(blank=True, null=True)),
+                ('deadline_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('data', models.JSONField(help_text='Full TenderNotificationInfo as returned by the hub')),
+                ('synced_at', models.DateTimeField(db_index=True, help_text='When the hub last returned this record')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TenderLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(max_length=50)),
+                ('lot_name', models.CharField(blank=True, max_length=500)),
+                ('description', models.TextField(blank=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('unit', models.CharField(blank=True, max_length=20)),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='core.tender')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Contract',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract_number', models.CharField(max_length=255)),
+                ('serial_number', models.CharField(max_length=255)),
+                ('contract_name', models.CharField(blank=True, max_length=500)),
+                ('contract_date', models.DateField(blank=True, null=True)),
+                ('contract_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('currency', models.CharField(blank=True, max_length=20)),
+                ('pe_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('pe_tin_number', models.CharField(blank=True, db_index=True, max_length=50)),
+                ('supplier_name', models.CharField(blank=True, max_length=255)),
+                ('supplier_tin_number', models.CharField(blank=True, db_index=True, max_length=50)),
+                ('tender_ref_number', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('data', models.JSONField(help_text='Full ContractInfo as returned by the hub')),
+                ('synced_at', models.DateTimeField(db_index=True, help_text='When the hub last returned this record')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('contract_number', 'serial_number'), name='unique_contract_serial')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(max_length=50)),
+                ('lot_name', models.CharField(blank=True, max_length=500)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='core.contract')),
+            ],
+        ),
+    ]
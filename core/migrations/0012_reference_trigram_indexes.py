@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Trigram indexes on UPPER(reference) serve both the case-insensitive prefix
+# lookups and the similarity matches of services.autocomplete. pg_trgm is
+# PostgreSQL only; other databases fall back to plain scans.
+INDEXES = (
+    ('core_tender_ref_number_trgm', 'core_tender', 'ref_number'),
+    ('core_contract_number_trgm', 'core_contract', 'contract_number'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_read_model'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_reference_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='timings',
+            field=models.JSONField(blank=True, help_text='Milliseconds spent per phase (validate, serialize, http, parse, ...)', null=True),
+        ),
+    ]
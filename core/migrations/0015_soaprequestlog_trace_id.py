@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='trace_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Trace of the request that made the call', max_length=32),
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_soaprequestlog_trace_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('soap', 'SOAP call'), ('web', 'Web request')], max_length=10)),
+                ('name', models.CharField(help_text='Operation, or the route of a web request', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField(help_text='Duration in seconds')),
+                ('threshold', models.FloatField(help_text='Seconds the call was allowed')),
+                ('reason', models.CharField(choices=[('threshold', 'Over the configured threshold'), ('p99', 'Over the recent p99')], max_length=20)),
+                ('severity', models.FloatField(db_index=True)),
+                ('status', models.CharField(max_length=50)),
+                ('trace_id', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('request_payload', models.TextField(blank=True, help_text='Envelope sent, or the request line')),
+                ('response_payload', models.TextField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('timings', models.JSONField(blank=True, help_text='Milliseconds spent per phase', null=True)),
+                ('pool_state', models.JSONField(blank=True, help_text='HTTP connection pools and job pool load at the end of the call', null=True)),
+                ('log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.soaprequestlog')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+# Converts core_soaprequestlog into a table range-partitioned by month on
+# "timestamp" (PostgreSQL only; partitions are then kept up by
+# services/log_partitions.py). The existing table becomes the first partition,
+# holding every row up to the end of the current month, so no rows are copied:
+#
+#   1. Indexes the partitioned table needs (a unique one on (id, "timestamp")
+#      for its primary key, one on "timestamp" for the date-bounded views) are
+#      built CONCURRENTLY, and a CHECK constraint bounding "timestamp" is added
+#      NOT VALID and then validated; none of this blocks reads or writes.
+#   2. In one short transaction the table is renamed, the partitioned table is
+#      created under the old name with the old table attached, and the next
+#      months' partitions and a default one are added. The validated
+#      constraint spares ATTACH a scan, so the lock is held only for catalog
+#      changes.
+#
+# Foreign keys cannot point at a partitioned table by "id" alone, so
+# SlowCall.log keeps its column but loses the database constraint first.
+
+TABLE = 'core_soaprequestlog'
+LEGACY = 'core_soaprequestlog_p_legacy'
+SEQUENCE = 'core_soaprequestlog_id_seq'
+MONTHS_AHEAD = 3
+
+
+def _month(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def index_timestamp(apps, schema_editor):
+    model = apps.get_model('core', 'SoapRequestLog')
+    field = model._meta.get_field('timestamp')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(schema_editor._create_index_sql(model, fields=[field]))
+        return
+    name = schema_editor._create_index_name(model._meta.db_table, [field.column])
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE} ("timestamp")')
+
+
+def drop_timestamp_index(apps, schema_editor):
+    model = apps.get_model('core', 'SoapRequestLog')
+    name = schema_editor._create_index_name(model._meta.db_table, ['timestamp'])
+    schema_editor.execute(schema_editor._delete_index_sql(model, name))
+
+
+def partition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    now = datetime.now(timezone.utc)
+    boundary = _month(now.year, now.month + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] == 'p':
+            return
+        cursor.execute("SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = %s::regclass", [TABLE])
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise RuntimeError(f"Foreign keys from {', '.join(referencing)} must be dropped before partitioning {TABLE}")
+
+        # 1. Without blocking writers
+        cursor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {TABLE}_id_timestamp ON {TABLE} (id, "timestamp")')
+        cursor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {LEGACY}_bound')
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {LEGACY}_bound '
+                       f'CHECK ("timestamp" IS NOT NULL AND "timestamp" < %s) NOT VALID', [boundary])
+        cursor.execute(f'ALTER TABLE {TABLE} VALIDATE CONSTRAINT {LEGACY}_bound')
+
+        # 2. The swap
+        with transaction.atomic(using=connection.alias):
+            cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+            old_sequence = cursor.fetchone()[0]
+            cursor.execute(f'SELECT GREATEST((SELECT COALESCE(MAX(id), 0) FROM {TABLE}), (SELECT last_value FROM {old_sequence}))')
+            next_id = cursor.fetchone()[0] + 1
+            cursor.execute("SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [TABLE])
+            if cursor.fetchone()[0]:
+                cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id DROP IDENTITY')
+            else:
+                cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT')
+                cursor.execute(f'DROP SEQUENCE IF EXISTS {old_sequence}')
+
+            # Indexes and foreign keys to recreate on the partitioned table, under their current names
+            cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s", [TABLE])
+            indexes = [(name, definition) for name, definition in cursor.fetchall()
+                       if name not in (f'{TABLE}_pkey', f'{TABLE}_id_timestamp')]
+            cursor.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+            foreign_keys = cursor.fetchall()
+
+            # The prebuilt (id, "timestamp") index becomes the old table's share of the new primary key
+            cursor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT {TABLE}_pkey')
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {LEGACY}_pkey PRIMARY KEY USING INDEX {TABLE}_id_timestamp')
+            cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {LEGACY}')
+            for number, (name, _definition) in enumerate(indexes):
+                cursor.execute(f'ALTER INDEX {name} RENAME TO {LEGACY}_idx{number}')
+
+            cursor.execute(f'CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+                           f'PARTITION BY RANGE ("timestamp")')
+            cursor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT {LEGACY}_bound')
+            cursor.execute(f'CREATE SEQUENCE {SEQUENCE} AS bigint START WITH {next_id} OWNED BY {TABLE}.id')
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, "timestamp")')
+            for name, definition in indexes:
+                columns = definition[definition.index(' USING '):]
+                unique = 'UNIQUE ' if definition.startswith('CREATE UNIQUE') else ''
+                cursor.execute(f'CREATE {unique}INDEX {name} ON {TABLE}{columns}')
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+
+            # Matching indexes and foreign keys of the old table are attached rather than rebuilt
+            cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary])
+            cursor.execute(f'ALTER TABLE {LEGACY} DROP CONSTRAINT {LEGACY}_bound')
+            for offset in range(MONTHS_AHEAD):
+                start, end = _month(boundary.year, boundary.month + offset), _month(boundary.year, boundary.month + offset + 1)
+                cursor.execute(f'CREATE TABLE {TABLE}_p{start:%Y_%m} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                               [start, end])
+            # Catches rows beyond the last month created, should its upkeep lapse
+            cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0016_slowcall'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='soaprequestlog',
+                    name='timestamp',
+                    field=models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(index_timestamp, drop_timestamp_index),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='slowcall',
+            name='log',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.soaprequestlog'),
+        ),
+        # The partitioned table serves the earlier schema as well, so going back leaves it in place
+        migrations.RunPython(partition_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_partition_soaprequestlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayloadBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('content', models.TextField()),
+                ('size', models.PositiveIntegerField(help_text='Bytes of UTF-8 content')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(default=django.utils.timezone.now, help_text='Roughly when a log row last referenced it; kept from garbage collection for a grace period')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='soaprequestlog',
+            name='request_payload',
+            field=models.TextField(blank=True, help_text='Raw XML or JSON request, when not in request_blob'),
+        ),
+        migrations.AlterField(
+            model_name='soaprequestlog',
+            name='response_payload',
+            field=models.TextField(blank=True, help_text='Raw XML or JSON response, when not in response_blob', null=True),
+        ),
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='request_blob',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.payloadblob'),
+        ),
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='response_blob',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.payloadblob'),
+        ),
+    ]
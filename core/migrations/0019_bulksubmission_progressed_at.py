@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_payloadblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulksubmission',
+            name='progressed_at',
+            field=models.DateTimeField(blank=True, help_text='When the run last recorded progress', null=True),
+        ),
+    ]
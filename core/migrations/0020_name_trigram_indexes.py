@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Trigram indexes for the substring filters of /api/tenders/ and /api/contracts/
+# (?q= on the reference name, ?pe_name=). Django compiles icontains to
+# UPPER(column) LIKE UPPER('%...%'), which these serve, as 0012's do for the
+# reference numbers. PostgreSQL only; other databases fall back to plain scans.
+INDEXES = (
+    ('core_tender_ref_name_trgm', 'core_tender', 'ref_name'),
+    ('core_tender_pe_name_trgm', 'core_tender', 'pe_name'),
+    ('core_contract_pe_name_trgm', 'core_contract', 'pe_name'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_bulksubmission_progressed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
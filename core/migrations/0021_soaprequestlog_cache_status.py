@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soaprequestlog',
+            name='cache_status',
+            field=models.CharField(blank=True, choices=[('fresh', 'Fresh from cache'), ('stale', 'Stale from cache')], default='', max_length=10),
+        ),
+    ]
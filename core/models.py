@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Role(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -29,15 +30,294 @@ class UserRole(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.role.name}"
 
+class PayloadBlob(models.Model):
+    """
+    A SOAP envelope stored once however many log rows carry it, keyed by the
+    SHA-256 of its content (services/payload_store.py).
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    content = models.TextField()
+    size = models.PositiveIntegerField(help_text="Bytes of UTF-8 content")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(default=timezone.now, help_text="Roughly when a log row last referenced it; kept from garbage collection for a grace period")
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
 class SoapRequestLog(models.Model):
+    CACHE_FRESH = 'fresh'
+    CACHE_STALE = 'stale'
+    CACHE_CHOICES = [
+        (CACHE_FRESH, 'Fresh from cache'),
+        (CACHE_STALE, 'Stale from cache'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     operation = models.CharField(max_length=255)
-    request_payload = models.TextField(help_text="Raw XML or JSON request")
-    response_payload = models.TextField(help_text="Raw XML or JSON response", null=True, blank=True)
+    # Rows written before payloads were deduplicated (or restored from archives) keep them inline
+    request_payload = models.TextField(blank=True, help_text="Raw XML or JSON request, when not in request_blob")
+    response_payload = models.TextField(help_text="Raw XML or JSON response, when not in response_blob", null=True, blank=True)
+    # Neither a constraint nor an index: adding them would lock the (partitioned) log table while they are built,
+    # and only garbage collection, a batch job, looks blobs up from this side
+    request_blob = models.ForeignKey(PayloadBlob, on_delete=models.DO_NOTHING, null=True, blank=True, related_name='+',
+                                     db_constraint=False, db_index=False)
+    response_blob = models.ForeignKey(PayloadBlob, on_delete=models.DO_NOTHING, null=True, blank=True, related_name='+',
+                                      db_constraint=False, db_index=False)
     status = models.CharField(max_length=50) # e.g., 'SUCCESS', 'FAILED'
     duration = models.FloatField(help_text="Duration in seconds")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     error_message = models.TextField(null=True, blank=True)
+    hedges = models.PositiveSmallIntegerField(default=0, help_text="Duplicate requests fired for slow reads")
+    hedge_wins = models.PositiveSmallIntegerField(default=0, help_text="Hedges that answered before the original")
+    timings = models.JSONField(null=True, blank=True, help_text="Milliseconds spent per phase (validate, serialize, http, parse, ...)")
+    trace_id = models.CharField(max_length=32, blank=True, db_index=True, help_text="Trace of the request that made the call")
+    # Set when the lookup was answered from the last-known-good cache (services/stale_cache.py) without calling the hub
+    cache_status = models.CharField(max_length=10, choices=CACHE_CHOICES, blank=True, default='')
+
+    @property
+    def request_content(self):
+        return self.request_blob.content if self.request_blob_id else self.request_payload
+
+    @property
+    def response_content(self):
+        return self.response_blob.content if self.response_blob_id else self.response_payload
 
     def __str__(self):
         return f"{self.operation} - {self.status} at {self.timestamp}"
+
+class ResourceVersion(models.Model):
+    """
+    Change counter for an API collection (e.g. 'users', 'roles').
+    Bumped by signals on write so conditional GETs can be answered
+    without re-serializing the collection.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def bump(cls, name):
+        updated = cls.objects.filter(name=name).update(version=models.F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+
+    @classmethod
+    def current(cls, name):
+        """Return (version, updated_at) for the collection, or (0, None) if it was never written."""
+        row = cls.objects.filter(name=name).values_list('version', 'updated_at').first()
+        return row or (0, None)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class SoapJob(models.Model):
+    """
+    A web-form SOAP operation handed off to the background worker pool.
+    The row is the durable job state polled by the operation form.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCESS = 'SUCCESS'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCESS, 'Success'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    operation = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result = models.TextField(null=True, blank=True, help_text="Serialized JSON result")
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set when the result was served from the last-known-good cache (services/stale_cache.py)
+    stale_fetched_at = models.DateTimeField(null=True, blank=True)
+    stale_reason = models.CharField(max_length=20, blank=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCESS, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"{self.operation} job #{self.pk} ({self.status})"
+
+
+class BulkSubmission(models.Model):
+    """
+    A spreadsheet of send* requests executed row by row in the background.
+    The uploaded file and the annotated result file are kept on the row.
+    """
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    operation = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255)
+    source = models.BinaryField(help_text="Uploaded workbook or CSV")
+    result = models.BinaryField(null=True, blank=True, help_text="Uploaded file with result columns added")
+    status = models.CharField(max_length=20, choices=SoapJob.STATUS_CHOICES, default=SoapJob.STATUS_PENDING)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    succeeded_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    progressed_at = models.DateTimeField(null=True, blank=True, help_text="When the run last recorded progress")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (SoapJob.STATUS_SUCCESS, SoapJob.STATUS_FAILED)
+
+    @property
+    def progress_percent(self):
+        if not self.total_rows:
+            return 100 if self.is_finished else 0
+        return int(self.processed_rows * 100 / self.total_rows)
+
+    def __str__(self):
+        return f"{self.operation} bulk #{self.pk} ({self.processed_rows}/{self.total_rows})"
+
+
+
+class RequestProfile(models.Model):
+    """
+    A profile of one request, captured on demand by an administrator
+    (core.middleware.RequestProfilingMiddleware). Only the newest
+    PROFILE_RETENTION rows are kept.
+    """
+    MODE_CPROFILE = 'cprofile'
+    MODE_SAMPLE = 'sample'
+    MODE_CHOICES = [
+        (MODE_CPROFILE, 'Deterministic (cProfile)'),
+        (MODE_SAMPLE, 'Sampling'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    view_name = models.CharField(max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration = models.FloatField(help_text="Duration in seconds, profiler overhead included")
+    query_count = models.PositiveIntegerField(null=True, blank=True)
+    summary = models.TextField(help_text="Hottest functions, as text")
+    data = models.BinaryField(help_text="pstats dump (cprofile) or folded stacks for flame graphs (sample)")
+
+    @property
+    def file_name(self):
+        return f"profile-{self.pk}.{'prof' if self.mode == self.MODE_CPROFILE else 'folded'}"
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.mode}) at {self.created_at}"
+
+
+class SlowCall(models.Model):
+    """
+    A SOAP call or web request that took longer than its threshold, kept with
+    everything needed to explain it (services/slow_calls.py). Severity is the
+    duration over the threshold it broke, so 3.0 means three times too slow.
+    """
+    KIND_SOAP = 'soap'
+    KIND_WEB = 'web'
+    KIND_CHOICES = [
+        (KIND_SOAP, 'SOAP call'),
+        (KIND_WEB, 'Web request'),
+    ]
+    REASON_THRESHOLD = 'threshold'
+    REASON_P99 = 'p99'
+    REASON_CHOICES = [
+        (REASON_THRESHOLD, 'Over the configured threshold'),
+        (REASON_P99, 'Over the recent p99'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=255, help_text="Operation, or the route of a web request")
+    created_at = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField(help_text="Duration in seconds")
+    threshold = models.FloatField(help_text="Seconds the call was allowed")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    severity = models.FloatField(db_index=True)
+    status = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    trace_id = models.CharField(max_length=32, blank=True, db_index=True)
+    # No database constraint: the log table is partitioned on PostgreSQL, where rows are unique by (id, timestamp)
+    log = models.ForeignKey(SoapRequestLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                            db_constraint=False)
+    request_payload = models.TextField(blank=True, help_text="Envelope sent, or the request line")
+    response_payload = models.TextField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    timings = models.JSONField(null=True, blank=True, help_text="Milliseconds spent per phase")
+    pool_state = models.JSONField(null=True, blank=True, help_text="HTTP connection pools and job pool load at the end of the call")
+
+    def __str__(self):
+        return f"{self.name} took {self.duration:.2f}s ({self.severity:.1f}x {self.reason})"
+
+# --- Local read model of hub data (services/read_model.py) ---
+
+class Tender(models.Model):
+    """A tender notification mirrored from getTenderInformation replies."""
+    ref_number = models.CharField(max_length=255, unique=True)
+    ref_name = models.CharField(max_length=500)
+    pe_code = models.CharField(max_length=50, blank=True)
+    pe_name = models.CharField(max_length=255, blank=True, db_index=True)
+    tender_type = models.CharField(max_length=100, blank=True)
+    tender_method = models.CharField(max_length=100, blank=True)
+    public_date = models.DateField(null=True, blank=True)
+    open_date = models.DateField(null=True, blank=True)
+    deadline_date = models.DateField(null=True, blank=True, db_index=True)
+    data = models.JSONField(help_text="Full TenderNotificationInfo as returned by the hub")
+    synced_at = models.DateTimeField(db_index=True, help_text="When the hub last returned this record")
+
+    def __str__(self):
+        return f"{self.ref_number} - {self.ref_name}"
+
+
+class TenderLot(models.Model):
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='lots')
+    lot_number = models.CharField(max_length=50)
+    lot_name = models.CharField(max_length=500, blank=True)
+    description = models.TextField(blank=True)
+    amount = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    unit = models.CharField(max_length=20, blank=True)
+
+    def __str__(self):
+        return f"{self.tender.ref_number} lot {self.lot_number}"
+
+
+class Contract(models.Model):
+    """A contract mirrored from getContractInformation replies."""
+    contract_number = models.CharField(max_length=255)
+    serial_number = models.CharField(max_length=255)
+    contract_name = models.CharField(max_length=500, blank=True)
+    contract_date = models.DateField(null=True, blank=True)
+    contract_amount = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=20, blank=True)
+    pe_name = models.CharField(max_length=255, blank=True, db_index=True)
+    pe_tin_number = models.CharField(max_length=50, blank=True, db_index=True)
+    supplier_name = models.CharField(max_length=255, blank=True)
+    supplier_tin_number = models.CharField(max_length=50, blank=True, db_index=True)
+    tender_ref_number = models.CharField(max_length=255, blank=True, db_index=True)
+    data = models.JSONField(help_text="Full ContractInfo as returned by the hub")
+    synced_at = models.DateTimeField(db_index=True, help_text="When the hub last returned this record")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_number', 'serial_number'], name='unique_contract_serial'),
+        ]
+
+    def __str__(self):
+        return f"{self.contract_number}/{self.serial_number} - {self.contract_name}"
+
+
+class ContractLot(models.Model):
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='lots')
+    lot_number = models.CharField(max_length=50)
+    lot_name = models.CharField(max_length=500, blank=True)
+    amount = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.contract.contract_number} lot {self.lot_number}"
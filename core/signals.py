@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from core.models import Role, UserRole, ResourceVersion
+from services import log_partitions
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_users_version(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the API does not expose.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    ResourceVersion.bump('users')
+
+
+@receiver([post_save, post_delete], sender=Role)
+def bump_roles_version(sender, **kwargs):
+    ResourceVersion.bump('roles')
+    # Role names are embedded in the users collection.
+    ResourceVersion.bump('users')
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def bump_user_roles_version(sender, **kwargs):
+    ResourceVersion.bump('users')
+
+
+@receiver(post_migrate)
+def create_log_partitions(sender, **kwargs):
+    if sender.label != 'core':
+        return
+    log_partitions.ensure_partitions()
@@ -0,0 +1,50 @@
+"""
+Test helpers for keeping views inside their query budgets.
+
+Mix QueryBudgetTestMixin into a TestCase and either check a response against
+the budget QueryBudgetMiddleware applies in production, cap a block at a fixed
+number of queries, or check that a view's query count does not grow with the
+number of rows it shows (the usual N+1 regression).
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from core.middleware import query_budget
+
+
+def _listing(queries) -> str:
+    return '\n'.join(f"{n}. {query['sql']}" for n, query in enumerate(queries, 1))
+
+
+class QueryBudgetTestMixin:
+    def assertWithinQueryBudget(self, response):
+        """The request behind a test client response stayed within its view's query count budget."""
+        request = response.wsgi_request
+        stats = request.query_stats
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        limit = query_budget(url_name)['queries']
+        self.assertLessEqual(stats.count, limit,
+                             f"{request.method} {request.path} ({url_name}) ran {stats.count} queries; its budget is {limit}")
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        """Fail if the block runs more than `limit` queries; the message lists them."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        if len(context) > limit:
+            self.fail(f"{len(context)} queries executed, {limit} allowed:\n{_listing(context.captured_queries)}")
+
+    def assertQueryCountStable(self, request, add_rows, using=DEFAULT_DB_ALIAS):
+        """
+        Call request(), add_rows(), then request() again and fail if the second
+        call ran more queries than the first.
+        """
+        with CaptureQueriesContext(connections[using]) as before:
+            request()
+        add_rows()
+        with CaptureQueriesContext(connections[using]) as after:
+            request()
+        if len(after) > len(before):
+            self.fail(f"Query count grew from {len(before)} to {len(after)} with more rows:\n{_listing(after.captured_queries)}")
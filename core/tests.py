@@ -1,7 +1,15 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from unittest.mock import patch
 from django.urls import reverse
 from django.contrib.auth.models import User
-from core.models import Role, UserRole
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.models import Role, UserRole, RequestProfile, SoapRequestLog
+from core.testing import QueryBudgetTestMixin
+import marshal
+import unittest
+from rest_framework.authtoken.models import Token
 
 class RoleTestCase(TestCase):
     def setUp(self):
@@ -73,3 +81,153 @@ class EndpointTestCase(TestCase):
         response = self.client.get(reverse('dashboard'))
         self.assertEqual(response.status_code, 200)
 
+
+class LoadTestHeadersTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('loadadmin', 'loadadmin@example.com', 'password')
+
+    @override_settings(LOAD_TEST_HEADERS=True)
+    def test_headers_report_server_load(self):
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('dashboard'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertRegex(response['X-Soap-Workers'], r'^\d+/\d+/\d+$')
+
+    def test_headers_are_off_by_default(self):
+        self.client.force_login(self.user)
+        self.assertNotIn('X-Query-Count', self.client.get(reverse('dashboard')))
+
+
+
+class QueryBudgetMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('budgetadmin', 'budgetadmin@example.com', 'password')
+        self.client.force_login(self.user)
+
+    def test_request_within_budget_is_quiet(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertNotIn('X-Query-Budget-Exceeded', response)
+        self.assertGreater(response.wsgi_request.query_stats.count, 0)
+
+    def test_request_over_budget_is_flagged_and_logged(self):
+        with patch.dict('core.middleware.QUERY_BUDGETS', {'dashboard': {'queries': 1}}), \
+                self.assertLogs('core.middleware', 'WARNING') as logs:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response['X-Query-Budget-Exceeded'], 'queries')
+        self.assertGreater(int(response['X-Query-Count']), 1)
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertIn('(dashboard)', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_headers_on_every_response_when_enabled(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(int(response['X-Query-Count']), response.wsgi_request.query_stats.count)
+
+class MetricsEndpointTestCase(TestCase):
+    @override_settings(DEBUG=True)
+    def test_scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertContains(response, '# TYPE soap_phase_seconds histogram')
+
+    def test_token_is_required_when_set(self):
+        with patch('core.views.METRICS_TOKEN', 'secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_closed_without_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+
+class RequestProfilingTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('profadmin', 'profadmin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def test_admin_can_profile_a_request(self):
+        response = self.client.get(reverse('dashboard'), {'_profile': '1'})
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.mode, profile.view_name, profile.status_code), ('cprofile', 'dashboard', 200))
+        self.assertIn('cumulative', profile.summary)
+        self.assertGreater(profile.query_count, 0)
+
+        download = self.client.get(reverse('admin:core_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(download['Content-Disposition'], f'attachment; filename="profile-{profile.pk}.prof"')
+        self.assertIn('get_context_data', {func for _, _, func in marshal.loads(download.content)})
+        self.assertContains(self.client.get(reverse('admin:core_requestprofile_change', args=[profile.pk])), 'cumulative')
+
+    @patch('services.profiling.PROFILE_SAMPLE_INTERVAL_MS', 0.5)
+    def test_sampling_writes_folded_stacks(self):
+        response = self.client.get(reverse('dashboard'), HTTP_X_PROFILE='sample')
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.file_name, f'profile-{profile.pk}.folded')
+        for line in bytes(profile.data).decode().splitlines():
+            self.assertRegex(line, r'^\S.* \d+$')
+
+    def test_api_token_holders_can_profile(self):
+        token = Token.objects.create(user=self.admin)
+        response = Client().get('/api/logs/', {'_profile': '1'}, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(RequestProfile.objects.get(pk=response['X-Profile-Id']).user, self.admin)
+
+    def test_only_admins_can_profile(self):
+        user = User.objects.create_user('profuser', password='password')
+        UserRole.objects.create(user=user, role=Role.objects.get(name='Manager'))
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @patch('services.profiling.PROFILE_RETENTION', 2)
+    def test_only_newest_profiles_are_kept(self):
+        ids = [int(self.client.get(reverse('dashboard'), {'_profile': '1'})['X-Profile-Id']) for _ in range(3)]
+        self.assertEqual(sorted(RequestProfile.objects.values_list('id', flat=True)), ids[1:])
+
+
+class SoapRequestLogAdminTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('logadmin', 'logadmin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.add_logs(3)
+        self.log = SoapRequestLog.objects.first()
+
+    def add_logs(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'logauthor{SoapRequestLog.objects.count()}', password='password')
+            SoapRequestLog.objects.create(user=author, operation='getTenderInformation', request_payload='<secret-envelope/>',
+                                          response_payload='<reply/>', status='SUCCESS', duration=0.1)
+
+    def test_changelist_reads_no_payloads_and_caches_filter_choices(self):
+        url = reverse('admin:core_soaprequestlog_changelist')
+        self.assertQueryCountStable(lambda: self.client.get(url), lambda: self.add_logs(10))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'getTenderInformation')
+        sql = ' '.join(q['sql'] for q in queries.captured_queries)
+        self.assertNotIn('request_payload', sql)
+        self.assertNotIn('DISTINCT', sql.upper())
+
+        response = self.client.get(url, {'status__exact': 'FAILED'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_payloads_load_only_when_opened(self):
+        response = self.client.get(reverse('admin:core_soaprequestlog_change', args=[self.log.pk]))
+        self.assertNotContains(response, 'secret-envelope')
+        payload_url = reverse('admin:core_soaprequestlog_payload', args=[self.log.pk, 'request'])
+        self.assertContains(response, payload_url)
+
+        response = self.client.get(payload_url)
+        self.assertEqual(response.content, b'<secret-envelope/>')
+        self.assertEqual(response['X-Frame-Options'], 'SAMEORIGIN')
+        self.assertEqual(self.client.get(reverse('admin:core_soaprequestlog_payload', args=[self.log.pk, 'other'])).status_code, 404)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Planner estimates are PostgreSQL only')
+    @patch('core.admin.ADMIN_EXACT_COUNT_LIMIT', -1)
+    def test_large_changelists_show_estimated_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_soaprequestlog_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper() and 'soaprequestlog' in q['sql']])
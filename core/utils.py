@@ -1,4 +1,16 @@
 from core.models import UserRole
+from services import tracing
+
+
+def user_role_names(user):
+    """
+    Names of the user's roles, cached on the user object so that every role
+    check in one request (views, templates, menus) shares a single query.
+    """
+    if not hasattr(user, '_role_names'):
+        user._role_names = frozenset(UserRole.objects.filter(user=user).values_list('role__name', flat=True))
+    return user._role_names
+
 
 def user_has_role(user, role_names):
     """
@@ -14,4 +26,5 @@ def user_has_role(user, role_names):
     if isinstance(role_names, str):
         role_names = [role_names]
     
-    return UserRole.objects.filter(user=user, role__name__in=role_names).exists()
+    with tracing.span('rbac.user_has_role', **{'rbac.roles': ','.join(role_names)}):
+        return not user_role_names(user).isdisjoint(role_names)
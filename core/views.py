@@ -1,3 +1,17 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 
-# Create your views here.
+from services import metrics
+
+# Scrapers must send "Authorization: Bearer <token>"; without one the endpoint only answers under DEBUG
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's SOAP gateway metrics."""
+    if not METRICS_TOKEN and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if METRICS_TOKEN and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,127 @@
+"""
+Reference suggestions for operation forms, served from the local read model.
+
+Tender and contract references typed into a form are matched first by prefix,
+then by trigram similarity on PostgreSQL (pg_trgm, see migration 0012) or by
+substring elsewhere, so common typos still find the record. Choosing a
+suggestion prefills the related form fields from the same local record; none
+of this calls the hub.
+"""
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.functions import Upper
+
+from core.models import Contract, Tender
+
+AUTOCOMPLETE_LIMIT = getattr(settings, 'AUTOCOMPLETE_LIMIT', 8)
+AUTOCOMPLETE_MIN_CHARS = getattr(settings, 'AUTOCOMPLETE_MIN_CHARS', 2)
+
+TENDER = 'tender'
+CONTRACT = 'contract'
+
+# Form elements (the last part of a registry field name) that take a reference
+REFERENCE_ELEMENTS = {
+    'tenderRefNumber': TENDER,
+    'contractNumber': CONTRACT,
+}
+
+
+def reference_kind(field_name: str) -> Optional[str]:
+    """TENDER or CONTRACT for reference fields such as contractInfo__tenderRefNumber, else None."""
+    return REFERENCE_ELEMENTS.get(field_name.rsplit('__', 1)[-1])
+
+
+_SUGGESTION_FIELDS = {
+    Tender: ('ref_number', 'ref_name', 'pe_name'),
+    Contract: ('contract_number', 'serial_number', 'contract_name', 'supplier_name'),
+}
+
+
+def _use_trigram() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def _match(queryset, column: str, query: str, limit: int) -> List[Dict]:
+    """Prefix matches first, then near matches, as a list of value dicts."""
+    fields = _SUGGESTION_FIELDS[queryset.model]
+    rows = list(queryset.filter(**{f'{column}__istartswith': query}).order_by(column).values(*fields)[:limit])
+    if len(rows) < limit and len(query) >= 3:
+        seen = [row[column] for row in rows]
+        near = queryset.exclude(**{f'{column}__in': seen})
+        if _use_trigram():
+            # UPPER(column) is what the gin_trgm_ops index covers
+            near = near.annotate(reference=Upper(column)).filter(reference__trigram_similar=query.upper())
+        else:
+            near = near.filter(**{f'{column}__icontains': query})
+        rows += list(near.order_by(column).values(*fields)[:limit - len(rows)])
+    return rows
+
+
+def suggest(kind: str, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[Dict]:
+    """[{'value': ..., 'label': ...}] for a partly typed reference."""
+    query = (query or '').strip()
+    if len(query) < AUTOCOMPLETE_MIN_CHARS:
+        return []
+
+    if kind == TENDER:
+        return [
+            {'value': row['ref_number'], 'label': ' - '.join(filter(None, [row['ref_name'], row['pe_name']]))}
+            for row in _match(Tender.objects.all(), 'ref_number', query, limit)
+        ]
+    if kind == CONTRACT:
+        return [
+            {'value': row['contract_number'],
+             'label': ' - '.join(filter(None, [f"serial {row['serial_number']}", row['contract_name'], row['supplier_name']]))}
+            for row in _match(Contract.objects.all(), 'contract_number', query, limit)
+        ]
+    return []
+
+
+def _single_lot(lots, number_element: str, name_element: str) -> Dict:
+    # A tender or contract with several lots leaves the choice to the user
+    if len(lots) != 1:
+        return {}
+    return {number_element: lots[0].lot_number, name_element: lots[0].lot_name}
+
+
+def prefill(kind: str, reference: str) -> Dict[str, str]:
+    """
+    {form element: value} for the record with this reference, or {} if it is not known locally.
+    Elements are matched against the last part of the form's field names.
+    """
+    reference = (reference or '').strip()
+    if not reference:
+        return {}
+
+    if kind == TENDER:
+        tender = Tender.objects.prefetch_related('lots').filter(ref_number=reference).first()
+        if tender is None:
+            return {}
+        values = {
+            'tenderRefNumber': tender.ref_number,
+            'tenderRefName': tender.ref_name,
+            'pEName': tender.pe_name,
+            **_single_lot(list(tender.lots.all()), 'tenderLotNumber', 'tenderLotName'),
+        }
+    elif kind == CONTRACT:
+        # One contract number may have several serials; the most recently seen one wins
+        contract = Contract.objects.prefetch_related('lots').filter(contract_number=reference).order_by('-synced_at').first()
+        if contract is None:
+            return {}
+        values = {
+            'contractNumber': contract.contract_number,
+            'contractSerialNumber': contract.serial_number,
+            'contractName': contract.contract_name,
+            'contractDate': contract.contract_date.isoformat() if contract.contract_date else '',
+            'pEName': contract.pe_name,
+            'pETINNumber': contract.pe_tin_number,
+            'supplierName': contract.supplier_name,
+            'supplierTINNumber': contract.supplier_tin_number,
+            'tenderRefNumber': contract.tender_ref_number,
+            **_single_lot(list(contract.lots.all()), 'lotNumber', 'lotName'),
+        }
+    else:
+        return {}
+    return {element: value for element, value in values.items() if value}
@@ -0,0 +1,223 @@
+"""
+Micro-benchmarks of the SOAP gateway hot path.
+
+Every case runs offline: replies come from services.samples through an
+in-process transport and database writes are rolled back. Results are plain
+JSON (per-call times in microseconds) so runs can be stored as baselines and
+compared; see the bench_gateway command. The decode and render groups put
+each current path next to the zeep-object path it replaced.
+"""
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import django
+import zeep
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from lxml import etree
+from rest_framework.renderers import JSONRenderer
+from zeep.helpers import serialize_object
+
+from api.renderers import FastJSONRenderer
+from services import fastjson, samples
+from services.registry import get_registry
+from services.results import parse_response
+from services.soap_client import SOAP_CREDENTIALS, SoapClient
+
+# Each timed sample repeats a case for at least this long
+BENCHMARK_MIN_SAMPLE_SECONDS = getattr(settings, 'BENCHMARK_MIN_SAMPLE_SECONDS', 0.02)
+# Relative slowdown of a case's best time that counts as a regression
+BENCHMARK_REGRESSION_THRESHOLD = getattr(settings, 'BENCHMARK_REGRESSION_THRESHOLD', 0.2)
+RESULT_FORMAT = 1
+
+# Sizes of the "large" contract reply used by the serialization and logging cases
+LARGE_CONTRACTS = 200
+LOG_CONTRACTS = 20
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[], object]
+    group: str
+    # Also report the memory still held by what func returns (decoded replies)
+    retained: bool = False
+
+
+class _Reply:
+    """What Transport.post_xml returns, for the in-process transport."""
+    status_code = 200
+    encoding = 'utf-8'
+    headers = {'Content-Type': 'text/xml; charset=utf-8'}
+
+    def __init__(self, content):
+        self.content = content
+
+
+def request_kwargs(spec) -> Dict:
+    """call_operation keyword arguments for a fully filled-in form of `spec`."""
+    payload = spec.build_payload(samples.form_data(spec))
+    return {spec.request_element: {'id': SOAP_CREDENTIALS['id_val'], 'password': SOAP_CREDENTIALS['password'], **payload}}
+
+
+def build_cases(only: Optional[List[str]] = None) -> List[Case]:
+    client = SoapClient()
+    registry = get_registry()
+    replies = {name: _Reply(samples.sample_response(name)) for name in registry.operation_names}
+    # Every request "reaches" the hub and gets the canned reply for its operation
+    client.client.transport.post_xml = lambda address, envelope, headers: replies[
+        etree.QName(envelope.find('{*}Body')[0]).localname]
+
+    large = samples.contract_response(LARGE_CONTRACTS)
+    # The same reply decoded into zeep objects, to compare serializing them with the slotted models
+    binding = client.client.service._binding
+    zeep_large = binding.process_reply(client.client, binding.get('getContractInformation'), _Reply(large))
+    typed_large = parse_response('getContractInformation', large)
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    log_reply = samples.contract_response(LOG_CONTRACTS)
+    log_result = parse_response('getContractInformation', log_reply)
+    log_kwargs = request_kwargs(registry.get('sendPerformSecurityInformation'))
+
+    cases = [
+        Case('client_construct', SoapClient, 'client'),
+        Case('log_request', lambda: client._log_request('getContractInformation', log_kwargs, time.time(),
+                                                        result=log_result, raw_reply=log_reply), 'logging'),
+        Case('serialize_object_json', lambda: json.dumps(serialize_object(zeep_large), cls=DjangoJSONEncoder), 'serialization'),
+        Case('fastjson_typed', lambda: fastjson.dumps(parse_response('getContractInformation', large)), 'serialization'),
+        # Reply to objects, and objects to the dicts callers serialize
+        Case('decode_zeep', lambda: binding.process_reply(client.client, binding.get('getContractInformation'), _Reply(large)),
+             'decode', retained=True),
+        Case('decode_typed', lambda: parse_response('getContractInformation', large), 'decode', retained=True),
+        Case('to_dict_zeep', lambda: serialize_object(zeep_large), 'decode'),
+        Case('to_dict_typed', typed_large.to_dict, 'decode'),
+        # Result rendering in the web job (indented) and API paths, before and after the fast encoder
+        Case('render_web_stdlib', lambda: json.dumps(serialize_object(zeep_large), indent=2, default=str), 'render'),
+        Case('render_web_fast', lambda: fastjson.dumps(typed_large, indent=True), 'render'),
+        Case('render_api_drf', lambda: drf.render(serialize_object(zeep_large)), 'render'),
+        Case('render_api_fast', lambda: fast.render(typed_large), 'render'),
+    ]
+    for spec in registry:
+        kwargs = request_kwargs(spec)
+        form = samples.form_data(spec)
+        cases += [
+            Case(f'envelope[{spec.name}]', lambda spec=spec, kwargs=kwargs: etree.tostring(
+                client.client.create_message(client.client.service, spec.name, **kwargs)), 'envelope'),
+            Case(f'call_operation[{spec.name}]', lambda spec=spec, kwargs=kwargs: client.call_operation(
+                spec.name, use_cache=False, **kwargs), 'call'),
+            # Flat form data to request dict; replaced reconstruct_complex_objects
+            Case(f'payload_builder[{spec.name}]', lambda spec=spec, form=form: spec.client_kwargs(form), 'payload'),
+        ]
+    if only:
+        cases = [case for case in cases if any(case.name.startswith(prefix) or case.group == prefix for prefix in only)]
+    return cases
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    """
+    Time `func` as timeit does: calibrate a loop count so one sample takes at
+    least BENCHMARK_MIN_SAMPLE_SECONDS, then take `repeat` samples with the
+    garbage collector off. The best sample is the figure to compare.
+    """
+    func()  # warm caches (WSDL validators, lazy imports) outside the timing
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= BENCHMARK_MIN_SAMPLE_SECONDS:
+            break
+        loops *= 2
+
+    samples_us = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples_us.append((time.perf_counter() - start) / loops * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'best_us': round(min(samples_us), 3),
+        'median_us': round(statistics.median(samples_us), 3),
+        'stdev_us': round(statistics.stdev(samples_us), 3) if len(samples_us) > 1 else 0.0,
+        'loops': loops,
+        'repeat': repeat,
+    }
+
+
+def retained_bytes(func: Callable) -> int:
+    """Memory allocated by `func` and still held by its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': sys.implementation.name,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'django': django.get_version(),
+        'zeep': zeep.__version__,
+        'json_backend': 'orjson' if fastjson.orjson is not None else 'stdlib',
+    }
+
+
+def run(only: Optional[List[str]] = None, repeat: int = 7, progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """Run the suite; nothing it writes to the database is kept."""
+    results = {}
+    with transaction.atomic():
+        for case in build_cases(only):
+            if progress:
+                progress(case.name)
+            results[case.name] = {'group': case.group, **measure(case.func, repeat)}
+            if case.retained:
+                results[case.name]['retained_bytes'] = retained_bytes(case.func)
+        transaction.set_rollback(True)
+    return {'format': RESULT_FORMAT, 'environment': environment(), 'cases': dict(sorted(results.items()))}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = BENCHMARK_REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    One row per case present in both runs, with the ratio of best times.
+    Rows whose ratio exceeds 1 + threshold are marked as regressions.
+    """
+    rows = []
+    for name, case in current['cases'].items():
+        before = baseline['cases'].get(name)
+        if not before:
+            continue
+        ratio = case['best_us'] / before['best_us'] if before['best_us'] else 1.0
+        rows.append({
+            'case': name,
+            'baseline_us': before['best_us'],
+            'current_us': case['best_us'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold,
+        })
+    return rows
+
+
+def dump(results: Dict) -> str:
+    return json.dumps(results, indent=2, sort_keys=True)
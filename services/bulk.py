@@ -0,0 +1,291 @@
+"""
+Bulk execution of send* operations from an uploaded workbook or CSV.
+
+The header row names registry fields (e.g. bidSecurityInfo__amount, as shown
+on the operation form); a column may also be titled with a field's label when
+that label is unique. Rows are read in openpyxl's streaming read-only mode and
+run concurrently, one SoapClient per worker thread. Bulk work has pools of
+its own, separate from the interactive job pool: SOAP_BULK_SUBMISSIONS uploads
+run at a time and their rows share SOAP_BULK_WORKERS threads, so a large
+upload neither holds the workers form jobs need nor multiplies the load on
+the hub. The result is the uploaded sheet with result code, message and
+duration columns appended, in the same format as the upload.
+"""
+import csv
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import openpyxl
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models import BulkSubmission, SoapJob
+from services.registry import get_registry
+from services import tracing
+from services.soap_client import SoapClient
+
+# Concurrent SOAP calls for all bulk submissions together; the hub sees at most this many from uploads
+SOAP_BULK_WORKERS = getattr(settings, 'SOAP_BULK_WORKERS', 16)
+# Submissions run at the same time; later uploads wait their turn
+SOAP_BULK_SUBMISSIONS = getattr(settings, 'SOAP_BULK_SUBMISSIONS', 2)
+# Submissions that recorded no progress (or, queued, did not start) for this many seconds were lost (e.g. worker restart)
+SOAP_BULK_TIMEOUT = getattr(settings, 'SOAP_BULK_TIMEOUT', 1800)
+SOAP_BULK_MAX_ROWS = getattr(settings, 'SOAP_BULK_MAX_ROWS', 10000)
+# Progress is written to the database every this many rows
+PROGRESS_EVERY = 25
+RESULT_COLUMNS = ('Result Code', 'Result Message', 'Duration (s)')
+# Separator for repeated fields (e.g. several lot numbers in one cell)
+MULTI_VALUE_SEPARATOR = ';'
+
+logger = logging.getLogger(__name__)
+
+_submission_executor = None
+_row_executor = None
+_executor_lock = threading.Lock()
+
+
+class BulkFileError(ValueError):
+    """The uploaded file cannot be used for the selected operation."""
+
+
+def is_csv(file_name: str) -> bool:
+    return file_name.lower().endswith('.csv')
+
+
+def read_table(content: bytes, file_name: str) -> Tuple[List, List[tuple]]:
+    """
+    Header and data rows of the first sheet (or the CSV). Blank rows are dropped.
+    Reading stops as soon as the file has more than SOAP_BULK_MAX_ROWS rows.
+    """
+    workbook = None
+    if is_csv(file_name):
+        rows = csv.reader(io.StringIO(content.decode('utf-8-sig')))
+    else:
+        try:
+            workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        except Exception as e:
+            raise BulkFileError(f"Could not read the workbook: {e}")
+        rows = workbook.active.iter_rows(values_only=True)
+
+    try:
+        header = next(rows, None)
+        if not header:
+            raise BulkFileError("The file is empty.")
+        data = []
+        for row in rows:
+            if any(cell not in (None, '') for cell in row):
+                if len(data) == SOAP_BULK_MAX_ROWS:
+                    raise BulkFileError(f"The file has more than {SOAP_BULK_MAX_ROWS} rows, the limit.")
+                data.append(tuple(row))
+        return list(header), data
+    finally:
+        # Read-only workbooks keep the file open until closed
+        if workbook is not None:
+            workbook.close()
+
+
+def map_columns(header: List, spec) -> Dict[int, str]:
+    """{column index: field name}; unknown columns are ignored."""
+    by_name = {f['name'].lower(): f['name'] for f in spec.fields}
+    labels: Dict[str, Optional[str]] = {}
+    for f in spec.fields:
+        label = f['label'].lower()
+        labels[label] = None if label in labels else f['name']  # None marks an ambiguous label
+
+    columns = {}
+    for index, title in enumerate(header):
+        title = str(title or '').strip().lower()
+        name = by_name.get(title) or labels.get(title)
+        if name:
+            columns[index] = name
+    if not columns:
+        raise BulkFileError(f"No column matches a {spec.name} field. Download the template for the expected headers.")
+    return columns
+
+
+def cell_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def row_data(row: tuple, columns: Dict[int, str], many: set) -> Dict:
+    data = {}
+    for index, name in columns.items():
+        text = cell_text(row[index]) if index < len(row) else None
+        if text is None:
+            continue
+        data[name] = [part.strip() for part in text.split(MULTI_VALUE_SEPARATOR)] if name in many else text
+    return data
+
+
+def template_workbook(spec) -> bytes:
+    """An empty workbook whose header row lists the operation's fields."""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(spec.name[:31])
+    sheet.append(spec.field_names)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def write_result(file_name: str, header: List, rows: List[tuple], outcomes: List[tuple]) -> bytes:
+    if is_csv(file_name):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(list(header) + list(RESULT_COLUMNS))
+        for row, outcome in zip(rows, outcomes):
+            writer.writerow(list(row) + list(outcome))
+        return buffer.getvalue().encode('utf-8')
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append(list(header) + list(RESULT_COLUMNS))
+    for row, outcome in zip(rows, outcomes):
+        sheet.append(list(row) + list(outcome))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def describe(result) -> Tuple[str, str, bool]:
+    """(result code, message, succeeded) for a call_operation result."""
+    if isinstance(result, dict):
+        message = result.get('user_message') or result.get('error') or ''
+        field_errors = result.get('field_errors')
+        if field_errors:
+            message += ' ' + '; '.join(f"{name}: {error}" for name, error in field_errors.items())
+        return 'ERROR', message.strip(), False
+    code = getattr(result, 'resultCode', None) or ''
+    return code, getattr(result, 'resultMessage', None) or '', code == '0000'
+
+
+def get_executors() -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    """(submission pool, row pool). Submissions wait on their rows, so the two must not be the same pool."""
+    global _submission_executor, _row_executor
+    if _submission_executor is None:
+        with _executor_lock:
+            if _submission_executor is None:
+                _row_executor = ThreadPoolExecutor(max_workers=SOAP_BULK_WORKERS, thread_name_prefix='soap-bulk-row')
+                _submission_executor = ThreadPoolExecutor(max_workers=SOAP_BULK_SUBMISSIONS, thread_name_prefix='soap-bulk')
+    return _submission_executor, _row_executor
+
+
+def submit_bulk_submission(submission: BulkSubmission, credentials: Dict) -> BulkSubmission:
+    """Queue the submission on the bulk pool (inline with SOAP_JOBS_EAGER)."""
+    if getattr(settings, 'SOAP_JOBS_EAGER', False):
+        run_bulk_submission(submission.pk, credentials)
+        submission.refresh_from_db()
+    else:
+        get_executors()[0].submit(tracing.propagate(_run_in_worker), submission.pk, credentials)
+    return submission
+
+
+def expire_stale_submission(submission: BulkSubmission) -> BulkSubmission:
+    """Fail a submission that has shown no progress for longer than SOAP_BULK_TIMEOUT."""
+    last_seen = submission.progressed_at or submission.created_at
+    if submission.is_finished or last_seen > timezone.now() - timedelta(seconds=SOAP_BULK_TIMEOUT):
+        return submission
+    BulkSubmission.objects.filter(pk=submission.pk, status__in=[SoapJob.STATUS_PENDING, SoapJob.STATUS_RUNNING]).update(
+        status=SoapJob.STATUS_FAILED,
+        error_message="The submission was interrupted before it finished. Rows already sent are in the SOAP logs.",
+        finished_at=timezone.now(),
+    )
+    submission.refresh_from_db()
+    return submission
+
+
+def _run_in_worker(submission_id, credentials):
+    close_old_connections()
+    try:
+        run_bulk_submission(submission_id, credentials)
+    finally:
+        close_old_connections()
+
+
+def _run_rows(execute, rows):
+    """Yield (row number, outcome) as rows finish: on the bulk row pool, or inline with SOAP_JOBS_EAGER."""
+    if getattr(settings, 'SOAP_JOBS_EAGER', False):
+        for number, row in enumerate(rows):
+            yield number, execute(number, row)
+        return
+
+    def in_thread(number, row):
+        try:
+            return execute(number, row)
+        finally:
+            # Pool threads log to the database; release their connections as the jobs pool does
+            close_old_connections()
+
+    pool = get_executors()[1]
+    futures = {pool.submit(tracing.propagate(in_thread), number, row): number for number, row in enumerate(rows)}
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # Rows not yet started are dropped if the submission ends early
+        for future in futures:
+            future.cancel()
+
+
+def run_bulk_submission(submission_id, credentials: Dict):
+    submission = BulkSubmission.objects.select_related('user').get(pk=submission_id)
+    now = timezone.now()
+    # A submission that waited so long in the queue that it was expired is not run after all
+    if not BulkSubmission.objects.filter(pk=submission_id, status=SoapJob.STATUS_PENDING).update(
+            status=SoapJob.STATUS_RUNNING, started_at=now, progressed_at=now):
+        return
+    try:
+        spec = get_registry().get(submission.operation)
+        header, rows = read_table(bytes(submission.source), submission.file_name)
+        columns = map_columns(header, spec)
+        many = {f['name'] for f in spec.fields if f['many']}
+        BulkSubmission.objects.filter(pk=submission_id).update(total_rows=len(rows))
+
+        local = threading.local()
+
+        def execute(number, row):
+            start = time.monotonic()
+            try:
+                if not hasattr(local, 'client'):
+                    # Building a client parses the WSDL, so each worker thread keeps its own
+                    local.client = SoapClient()
+                method = getattr(local.client, spec.method_name)
+                data = row_data(row, columns, many)
+                result = method(user=submission.user, **credentials, **spec.client_kwargs(data))
+                code, message, ok = describe(result)
+            except Exception as e:
+                logger.error(f"Bulk submission {submission_id} row {number} failed: {e}")
+                code, message, ok = 'ERROR', str(e), False
+            return code, message, round(time.monotonic() - start, 3), ok
+
+        outcomes = [None] * len(rows)
+        succeeded = failed = 0
+        for done, (number, (code, message, duration, ok)) in enumerate(_run_rows(execute, rows), start=1):
+            outcomes[number] = (code, message, duration)
+            succeeded, failed = succeeded + ok, failed + (not ok)
+            if done % PROGRESS_EVERY == 0 or done == len(rows):
+                BulkSubmission.objects.filter(pk=submission_id).update(
+                    processed_rows=done, succeeded_rows=succeeded, failed_rows=failed, progressed_at=timezone.now())
+
+        result = write_result(submission.file_name, header, rows, outcomes)
+        outcome = {'status': SoapJob.STATUS_SUCCESS, 'result': result}
+    except BulkFileError as e:
+        outcome = {'status': SoapJob.STATUS_FAILED, 'error_message': str(e)}
+    except Exception as e:
+        logger.error(f"Bulk submission {submission_id} failed: {e}", exc_info=True)
+        outcome = {'status': SoapJob.STATUS_FAILED, 'error_message': str(e)}
+    BulkSubmission.objects.filter(pk=submission_id).update(finished_at=timezone.now(), **outcome)
@@ -1,11 +1,11 @@
 from functools import wraps
 from django.core.exceptions import PermissionDenied
 from core.models import RoleOperation
+from services import metrics, tracing
 
 def require_soap_permission(operation_name):
     def decorator(func):
-        @wraps(func)
-        def wrapper(self, *args, **kwargs):
+        def checked(self, *args, **kwargs):
             user = kwargs.get('user')
             if not user or (not user.is_authenticated and not user.is_superuser):
                  # Guardrail: Return error dict for auth failure
@@ -20,11 +20,12 @@ def require_soap_permission(operation_name):
                 return func(self, *args, **kwargs)
 
             # Check if user has a role with this operation
-            has_permission = RoleOperation.objects.filter(
-                role__users__user=user,
-                operation_name=operation_name,
-                is_active=True
-            ).exists()
+            with metrics.timed(operation_name, 'permission'):
+                has_permission = RoleOperation.objects.filter(
+                    role__users__user=user,
+                    operation_name=operation_name,
+                    is_active=True
+                ).exists()
 
             if not has_permission:
                 return {
@@ -34,5 +35,11 @@ def require_soap_permission(operation_name):
                 }
 
             return func(self, *args, **kwargs)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            # One span per operation call; permission check, validation and the upstream call nest under it
+            with tracing.span('soap.call', **{'soap.operation': operation_name}):
+                return checked(self, *args, **kwargs)
         return wrapper
     return decorator
@@ -0,0 +1,44 @@
+"""
+JSON encoding for SOAP results and API responses.
+
+Uses orjson when it is installed and falls back to the standard library encoder
+otherwise. Both paths handle what the SOAP layer produces: typed result models,
+zeep CompoundValues, Decimals, dates and datetimes.
+"""
+import datetime
+import json
+from decimal import Decimal
+
+from zeep.helpers import serialize_object
+from zeep.xsd.valueobjects import CompoundValue
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only where orjson is missing
+    orjson = None
+
+
+def default(obj):
+    """Encode types neither encoder handles natively."""
+    if isinstance(obj, Decimal):
+        # As a string so amounts never lose precision
+        return str(obj)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, CompoundValue):
+        return serialize_object(obj, target_cls=dict)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent=False) -> bytes:
+    """Serialize to UTF-8 JSON bytes; `indent` gives 2-space pretty printing."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, default=default, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
@@ -0,0 +1,168 @@
+"""
+Hedged requests for read operations.
+
+A read that has not answered by a high percentile of its recent latency is
+usually stuck behind an upstream stall. A second, identical request is fired
+then, and whichever response arrives first is used. A process-wide token
+bucket keeps hedges to SOAP_HEDGE_BUDGET_PERCENT of read traffic so that a
+slow hub is not made slower by our own duplicates.
+
+The losing request cannot be cancelled mid-flight (requests blocks), so it
+finishes in the background and its response is discarded. The hedge gets only
+what is left of the call's deadline, and the caller stops waiting for either
+request when that runs out.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+
+from services import metrics, tracing
+from services.retry import Deadline, DeadlineExceeded
+
+SOAP_HEDGING = getattr(settings, 'SOAP_HEDGING', False)
+# Hedge once a read has been outstanding longer than this percentile of recent latency
+SOAP_HEDGE_PERCENTILE = getattr(settings, 'SOAP_HEDGE_PERCENTILE', 95)
+# No hedging until an operation has this many latency samples
+SOAP_HEDGE_MIN_SAMPLES = getattr(settings, 'SOAP_HEDGE_MIN_SAMPLES', 20)
+# Upper bound on hedges as a percentage of read requests
+SOAP_HEDGE_BUDGET_PERCENT = getattr(settings, 'SOAP_HEDGE_BUDGET_PERCENT', 10)
+# Threads for hedges; primaries get a thread of their own so they never queue behind them
+SOAP_HEDGE_WORKERS = getattr(settings, 'SOAP_HEDGE_WORKERS', 16)
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Sliding window of recent successful-call latencies per operation."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, operation: str, pct: float, min_samples: int = SOAP_HEDGE_MIN_SAMPLES) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgeBudget:
+    """
+    Token bucket shared by all operations: every read adds `percent`/100 of a token
+    and every hedge spends one, so hedges stay under that share of traffic.
+    """
+
+    def __init__(self, percent: float = SOAP_HEDGE_BUDGET_PERCENT, burst: float = 10):
+        self.ratio = percent / 100
+        self.max_tokens = burst
+        self.tokens = burst
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+@dataclass
+class HedgeStats:
+    """What hedging did during one call_operation; written to SoapRequestLog."""
+    hedges: int = 0
+    hedge_wins: int = 0
+
+
+latency = LatencyTracker()
+budget = HedgeBudget()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SOAP_HEDGE_WORKERS, thread_name_prefix='soap-hedge')
+    return _executor
+
+
+def start_thread(fn: Callable, *args) -> Future:
+    """Run fn(*args) on a thread of its own, started now, and return its Future."""
+    future = Future()
+
+    def target():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name='soap-primary', daemon=True).start()
+    return future
+
+
+def hedged(attempt: Callable, operation: str, stats: HedgeStats, deadline: Deadline) -> Callable:
+    """
+    Wrap a retry attempt (timeout -> response) so it hedges once the operation's
+    latency percentile has passed without a response. Falls back to a plain call
+    until there are enough latency samples. `deadline` is the call's time budget.
+    """
+
+    def timed(timeout):
+        start = time.monotonic()
+        response = attempt(timeout)
+        latency.record(operation, time.monotonic() - start)
+        return response
+
+    def run(timeout):
+        budget.on_request()
+        delay = latency.percentile(operation, SOAP_HEDGE_PERCENTILE)
+        if delay is None or delay >= deadline.remaining():
+            return timed(timeout)
+
+        # Started at once rather than queued in the hedge pool, so `delay` measures the request itself
+        primary = start_thread(tracing.propagate(timed), timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done or deadline.expired or not budget.try_spend():
+            return primary.result()
+
+        stats.hedges += 1
+        metrics.increment('soap_hedges_total', operation=operation)
+        logger.info(f"Hedging {operation} after {delay:.3f}s without a response")
+        hedge = get_executor().submit(tracing.propagate(timed), deadline.timeout())
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                metrics.increment('soap_deadline_exceeded_total', operation=operation)
+                raise DeadlineExceeded(f"{operation} and its hedge ran past the {deadline.seconds}s budget")
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        stats.hedge_wins += 1
+                        metrics.increment('soap_hedge_wins_total', operation=operation)
+                    return future.result()
+        # Both failed: surface the original request's error
+        return primary.result()
+
+    return run
@@ -0,0 +1,107 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models import SoapJob
+from services import fastjson, metrics, tracing
+from services.retry import Deadline, SOAP_DEADLINE
+from services.soap_client import SoapClient
+
+# Threads spend almost all their time waiting on the upstream, so the pool can be
+# larger than the number of gunicorn workers without adding CPU pressure.
+SOAP_JOB_WORKERS = getattr(settings, 'SOAP_JOB_WORKERS', 8)
+# Jobs still unfinished after this many seconds were lost (e.g. worker restart)
+SOAP_JOB_TIMEOUT = getattr(settings, 'SOAP_JOB_TIMEOUT', 300)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_busy = 0
+_busy_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SOAP_JOB_WORKERS, thread_name_prefix='soap-job')
+    return _executor
+
+
+def pool_stats() -> dict:
+    """Busy and queued jobs of this process's worker pool."""
+    # ThreadPoolExecutor does not expose its queue; the size is only an estimate
+    queued = _executor._work_queue.qsize() if _executor is not None else 0
+    return {'workers': SOAP_JOB_WORKERS, 'busy': _busy, 'queued': queued}
+
+
+def submit_operation_job(user, operation: str, method_name: str, kwargs: dict) -> SoapJob:
+    """
+    Record a job and hand the SOAP call to the worker pool.
+    With SOAP_JOBS_EAGER the call runs inline, which is what tests use.
+    The call's deadline starts now, so time spent queued counts against it.
+    """
+    job = SoapJob.objects.create(user=user, operation=operation)
+    deadline = Deadline(min(SOAP_DEADLINE, SOAP_JOB_TIMEOUT))
+    if getattr(settings, 'SOAP_JOBS_EAGER', False):
+        run_operation_job(job.pk, method_name, kwargs, user, deadline, operation)
+        job.refresh_from_db()
+    else:
+        get_executor().submit(tracing.propagate(_run_in_worker), job.pk, method_name, kwargs, user, deadline, operation)
+    return job
+
+
+def _run_in_worker(*args):
+    global _busy
+    with _busy_lock:
+        _busy += 1
+    # Pool threads outlive requests, so they manage their own DB connections.
+    close_old_connections()
+    try:
+        run_operation_job(*args)
+    finally:
+        close_old_connections()
+        with _busy_lock:
+            _busy -= 1
+
+
+def run_operation_job(job_id, method_name, kwargs, user, deadline=None, operation=None):
+    SoapJob.objects.filter(pk=job_id).update(status=SoapJob.STATUS_RUNNING, started_at=timezone.now())
+    try:
+        client = SoapClient(deadline=deadline)
+        method = getattr(client, method_name)
+        result_obj = method(user=user, **kwargs)
+        with metrics.timed(operation or method_name, 'result_serialize'):
+            result_json = fastjson.dumps(result_obj, indent=True).decode('utf-8')
+        if isinstance(result_obj, dict) and result_obj.get('success') is False:
+            # Guardrail dict (permission, validation or upstream failure)
+            outcome = {'status': SoapJob.STATUS_FAILED, 'result': result_json,
+                       'error_message': result_obj.get('user_message') or result_obj.get('error')}
+        else:
+            outcome = {'status': SoapJob.STATUS_SUCCESS, 'result': result_json}
+        if client.staleness:
+            outcome.update(stale_fetched_at=client.staleness.fetched_at_datetime, stale_reason=client.staleness.reason)
+    except Exception as e:
+        logger.error(f"SOAP job {job_id} ({method_name}) failed: {e}", exc_info=True)
+        outcome = {'status': SoapJob.STATUS_FAILED, 'error_message': str(e)}
+    SoapJob.objects.filter(pk=job_id).update(finished_at=timezone.now(), **outcome)
+
+
+def expire_stale_job(job: SoapJob) -> SoapJob:
+    """Fail a job that has been unfinished for longer than SOAP_JOB_TIMEOUT."""
+    if job.is_finished or job.created_at > timezone.now() - timedelta(seconds=SOAP_JOB_TIMEOUT):
+        return job
+    SoapJob.objects.filter(pk=job.pk, status__in=[SoapJob.STATUS_PENDING, SoapJob.STATUS_RUNNING]).update(
+        status=SoapJob.STATUS_FAILED,
+        error_message="The job was interrupted before it finished. Please try again.",
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,282 @@
+"""
+HTTP load generator for a running deployment (see the load_test command).
+
+A mix of targets is sent either closed-loop (N workers back to back) or
+open-loop at a fixed rate. With a rate, latency is measured from the time each
+request was due, so a saturated server cannot hide queueing from the figures.
+Web form submissions are followed until their job finishes. When the server
+runs with LOAD_TEST_HEADERS, each sample also records the request's database
+query count and the job pool's load.
+"""
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from services import samples
+from services.registry import get_registry
+from services.soap_client import SOAP_CREDENTIALS
+
+RESULT_FORMAT = 1
+TARGET_KINDS = ('api', 'web', 'dashboard', 'export')
+# Seconds between polls of a web job's status while it is pending
+WEB_POLL_INTERVAL = 0.25
+
+_PENDING_JOB = re.compile(r'hx-get="([^"]+)"\s+hx-trigger="every')
+
+
+class LoadTestError(Exception):
+    """The load test could not be set up (bad mix, login failed)."""
+
+
+@dataclass(frozen=True)
+class Target:
+    kind: str
+    operation: str = ''
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}:{self.operation}" if self.operation else self.kind
+
+
+@dataclass
+class Sample:
+    target: str
+    latency: float
+    ok: bool
+    status: int = 0
+    error: str = ''
+    queries: Optional[int] = None
+    workers: Optional[Tuple[int, int, int]] = None
+    lag: float = 0.0
+
+
+def default_mix() -> Dict[Target, int]:
+    """Every operation through the API and the web form, reads weighted up, plus the dashboard and export."""
+    mix = {}
+    for name in get_registry().operation_names:
+        weight = 3 if name.startswith('get') else 1
+        mix[Target('api', name)] = weight
+        mix[Target('web', name)] = weight
+    mix[Target('dashboard')] = 4
+    mix[Target('export')] = 1
+    return mix
+
+
+def parse_mix(text: str) -> Dict[Target, int]:
+    """'api:getTenderInformation=3,web:sendBidSecurityInformation=1,dashboard=1' -> {Target: weight}."""
+    operations = set(get_registry().operation_names)
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        kind, _, operation = name.strip().partition(':')
+        if kind not in TARGET_KINDS:
+            raise LoadTestError(f"Unknown target '{name}'; expected one of {', '.join(TARGET_KINDS)}")
+        if (kind in ('api', 'web')) != bool(operation) or (operation and operation not in operations):
+            raise LoadTestError(f"'{name}' needs a known operation for api/web targets and none otherwise")
+        try:
+            mix[Target(kind, operation)] = int(weight or 1)
+        except ValueError:
+            raise LoadTestError(f"Weight of '{name}' must be a whole number")
+    if not mix or not any(mix.values()):
+        raise LoadTestError("The mix is empty")
+    return mix
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+class LoadClient:
+    """One logged-in browser session plus an API token, used by a single worker thread."""
+
+    def __init__(self, base_url: str, username: str, password: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.http = requests.Session()
+
+        login_url = f"{self.base_url}/web/login/"
+        self.http.get(login_url, timeout=timeout)
+        self.http.post(login_url, timeout=timeout, headers={'Referer': login_url}, data={
+            'username': username, 'password': password, 'csrfmiddlewaretoken': self.http.cookies.get('csrftoken', ''),
+        })
+        if 'sessionid' not in self.http.cookies:
+            raise LoadTestError(f"Web login as '{username}' failed")
+
+        response = requests.post(f"{self.base_url}/api/auth/login/", timeout=timeout,
+                                 data={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise LoadTestError(f"API login as '{username}' failed with HTTP {response.status_code}")
+        self.api_headers = {'Authorization': f"Token {response.json()['token']}"}
+
+        self.api_bodies, self.web_forms = {}, {}
+        for spec in get_registry():
+            form = samples.form_data(spec)
+            self.web_forms[spec.name] = form
+            self.api_bodies[spec.name] = {'id': SOAP_CREDENTIALS['id_val'], 'password': SOAP_CREDENTIALS['password'],
+                                          **spec.client_kwargs(form)}
+
+    def send(self, target: Target) -> Sample:
+        start = time.monotonic()
+        try:
+            response, ok = getattr(self, f"_{target.kind}")(target.operation)
+            return Sample(target.name, time.monotonic() - start, ok, response.status_code,
+                          '' if ok else f"HTTP {response.status_code}" if response.status_code >= 400 else 'failed result',
+                          *self._server_load(response))
+        except requests.RequestException as e:
+            return Sample(target.name, time.monotonic() - start, False, error=type(e).__name__)
+
+    @staticmethod
+    def _server_load(response):
+        queries = response.headers.get('X-Query-Count')
+        workers = response.headers.get('X-Soap-Workers')
+        return (int(queries) if queries else None,
+                tuple(int(n) for n in workers.split('/')) if workers else None)
+
+    def _api(self, operation):
+        response = self.http.post(f"{self.base_url}/api/soap/execute/{operation}/", json=self.api_bodies[operation],
+                                  headers=self.api_headers, timeout=self.timeout)
+        body = response.json() if response.headers.get('Content-Type', '').startswith('application/json') else {}
+        return response, response.status_code == 200 and not (isinstance(body, dict) and body.get('success') is False)
+
+    def _web(self, operation):
+        url = f"{self.base_url}/web/operations/{operation}/"
+        token = self.http.cookies.get('csrftoken', '')
+        response = self.http.post(url, timeout=self.timeout, headers={'HX-Request': 'true', 'X-CSRFToken': token, 'Referer': url},
+                                  data={**self.web_forms[operation], 'csrfmiddlewaretoken': token})
+        # The form answers with a pending fragment; the user waits until the job is done
+        deadline = time.monotonic() + self.timeout
+        while response.status_code == 200 and time.monotonic() < deadline:
+            pending = _PENDING_JOB.search(response.text)
+            if not pending:
+                break
+            time.sleep(WEB_POLL_INTERVAL)
+            response = self.http.get(f"{self.base_url}{pending.group(1)}", headers={'HX-Request': 'true'}, timeout=self.timeout)
+        return response, response.status_code == 200 and 'alert-danger' not in response.text and not _PENDING_JOB.search(response.text)
+
+    def _dashboard(self, operation):
+        response = self.http.get(f"{self.base_url}/web/dashboard/", timeout=self.timeout)
+        return response, response.status_code == 200
+
+    def _export(self, operation):
+        response = self.http.get(f"{self.base_url}/web/dashboard/export-excel/", timeout=self.timeout)
+        return response, response.status_code == 200
+
+
+def run(base_url: str, username: str, password: str, mix: Dict[Target, int], duration: float, concurrency: int,
+        rate: Optional[float] = None, timeout: float = 30, seed: Optional[int] = None,
+        client_factory: Callable = LoadClient) -> Dict:
+    """Drive the mix for `duration` seconds and return the summary (see summarize)."""
+    targets, weights = list(mix), list(mix.values())
+    chooser = random.Random(seed)
+    choose_lock = threading.Lock()
+    local = threading.local()
+    results: List[Sample] = []
+    results_lock = threading.Lock()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = client_factory(base_url, username, password, timeout)
+        return local.client
+
+    def pick():
+        with choose_lock:
+            return chooser.choices(targets, weights)[0]
+
+    def record(sample):
+        with results_lock:
+            results.append(sample)
+
+    # Log every worker in before the clock starts
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load') as pool:
+        list(pool.map(lambda _: client(), range(concurrency)))
+
+        started = time.monotonic()
+        end = started + duration
+        if rate:
+            def due(target, scheduled):
+                lag = time.monotonic() - scheduled
+                sample = client().send(target)
+                sample.latency += lag  # time spent waiting for a free worker counts
+                sample.lag = lag
+                record(sample)
+
+            for n in range(int(duration * rate)):
+                scheduled = started + n / rate
+                time.sleep(max(0.0, scheduled - time.monotonic()))
+                pool.submit(due, pick(), scheduled)
+        else:
+            def loop():
+                while time.monotonic() < end:
+                    record(client().send(pick()))
+
+            for future in [pool.submit(loop) for _ in range(concurrency)]:
+                future.result()
+    elapsed = time.monotonic() - started
+
+    summary = summarize(results, elapsed)
+    summary.update({
+        'format': RESULT_FORMAT,
+        'base_url': base_url,
+        'mode': {'rate': rate, 'concurrency': concurrency, 'duration': duration, 'seed': seed},
+        'mix': {target.name: weight for target, weight in mix.items()},
+    })
+    return summary
+
+
+def _stats(samples_: List[Sample], elapsed: float) -> Dict:
+    latencies = sorted(s.latency * 1000 for s in samples_)
+    errors = sum(not s.ok for s in samples_)
+    stats = {
+        'requests': len(samples_),
+        'errors': errors,
+        'error_rate': round(errors / len(samples_), 4) if samples_ else 0.0,
+        'throughput_rps': round(len(samples_) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            **{f'p{p}': round(percentile(latencies, p), 2) for p in (50, 90, 95, 99)},
+            'max': round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+    queries = [s.queries for s in samples_ if s.queries is not None]
+    if queries:
+        stats['db_queries'] = {'mean': round(sum(queries) / len(queries), 2), 'max': max(queries)}
+    return stats
+
+
+def summarize(samples_: List[Sample], elapsed: float) -> Dict:
+    by_target: Dict[str, List[Sample]] = {}
+    for sample in samples_:
+        by_target.setdefault(sample.target, []).append(sample)
+
+    summary = {
+        'elapsed_seconds': round(elapsed, 2),
+        'overall': _stats(samples_, elapsed),
+        'targets': {name: _stats(group, elapsed) for name, group in sorted(by_target.items())},
+        'error_kinds': dict(Counter(f"{s.target} {s.error}" for s in samples_ if not s.ok).most_common(10)),
+    }
+
+    loads = [s.workers for s in samples_ if s.workers]
+    if loads:
+        # Job pool of whichever server process answered; busy share near 1 or a growing queue means saturation
+        summary['worker_saturation'] = {
+            'busy_share_mean': round(sum(busy / workers for busy, workers, _ in loads) / len(loads), 3),
+            'busy_share_max': round(max(busy / workers for busy, workers, _ in loads), 3),
+            'queued_max': max(queued for _, _, queued in loads),
+        }
+    lags = sorted(s.lag * 1000 for s in samples_)
+    if any(lags):
+        # Open-loop only: how late requests started because every load worker was busy
+        summary['client_lag_ms'] = {'p95': round(percentile(lags, 95), 2), 'max': round(lags[-1], 2)}
+    return summary
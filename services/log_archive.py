@@ -0,0 +1,238 @@
+"""
+Retention for SoapRequestLog: archive old rows to disk, delete them, restore on demand.
+
+Rows older than LOG_RETENTION_DAYS (and, optionally, all but the newest N) are
+read in chunks of LOG_ARCHIVE_CHUNK in id order. Each chunk is written as gzip
+NDJSON, one file per day and operation:
+
+    LOG_ARCHIVE_DIR/2026/03/17/getTenderInformation/000001201-000002200.ndjson.gz
+
+Files are written to a temporary name, flushed and renamed before the chunk's
+rows are deleted in a short transaction of their own, so locks never outlive a
+chunk and an interrupted run simply resumes with the rows still in the table.
+A chunk that was written but not deleted is written again, under the same
+name, by the next run; restore() skips rows that already exist.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import SoapRequestLog
+from services import payload_store
+
+logger = logging.getLogger(__name__)
+
+LOG_ARCHIVE_DIR = Path(getattr(settings, 'LOG_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'log_archive'))
+LOG_RETENTION_DAYS = getattr(settings, 'LOG_RETENTION_DAYS', 90)
+LOG_ARCHIVE_CHUNK = getattr(settings, 'LOG_ARCHIVE_CHUNK', 1000)
+
+SUFFIX = '.ndjson.gz'
+
+
+class _ArchiveEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder drops, so restored rows sort exactly as before."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+@dataclass
+class ArchiveReport:
+    rows: int = 0
+    chunks: int = 0
+    files: int = 0
+
+
+# Archives carry the payloads themselves, whether a row keeps them inline or in a blob
+BLOB_FIELDS = {'request_blob': 'request_payload', 'response_blob': 'response_payload'}
+
+
+def _fields() -> List[str]:
+    return [field.attname for field in SoapRequestLog._meta.concrete_fields if field.name not in BLOB_FIELDS]
+
+
+def _safe(name: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name) or '_'
+
+
+def archive_path(root: Path, day: date, operation: str, first_id: int, last_id: int) -> Path:
+    return root / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}" / _safe(operation) / f"{first_id:09d}-{last_id:09d}{SUFFIX}"
+
+
+def _write(path: Path, rows: List[dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.partial')
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            for row in rows:
+                f.write(json.dumps(row, cls=_ArchiveEncoder, separators=(',', ':')).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def _chunks(condition: Q, chunk_size: int) -> Iterator[List[dict]]:
+    fields = _fields() + [f"{blob}__content" for blob in BLOB_FIELDS]
+    last_id = 0
+    while True:
+        # Keyset pagination: never rescans rows (or dead tuples) behind the previous chunk
+        rows = list(SoapRequestLog.objects.filter(condition, id__gt=last_id).order_by('id').values(*fields)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            for blob, field in BLOB_FIELDS.items():
+                content = row.pop(f"{blob}__content")
+                if content is not None:
+                    row[field] = content
+        last_id = rows[-1]['id']
+        yield rows
+
+
+def _export(rows: List[dict], root: Path) -> int:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(timezone.localtime(row['timestamp']).date(), row['operation'])].append(row)
+    for (day, operation), group in groups.items():
+        _write(archive_path(root, day, operation, rows[0]['id'], rows[-1]['id']), group)
+    return len(groups)
+
+
+def archive(older_than_days: float = LOG_RETENTION_DAYS, keep_rows: Optional[int] = None,
+            chunk_size: int = LOG_ARCHIVE_CHUNK, root: Path = LOG_ARCHIVE_DIR, write: bool = True,
+            pause: float = 0.0, max_chunks: Optional[int] = None) -> ArchiveReport:
+    """
+    Move rows older than `older_than_days`, and any beyond the newest `keep_rows`,
+    to archive files under `root` (or just delete them with write=False).
+    """
+    old = Q(timestamp__lt=timezone.now() - timedelta(days=older_than_days))
+    if keep_rows is not None:
+        boundary = SoapRequestLog.objects.order_by('-id').values_list('id', flat=True)[keep_rows:keep_rows + 1].first()
+        if boundary is not None:
+            old |= Q(id__lte=boundary)
+
+    report = ArchiveReport()
+    for rows in _chunks(old, chunk_size):
+        if max_chunks is not None and report.chunks >= max_chunks:
+            break
+        ids = [row['id'] for row in rows]
+        if write:
+            report.files += _export(rows, root)
+        with transaction.atomic():
+            SoapRequestLog.objects.filter(id__in=ids).delete()
+        report.rows += len(ids)
+        report.chunks += 1
+        logger.info(f"Archived SOAP log rows {ids[0]}-{ids[-1]} ({len(ids)} rows)")
+        if pause:
+            time.sleep(pause)
+    return report
+
+
+def export(start: Optional[datetime], end: datetime, chunk_size: int = LOG_ARCHIVE_CHUNK,
+           root: Path = LOG_ARCHIVE_DIR) -> ArchiveReport:
+    """Write rows timestamped start..end (end excluded; start None for all before) to archive files, deleting nothing."""
+    condition = Q(timestamp__lt=end) if start is None else Q(timestamp__gte=start, timestamp__lt=end)
+    report = ArchiveReport()
+    for rows in _chunks(condition, chunk_size):
+        report.files += _export(rows, root)
+        report.rows += len(rows)
+        report.chunks += 1
+    return report
+
+
+def archive_files(root: Path = LOG_ARCHIVE_DIR, start: Optional[date] = None, end: Optional[date] = None,
+                  operation: Optional[str] = None) -> Iterator[Path]:
+    """Archive files for days start..end (inclusive) and, if given, one operation, oldest first."""
+    for path in sorted(root.glob(f"*/*/*/*/*{SUFFIX}")):
+        year, month, day, op = path.relative_to(root).parts[:4]
+        try:
+            when = date(int(year), int(month), int(day))
+        except ValueError:
+            continue
+        if (start and when < start) or (end and when > end) or (operation and op != _safe(operation)):
+            continue
+        yield path
+
+
+def read(paths: Iterable[Path]) -> Iterator[dict]:
+    for path in paths:
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+@contextmanager
+def _archived_timestamps():
+    """
+    Insert SoapRequestLog rows with the timestamp they carry instead of now. Setting
+    it afterwards would put each row in this month's partition and then move it.
+    """
+    field = SoapRequestLog._meta.get_field('timestamp')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def restore(paths: Iterable[Path], chunk_size: int = LOG_ARCHIVE_CHUNK) -> int:
+    """Put archived rows back in the table, keeping their ids; rows already present are skipped."""
+    fields = set(_fields())
+    restored = 0
+    batch: List[dict] = []
+
+    def flush():
+        nonlocal restored
+        existing = set(SoapRequestLog.objects.filter(id__in=[row['id'] for row in batch]).values_list('id', flat=True))
+        users = set(User.objects.filter(id__in={row.get('user_id') for row in batch}).values_list('id', flat=True))
+        logs = [SoapRequestLog(**{k: v for k, v in row.items() if k in fields})
+                for row in batch if row['id'] not in existing]
+        if not logs:
+            return
+        for log in logs:
+            # Users deleted since the archive was written
+            if log.user_id not in users:
+                log.user_id = None
+            payload_store.attach(log)
+            log.timestamp = parse_datetime(log.timestamp)
+        with _archived_timestamps():
+            try:
+                with transaction.atomic():
+                    SoapRequestLog.objects.bulk_create(logs)
+                restored += len(logs)
+            except IntegrityError:
+                # Another restore put some of these back meanwhile; insert the rest one by one
+                for log in logs:
+                    try:
+                        with transaction.atomic():
+                            SoapRequestLog.objects.bulk_create([log])
+                        restored += 1
+                    except IntegrityError:
+                        pass
+
+    for row in read(paths):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return restored
@@ -0,0 +1,150 @@
+"""
+Monthly partitions of SoapRequestLog (PostgreSQL; see core migration 0017).
+
+core_soaprequestlog is range-partitioned on "timestamp": one table per month,
+core_soaprequestlog_pYYYY_MM, plus the table from before the conversion
+(core_soaprequestlog_p_legacy, holding everything up to the end of that month)
+and a default partition for rows no month covers. Queries bounded on the
+timestamp (the dashboard window, the log API's since/until, the export's
+from/to) read only the partitions in range.
+
+ensure_partitions() creates the coming LOG_PARTITION_MONTHS_AHEAD months; it
+runs after every migrate and from the partition_logs command (cron, daily).
+drop_expired() exports each partition whose rows are all older than
+LOG_RETENTION_DAYS to the log archive, then detaches and drops it: retention
+without row-by-row deletes or the vacuum work they leave behind.
+
+Elsewhere (SQLite in development and tests) the table is not partitioned and
+these functions do nothing.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import SoapRequestLog
+from services import log_archive
+
+logger = logging.getLogger(__name__)
+
+LOG_PARTITION_MONTHS_AHEAD = getattr(settings, 'LOG_PARTITION_MONTHS_AHEAD', 3)
+
+TABLE = SoapRequestLog._meta.db_table
+
+
+@dataclass
+class Partition:
+    name: str
+    start: Optional[datetime] = None  # None: no lower bound
+    end: Optional[datetime] = None
+    default: bool = False
+
+
+def month_start(when: datetime, months: int = 0) -> datetime:
+    """Midnight UTC on the first of when's month, `months` months later."""
+    when = when.astimezone(dt_timezone.utc)
+    index = when.year * 12 + when.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def day_range(first: Optional[date] = None, last: Optional[date] = None) -> Q:
+    """
+    Logs from the start of day `first` to the end of day `last` (local time).
+    Compares the timestamp column itself, not its date, so that PostgreSQL
+    reads only the partitions in range.
+    """
+    condition = Q()
+    if first is not None:
+        condition &= Q(timestamp__gte=timezone.make_aware(datetime.combine(first, time.min)))
+    if last is not None:
+        condition &= Q(timestamp__lt=timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min)))
+    return condition
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def _bound(value: str) -> Optional[datetime]:
+    return None if value == 'MINVALUE' else parse_datetime(value.strip("'"))
+
+
+def partitions() -> List[Partition]:
+    """The table's partitions, oldest first, the default one last."""
+    if not is_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass", [TABLE]
+        )
+        rows = cursor.fetchall()
+    found = []
+    for name, bound in rows:
+        if bound == 'DEFAULT':
+            found.append(Partition(name, default=True))
+            continue
+        # FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')
+        start, end = bound[len('FOR VALUES FROM ('):-1].split(') TO (')
+        found.append(Partition(name, _bound(start), _bound(end)))
+    lowest = datetime.min.replace(tzinfo=dt_timezone.utc)
+    return sorted(found, key=lambda p: (p.default, p.start or lowest))
+
+
+def ensure_partitions(months_ahead: int = LOG_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create the partitions of this month and the next `months_ahead` that are missing; returns their names."""
+    if not is_partitioned():
+        return []
+    ranges = [p for p in partitions() if not p.default]
+    now = timezone.now()
+    created = []
+    for offset in range(months_ahead + 1):
+        start, end = month_start(now, offset), month_start(now, offset + 1)
+        if any((p.start is None or p.start < end) and p.end > start for p in ranges):
+            continue
+        name = f"{TABLE}_p{start:%Y_%m}"
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        except DatabaseError as e:
+            # The month's rows already went to the default partition; they stay there until archived
+            logger.error(f"Could not create log partition {name}: {e}")
+            continue
+        created.append(name)
+        logger.info(f"Created log partition {name}")
+    return created
+
+
+def drop_expired(retention_days: float = log_archive.LOG_RETENTION_DAYS, archive: bool = True,
+                 root: Path = log_archive.LOG_ARCHIVE_DIR,
+                 chunk_size: int = log_archive.LOG_ARCHIVE_CHUNK) -> List[Tuple[str, int]]:
+    """
+    Drop the partitions holding only rows older than `retention_days`, after
+    writing their rows to the archive under `root` unless archive=False.
+    Returns (partition, rows archived) for each one dropped.
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    dropped = []
+    for partition in partitions():
+        if partition.default or partition.end > cutoff:
+            continue
+        rows = log_archive.export(partition.start, partition.end, chunk_size, root).rows if archive else 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {partition.name}')
+            cursor.execute(f'DROP TABLE {partition.name}')
+        dropped.append((partition.name, rows))
+        logger.info(f"Dropped log partition {partition.name} ({rows} rows archived)")
+    return dropped
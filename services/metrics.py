@@ -0,0 +1,115 @@
+"""
+In-process metrics for the SOAP gateway, exported at /metrics in the
+Prometheus text format.
+
+Phase histograms (soap_phase_seconds) break each call down into permission
+check, payload build, validation, envelope serialization, HTTP, reply parsing,
+read-model sync, result serialization and log write. Counters record cache,
+retry and hedging events. Every worker process keeps its own figures; the
+scraper tells them apart by instance and aggregates them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from services import tracing
+
+# Seconds; spans a cache hit to a call that uses its whole deadline
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PHASE_HELP = 'Time spent in each phase of a SOAP call'
+COUNTER_HELP = {
+    'soap_calls_total': 'SOAP calls by final status',
+    'soap_cache_events_total': 'Last-known-good cache outcomes for lookups (fresh, stale, miss, error_fallback)',
+    'soap_retries_total': 'Retried SOAP attempts by reason',
+    'soap_deadline_exceeded_total': 'SOAP calls abandoned because their time budget ran out',
+    'soap_hedges_total': 'Duplicate requests fired for slow reads',
+    'soap_hedge_wins_total': 'Hedged requests that answered first',
+}
+
+_lock = threading.Lock()
+# (operation, phase) -> [bucket counts..., +Inf count], sum
+_histograms: Dict[Tuple[str, str], list] = {}
+_sums: Dict[Tuple[str, str], float] = {}
+# name -> {sorted label items: value}
+_counters: Dict[str, Dict[Tuple, float]] = {}
+
+
+def observe(operation: str, phase: str, seconds: float):
+    key = (operation, phase)
+    with _lock:
+        counts = _histograms.get(key)
+        if counts is None:
+            counts = _histograms[key] = [0] * (len(BUCKETS) + 1)
+            _sums[key] = 0.0
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        _sums[key] += seconds
+
+
+def increment(name: str, amount: float = 1, **labels):
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+@contextmanager
+def timed(operation: str, phase: str, timings: Optional[Dict[str, float]] = None):
+    """
+    Observe the block as `phase` of `operation`; also add it, in ms, to `timings`
+    if given. Sampled traces get a soap.<phase> span for it.
+    """
+    start = time.perf_counter()
+    try:
+        with tracing.span(f'soap.{phase}', **{'soap.operation': operation}):
+            yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe(operation, phase, seconds)
+        if timings is not None:
+            timings[phase] = round(timings.get(phase, 0) + seconds * 1000, 3)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(items) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in items) + '}' if items else ''
+
+
+def render() -> str:
+    with _lock:
+        histograms = {key: list(counts) for key, counts in _histograms.items()}
+        sums = dict(_sums)
+        counters = {name: dict(series) for name, series in _counters.items()}
+
+    lines = ['# HELP soap_phase_seconds ' + PHASE_HELP, '# TYPE soap_phase_seconds histogram']
+    for (operation, phase), counts in sorted(histograms.items()):
+        labels = [('operation', operation), ('phase', phase)]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'soap_phase_seconds_bucket{_labels(labels + [("le", bound)])} {cumulative}')
+        lines.append(f'soap_phase_seconds_sum{_labels(labels)} {sums[(operation, phase)]:.6f}')
+        lines.append(f'soap_phase_seconds_count{_labels(labels)} {cumulative}')
+
+    for name in sorted(set(COUNTER_HELP) | set(counters)):
+        lines += [f'# HELP {name} {COUNTER_HELP.get(name, name)}', f'# TYPE {name} counter']
+        for labels, value in sorted(counters.get(name, {}).items()):
+            lines.append(f'{name}{_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget everything recorded so far (tests)."""
+    with _lock:
+        _histograms.clear()
+        _sums.clear()
+        _counters.clear()
@@ -0,0 +1,152 @@
+"""
+Content-addressed storage of SOAP log payloads.
+
+Many envelopes repeat byte for byte: the same getTenderInformation reply for
+a tender looked up all day, the same fault for every call while the hub is
+down. Each distinct envelope is stored once as a PayloadBlob keyed by the
+SHA-256 of its content, and log rows point at it (request_blob,
+response_blob) instead of carrying a copy.
+
+Request envelopes carry the hub credentials, which would otherwise make every
+request unique to its account, and the WS-Addressing MessageID zeep puts in
+every header, which would make every request unique; the values of
+PAYLOAD_CREDENTIAL_FIELDS and PER_MESSAGE_FIELDS elements (XML) or keys (JSON)
+are replaced with CREDENTIAL_MASK before hashing, and the masked envelope is
+what is stored.
+
+Blobs are not reference counted, so writing a log costs one lookup per
+payload. collect_garbage() deletes blobs no row points at any more, after the
+retention jobs (archive_logs, partition_logs) have removed rows. A blob is
+kept for PAYLOAD_GC_GRACE_HOURS after it was last handed out so that a log
+row being written as the collector runs never loses its payload.
+
+Rows written before this keep their payloads inline; convert() moves them
+over (manage.py dedup_payloads --convert). Archives always carry the payloads
+themselves, and restored rows are stored through here again.
+"""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce, Length
+from django.utils import timezone
+
+from core.models import PayloadBlob, SoapRequestLog
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_CREDENTIAL_FIELDS = getattr(settings, 'PAYLOAD_CREDENTIAL_FIELDS', ('id', 'password'))
+PAYLOAD_GC_GRACE_HOURS = getattr(settings, 'PAYLOAD_GC_GRACE_HOURS', 24)
+# Header values that differ on every call; the log row's own id and timestamp identify the call
+PER_MESSAGE_FIELDS = ('MessageID',)
+CREDENTIAL_MASK = '***'
+# last_used is refreshed at most this often, so popular blobs are not rewritten on every call
+LAST_USED_RESOLUTION = timedelta(hours=1)
+
+_names = '|'.join(re.escape(name) for name in (*PAYLOAD_CREDENTIAL_FIELDS, *PER_MESSAGE_FIELDS))
+# <id>UAP</id>, <ns0:password>...</ns0:password>, <wsa:MessageID>urn:uuid:...</wsa:MessageID>
+_XML_CREDENTIAL = re.compile(rf'<((?:[\w.-]+:)?(?:{_names}))(\s[^>]*)?>[^<]*</\1>')
+# "password": "..."
+_JSON_CREDENTIAL = re.compile(rf'("(?:{_names})"\s*:\s*)"(?:[^"\\]|\\.)*"')
+
+
+def mask_credentials(text: str) -> str:
+    text = _XML_CREDENTIAL.sub(lambda m: f"<{m.group(1)}{m.group(2) or ''}>{CREDENTIAL_MASK}</{m.group(1)}>", text)
+    return _JSON_CREDENTIAL.sub(rf'\1"{CREDENTIAL_MASK}"', text)
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def store(text: Optional[str], credentials: bool = False) -> Optional[PayloadBlob]:
+    """The blob holding `text` (masked first when it may carry credentials), created if new."""
+    if text is None:
+        return None
+    if credentials:
+        text = mask_credentials(text)
+    key = digest(text)
+    now = timezone.now()
+    blob = PayloadBlob.objects.filter(digest=key).only('id', 'last_used').first()
+    if blob is None:
+        blob, _ = PayloadBlob.objects.get_or_create(digest=key, defaults={'content': text, 'size': len(text.encode('utf-8'))})
+    elif blob.last_used < now - LAST_USED_RESOLUTION:
+        PayloadBlob.objects.filter(pk=blob.pk).update(last_used=now)
+    return blob
+
+
+def attach(log: SoapRequestLog):
+    """Move an unsaved log's inline payloads to blobs."""
+    if log.request_blob_id is None and log.request_payload:
+        log.request_blob = store(log.request_payload, credentials=True)
+        log.request_payload = ''
+    if log.response_blob_id is None and log.response_payload is not None:
+        log.response_blob = store(log.response_payload)
+        log.response_payload = None
+
+
+def convert(chunk_size: int = 1000, max_chunks: Optional[int] = None) -> int:
+    """Move the inline payloads of existing rows to blobs, a chunk per transaction; returns rows converted."""
+    inline = Q(request_blob__isnull=True, request_payload__gt='') | Q(response_blob__isnull=True, response_payload__isnull=False)
+    converted, chunks, last_id = 0, 0, 0
+    while max_chunks is None or chunks < max_chunks:
+        logs = list(SoapRequestLog.objects.filter(inline, id__gt=last_id).order_by('id')
+                    .only('id', 'timestamp', 'request_payload', 'response_payload', 'request_blob', 'response_blob')[:chunk_size])
+        if not logs:
+            break
+        last_id = logs[-1].id
+        with transaction.atomic():
+            for log in logs:
+                attach(log)
+            SoapRequestLog.objects.bulk_update(logs, ['request_payload', 'response_payload', 'request_blob', 'response_blob'])
+        converted += len(logs)
+        chunks += 1
+    return converted
+
+
+def collect_garbage(grace_hours: float = PAYLOAD_GC_GRACE_HOURS) -> int:
+    """Delete blobs no log row references and that were not handed out in the last `grace_hours`."""
+    # Two NOT EXISTS rather than one with an OR: each becomes a single anti-join over the log table
+    deleted, _ = PayloadBlob.objects.filter(
+        ~Exists(SoapRequestLog.objects.filter(request_blob=OuterRef('pk'))),
+        ~Exists(SoapRequestLog.objects.filter(response_blob=OuterRef('pk'))),
+        last_used__lt=timezone.now() - timedelta(hours=grace_hours),
+    ).delete()
+    if deleted:
+        logger.info(f"Deleted {deleted} unreferenced payload blob(s)")
+    return deleted
+
+
+@dataclass
+class StorageReport:
+    rows: int
+    blobs: int
+    # Payload bytes if every row kept its own copy, and as stored (inline payloads count characters)
+    logical_bytes: int
+    stored_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.logical_bytes - self.stored_bytes
+
+    @property
+    def ratio(self) -> float:
+        return self.logical_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+
+def report() -> StorageReport:
+    """Storage of SOAP log payloads, with and without deduplication (reads the whole table)."""
+    logs = SoapRequestLog.objects.aggregate(
+        rows=Count('id'),
+        inline=Coalesce(Sum(Length('request_payload')), 0) + Coalesce(Sum(Length('response_payload')), 0),
+        referenced=Coalesce(Sum('request_blob__size'), 0) + Coalesce(Sum('response_blob__size'), 0),
+    )
+    blobs = PayloadBlob.objects.aggregate(count=Count('id'), size=Coalesce(Sum('size'), 0))
+    return StorageReport(rows=logs['rows'], blobs=blobs['count'], logical_bytes=logs['inline'] + logs['referenced'],
+                         stored_bytes=logs['inline'] + blobs['size'])
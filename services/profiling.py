@@ -0,0 +1,122 @@
+"""
+On-demand profiling of a single request (see core.middleware.RequestProfilingMiddleware).
+
+Two modes:
+  cprofile  deterministic; every call is traced. Exact call counts, but the
+            tracing slows Python-heavy code down noticeably. Stored as a pstats
+            dump (python -m pstats, snakeviz, flameprof).
+  sample    the request thread's stack is read every PROFILE_SAMPLE_INTERVAL_MS
+            from a helper thread. Low overhead, statistical. Stored as folded
+            stacks ("a;b;c 12" lines) for flamegraph.pl or speedscope.
+
+Profiles are saved as RequestProfile rows; only the newest PROFILE_RETENTION are kept.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Tuple
+
+from django.conf import settings
+
+from core.models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RETENTION = getattr(settings, 'PROFILE_RETENTION', 50)
+PROFILE_SAMPLE_INTERVAL_MS = getattr(settings, 'PROFILE_SAMPLE_INTERVAL_MS', 5)
+# Lines of the hottest-functions summary shown in the admin
+SUMMARY_LINES = 40
+
+MODES = {
+    '1': RequestProfile.MODE_CPROFILE,
+    'cprofile': RequestProfile.MODE_CPROFILE,
+    'sample': RequestProfile.MODE_SAMPLE,
+}
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    # Not co_qualname, which needs Python 3.11; the line number tells same-named functions apart
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """Counts the stacks of one thread, below the frame that started the sampler."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread_id = threading.get_ident()
+        self._root = sys._getframe(1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None and frame is not self._root:
+                stack.append(_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self) -> bytes:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode()
+
+    def summary(self) -> str:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        share = lambda n: f"{n:>6} {n / self.samples:>6.1%}" if self.samples else f"{n:>6}"
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms", '', 'Own time (leaf frames):']
+        lines += [f"{share(n)}  {name}" for name, n in own.most_common(SUMMARY_LINES // 2)]
+        lines += ['', 'Total time (on the stack):']
+        lines += [f"{share(n)}  {name}" for name, n in total.most_common(SUMMARY_LINES // 2)]
+        return '\n'.join(lines)
+
+
+def profile(mode: str, call: Callable) -> Tuple[object, str, bytes, float]:
+    """Run call() under the profiler for `mode`; returns (result, summary, data, seconds)."""
+    start = time.perf_counter()
+    if mode == RequestProfile.MODE_SAMPLE:
+        with StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000) as sampler:
+            result = call()
+        return result, sampler.summary(), sampler.folded(), time.perf_counter() - start
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(call)
+    seconds = time.perf_counter() - start
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    return result, out.getvalue(), marshal.dumps(stats.stats), seconds
+
+
+def save(**fields) -> RequestProfile:
+    """Store a profile and drop those beyond PROFILE_RETENTION."""
+    record = RequestProfile.objects.create(**fields)
+    expired = RequestProfile.objects.order_by('-created_at', '-id').values_list('id', flat=True)[PROFILE_RETENTION:]
+    deleted, _ = RequestProfile.objects.filter(id__in=list(expired)).delete()
+    if deleted:
+        logger.info(f"Dropped {deleted} old request profile(s), keeping {PROFILE_RETENTION}")
+    return record
@@ -0,0 +1,161 @@
+"""
+Local read model of tenders and contracts.
+
+Successful getTenderInformation/getContractInformation replies are upserted
+into core.Tender/TenderLot and core.Contract/ContractLot, which back the
+/api/tenders/ and /api/contracts/ query endpoints. The refresh_read_model
+command re-fetches records that have not been seen for a while.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Contract, ContractLot, Tender, TenderLot
+
+# Records not returned by the hub for longer than this are reported as stale
+READ_MODEL_MAX_AGE = getattr(settings, 'READ_MODEL_MAX_AGE', 86400)
+SUCCESS_CODE = '0000'
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TenderInfo:
+    ref_name: str
+    ref_number: str
+    pe_name: Optional[str] = None
+    deadline_date: Optional[str] = None
+
+    @classmethod
+    def from_notification(cls, info) -> 'TenderInfo':
+        """Identity and search fields of a TenderNotificationInfo result model."""
+        return cls(info.tenderRefName or '', info.tenderRefNumber or '', info.PEName, info.deadLineDate)
+
+    @classmethod
+    def from_tender(cls, tender: Tender) -> 'TenderInfo':
+        deadline = tender.deadline_date.isoformat() if tender.deadline_date else None
+        return cls(tender.ref_name, tender.ref_number, tender.pe_name, deadline)
+
+
+def parse_date(value) -> Optional[date]:
+    """Hub dates are YYYY-MM-DD, sometimes followed by a time."""
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def parse_amount(value) -> Optional[Decimal]:
+    try:
+        return Decimal(str(value).replace(',', '')) if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+def freshness(synced_at) -> Dict:
+    age = (timezone.now() - synced_at).total_seconds()
+    return {'synced_at': synced_at, 'age_seconds': int(age), 'stale': age > READ_MODEL_MAX_AGE}
+
+
+def _latest_by(items, key):
+    # A reply may repeat a record; the upsert below must see each key once
+    return list({key(item): item for item in items if key(item)[0]}.values())
+
+
+@transaction.atomic
+def sync_tenders(response, synced_at=None) -> int:
+    synced_at = synced_at or timezone.now()
+    notifications = _latest_by(response.tenderNotificationInfo, lambda info: (info.tenderRefNumber,))
+    if not notifications:
+        return 0
+
+    tenders = []
+    for info in notifications:
+        tender_info = TenderInfo.from_notification(info)
+        tenders.append(Tender(
+            ref_number=tender_info.ref_number, ref_name=tender_info.ref_name, pe_name=tender_info.pe_name or '',
+            deadline_date=parse_date(tender_info.deadline_date), pe_code=info.PECode or '',
+            tender_type=info.tenderType or '', tender_method=info.tenderMethod or '',
+            public_date=parse_date(info.publicDate), open_date=parse_date(info.openDate),
+            data=info.to_dict(), synced_at=synced_at,
+        ))
+    Tender.objects.bulk_create(
+        tenders, update_conflicts=True, unique_fields=['ref_number'],
+        update_fields=['ref_name', 'pe_code', 'pe_name', 'tender_type', 'tender_method', 'public_date',
+                       'open_date', 'deadline_date', 'data', 'synced_at'],
+    )
+
+    ids = dict(Tender.objects.filter(ref_number__in=[t.ref_number for t in tenders]).values_list('ref_number', 'id'))
+    TenderLot.objects.filter(tender_id__in=ids.values()).delete()
+    TenderLot.objects.bulk_create([
+        TenderLot(tender_id=ids[info.tenderRefNumber], lot_number=lot.tenderLotNumber or '',
+                  lot_name=lot.tenderLotName or '', description=lot.tenderLotDesc or '',
+                  amount=parse_amount(lot.amount), unit=lot.unit or '')
+        for info in notifications for lot in info.tenderLOTInfo
+    ])
+    return len(tenders)
+
+
+@transaction.atomic
+def sync_contracts(response, synced_at=None) -> int:
+    synced_at = synced_at or timezone.now()
+    infos = _latest_by(response.contractInfo, lambda info: (info.contractNumber, info.contractSerialNumber or ''))
+    if not infos:
+        return 0
+
+    contracts = [
+        Contract(
+            contract_number=info.contractNumber, serial_number=info.contractSerialNumber or '',
+            contract_name=info.contractName or '', contract_date=parse_date(info.contractDate),
+            contract_amount=parse_amount(info.contractAmount), currency=info.currency or '',
+            pe_name=info.pEName or '', pe_tin_number=info.pETINNumber or '',
+            supplier_name=info.supplierName or '', supplier_tin_number=info.supplierTINNumber or '',
+            tender_ref_number=info.tenderRefNumber or '', data=info.to_dict(), synced_at=synced_at,
+        )
+        for info in infos
+    ]
+    Contract.objects.bulk_create(
+        contracts, update_conflicts=True, unique_fields=['contract_number', 'serial_number'],
+        update_fields=['contract_name', 'contract_date', 'contract_amount', 'currency', 'pe_name', 'pe_tin_number',
+                       'supplier_name', 'supplier_tin_number', 'tender_ref_number', 'data', 'synced_at'],
+    )
+
+    # Only the serials in this reply: a lookup of one serial must not touch its siblings' lots
+    keys = {(c.contract_number, c.serial_number) for c in contracts}
+    ids = {
+        (number, serial): pk for number, serial, pk in Contract.objects.filter(
+            contract_number__in={number for number, _ in keys}
+        ).values_list('contract_number', 'serial_number', 'id')
+        if (number, serial) in keys
+    }
+    ContractLot.objects.filter(contract_id__in=ids.values()).delete()
+    ContractLot.objects.bulk_create([
+        ContractLot(contract_id=ids[(info.contractNumber, info.contractSerialNumber or '')],
+                    lot_number=lot.lotNumber or '', lot_name=lot.lotName or '', amount=parse_amount(lot.lotAmount))
+        for info in infos for lot in info.lotInfo
+    ])
+    return len(contracts)
+
+
+SYNCERS = {
+    'getTenderInformation': sync_tenders,
+    'getContractInformation': sync_contracts,
+}
+
+
+def sync_response(operation: str, result) -> int:
+    """Mirror a successful lookup; never lets a read-model problem fail the call itself."""
+    syncer = SYNCERS.get(operation)
+    if syncer is None or result is None or isinstance(result, dict) or result.resultCode != SUCCESS_CODE:
+        return 0
+    try:
+        return syncer(result)
+    except Exception as e:
+        logger.error(f"Failed to sync {operation} reply into the read model: {e}", exc_info=True)
+        return 0
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+import zeep
+from zeep import xsd
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+WSDL_PATH = getattr(settings, 'SOAP_WSDL_PATH', 'service.wsdl')
+REGISTRY_CACHE_PATH = getattr(settings, 'SOAP_REGISTRY_CACHE_PATH', None)
+
+# Bump when the cached structure changes so stale disk caches are rebuilt
+REGISTRY_FORMAT = 1
+
+# Credentials are injected by SoapClient, never entered in forms
+CREDENTIAL_FIELDS = {'id', 'password'}
+
+# How each SoapClient method receives the request body: either the name of the
+# dict argument for send* operations, or an element -> argument map for get* ones.
+CLIENT_ARGUMENTS = {
+    'getTenderInformation': {'tenderRefName': 'ref_name', 'tenderRefNumber': 'ref_number'},
+    'getContractInformation': {'contractNumber': 'contract_number', 'contractSerialNumber': 'serial_number'},
+    'sendAdvancePaymentInformation': 'payment_info',
+    'sendBidSecurityInformation': 'bid_info',
+    'sendCreditLineFacility': 'credit_info',
+    'sendPerformSecurityInformation': 'perform_info',
+}
+
+# Labels that cannot be derived from the element names
+LABEL_OVERRIDES = {
+    'amountCharacter': 'Amount (Words)',
+    'name': 'Beneficiary Name',
+    'unit': 'Currency Unit',
+    'pEName': 'PE Name',
+    'pETINNumber': 'PE TIN',
+    'addressPE': 'PE Address',
+    'chargerNameInPE': 'PE Charger Name',
+    'eMailAddress': 'Email',
+    'bankTINNumber': 'Bank TIN',
+    'supplierTINNumber': 'Supplier TIN',
+    'securityRepresentiveName': 'Security Rep Name',
+    'supplierRepresentiveName': 'Supplier Rep Name',
+    'procuringEnityInfo': 'Procuring Entity Info',
+    'lotInfo': 'Lot Info',
+}
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+
+
+def humanize(name: str) -> str:
+    if name in LABEL_OVERRIDES:
+        return LABEL_OVERRIDES[name]
+    words = _CAMEL_BOUNDARY.sub(' ', name)
+    label = words[:1].upper() + words[1:]
+    if name.endswith('Date'):
+        label += ' (YYYY-MM-DD)'
+    return label
+
+
+def camel_to_snake(name: str) -> str:
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def compile_payload_builder(paths: Dict[str, Tuple[Tuple[str, bool], ...]]):
+    """
+    Turn {field_name: ((element, is_list), ...)} into a function mapping flat
+    form data to the nested request dict. Elements flagged as lists are wrapped
+    in a list; repeated form values (QueryDict.getlist) become separate items.
+    """
+    steps = [(name, path[:-1], path[-1][0], any(is_list for _, is_list in path[:-1]))
+             for name, path in paths.items()]
+
+    def build(data) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for name, parents, leaf, in_list in steps:
+            if in_list and hasattr(data, 'getlist'):
+                values = data.getlist(name)
+            else:
+                value = data.get(name)
+                values = value if in_list and isinstance(value, list) else [value]
+
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                node = result
+                for key, is_list in parents:
+                    if is_list:
+                        items = node.setdefault(key, [])
+                        while len(items) <= index:
+                            items.append({})
+                        node = items[index]
+                    else:
+                        node = node.setdefault(key, {})
+                node[leaf] = value
+        return result
+
+    return build
+
+
+@dataclass
+class OperationSpec:
+    name: str
+    method_name: str
+    request_element: str
+    fields: List[Dict[str, Any]]
+    paths: Dict[str, Tuple[Tuple[str, bool], ...]]
+    build_payload: Any = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.build_payload = compile_payload_builder(self.paths)
+
+    @property
+    def field_names(self) -> List[str]:
+        return [f['name'] for f in self.fields]
+
+    def client_kwargs(self, data) -> Dict[str, Any]:
+        """Keyword arguments for the matching SoapClient method, built from flat form data."""
+        arguments = CLIENT_ARGUMENTS.get(self.name)
+        with metrics.timed(self.name, 'payload_build'):
+            payload = self.build_payload(data)
+        if isinstance(arguments, dict):
+            return {arg: payload.get(element) for element, arg in arguments.items()}
+        return {arguments: payload}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'method_name': self.method_name,
+            'request_element': self.request_element,
+            'fields': self.fields,
+            'paths': {name: [list(step) for step in path] for name, path in self.paths.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'OperationSpec':
+        paths = {name: tuple((key, is_list) for key, is_list in path) for name, path in data['paths'].items()}
+        return cls(data['name'], data['method_name'], data['request_element'], data['fields'], paths)
+
+
+class OperationRegistry:
+    """
+    Per-operation form metadata and payload builders derived from the WSDL.
+    Use get_registry() rather than constructing this directly.
+    """
+
+    def __init__(self, specs: List[OperationSpec]):
+        self._specs = {spec.name: spec for spec in specs}
+
+    @property
+    def operation_names(self) -> List[str]:
+        return list(self._specs)
+
+    def get(self, operation: str) -> Optional[OperationSpec]:
+        return self._specs.get(operation)
+
+    def __contains__(self, operation):
+        return operation in self._specs
+
+    def __iter__(self):
+        return iter(self._specs.values())
+
+    # --- Building ---
+
+    @classmethod
+    def from_wsdl(cls, wsdl_path: str) -> 'OperationRegistry':
+        client = zeep.Client(wsdl_path, settings=zeep.Settings(strict=False))
+        binding = client.service._binding
+        specs = []
+        for name, operation in binding._operations.items():
+            request_element, request = operation.input.body.type.elements[0]
+            fields, paths = [], {}
+            cls._walk(request.type, (), (), fields, paths)
+            arguments = CLIENT_ARGUMENTS.get(name)
+            if isinstance(arguments, dict):
+                # get* methods take a fixed set of scalar arguments, all mandatory
+                fields = [dict(f, required=True) for f in fields if f['name'] in arguments]
+                paths = {n: p for n, p in paths.items() if n in arguments}
+            specs.append(OperationSpec(name, camel_to_snake(name), request_element, fields, paths))
+        return cls(specs)
+
+    @classmethod
+    def _walk(cls, complex_type, prefix, path, fields, paths):
+        # Scalars first, then nested types, so each group's fields stay contiguous in the form
+        elements = sorted(complex_type.elements, key=lambda item: isinstance(item[1].type, xsd.ComplexType))
+        for element_name, element in elements:
+            if not prefix and element_name in CREDENTIAL_FIELDS:
+                continue
+            step = (element_name, bool(element.accepts_multiple))
+            if isinstance(element.type, xsd.ComplexType):
+                cls._walk(element.type, prefix + (element_name,), path + (step,), fields, paths)
+                continue
+            name = '__'.join(prefix + (element_name,))
+            fields.append({
+                'name': name,
+                'label': humanize(element_name),
+                'group': ' / '.join(humanize(p) for p in prefix),
+                'required': not element.is_optional,
+                'many': any(is_list for _, is_list in path),
+            })
+            paths[name] = path + (step,)
+
+    @classmethod
+    def load(cls, wsdl_path: str, cache_path: Optional[str] = None) -> 'OperationRegistry':
+        """Load from the on-disk cache when it matches the WSDL, otherwise introspect and write it."""
+        with open(wsdl_path, 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+
+        if cache_path:
+            try:
+                with open(cache_path) as fh:
+                    cached = json.load(fh)
+                if cached.get('format') == REGISTRY_FORMAT and cached.get('wsdl_sha256') == digest:
+                    return cls([OperationSpec.from_dict(op) for op in cached['operations']])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        registry = cls.from_wsdl(wsdl_path)
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as fh:
+                    json.dump({
+                        'format': REGISTRY_FORMAT,
+                        'wsdl_sha256': digest,
+                        'operations': [spec.to_dict() for spec in registry],
+                    }, fh)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logger.warning(f"Could not write SOAP registry cache {cache_path}: {e}")
+        return registry
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> OperationRegistry:
+    """Process-wide registry, built once on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = OperationRegistry.load(WSDL_PATH, REGISTRY_CACHE_PATH)
+    return _registry
@@ -0,0 +1,247 @@
+"""
+Typed, slotted result models for the hub's responses.
+
+Responses are decoded straight from the SOAP envelope with lxml into these
+dataclasses instead of zeep's CompoundValue trees, which are expensive to build
+and must be run through serialize_object before they can be rendered.
+Attribute names match the XML element names so the JSON produced by
+to_primitive() keeps the shape clients already receive.
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from lxml import etree
+from zeep.exceptions import Fault, TransportError
+from zeep.helpers import serialize_object
+
+XSI_NIL = '{http://www.w3.org/2001/XMLSchema-instance}nil'
+
+_parser = etree.XMLParser(resolve_entities=False, huge_tree=True, remove_blank_text=True, no_network=True)
+
+
+def xml_model(many: Optional[Dict[str, type]] = None):
+    """
+    Class decorator: make a slotted dataclass and precompute how child elements map onto fields.
+    `many` names the repeated (maxOccurs="unbounded") complex children and their model.
+    """
+    many = many or {}
+
+    def wrap(cls):
+        cls = dataclass(slots=True)(cls)
+        cls._field_names = tuple(f.name for f in fields(cls))
+        cls._children = {name: many.get(name) for name in cls._field_names}
+        return cls
+
+    return wrap
+
+
+class XmlModelMixin:
+    __slots__ = ()
+
+    @classmethod
+    def from_element(cls, element):
+        values = dict.fromkeys(cls._field_names)
+        for name, model in cls._children.items():
+            if model is not None:
+                values[name] = []
+        for child in element:
+            tag = child.tag
+            if not isinstance(tag, str):
+                continue  # comments / processing instructions
+            name = tag[tag.rfind('}') + 1:]
+            if name not in values:
+                continue
+            model = cls._children[name]
+            if child.get(XSI_NIL) == 'true':
+                if model is None:
+                    values[name] = None
+                continue
+            if model is None:
+                values[name] = child.text
+            else:
+                values[name].append(model.from_element(child))
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {}
+        for name in self._field_names:
+            value = getattr(self, name)
+            if self._children[name] is not None:
+                value = [item.to_dict() for item in value]
+            result[name] = value
+        return result
+
+
+# --- Tender information (getTenderInformation) ---
+
+@xml_model()
+class TenderLOTInfo(XmlModelMixin):
+    amount: Optional[str]
+    tenderLotDesc: Optional[str]
+    tenderLotName: Optional[str]
+    tenderLotNumber: Optional[str]
+    unit: Optional[str]
+
+
+@xml_model(many={'tenderLOTInfo': TenderLOTInfo})
+class TenderNotificationInfo(XmlModelMixin):
+    PECode: Optional[str]
+    PEName: Optional[str]
+    deadLineDate: Optional[str]
+    onOff: Optional[str]
+    openDate: Optional[str]
+    publicDate: Optional[str]
+    receiveDate: Optional[str]
+    tenderLOTInfo: List[TenderLOTInfo]
+    tenderMethod: Optional[str]
+    tenderRefName: Optional[str]
+    tenderRefNumber: Optional[str]
+    tenderType: Optional[str]
+
+
+@xml_model(many={'tenderNotificationInfo': TenderNotificationInfo})
+class TenderInfoResponse(XmlModelMixin):
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+    tenderNotificationInfo: List[TenderNotificationInfo]
+
+
+# --- Contract information (getContractInformation) ---
+
+@xml_model()
+class LOTInfo(XmlModelMixin):
+    lotAmount: Optional[str]
+    lotName: Optional[str]
+    lotNumber: Optional[str]
+
+
+@xml_model(many={'lotInfo': LOTInfo})
+class ContractInfo(XmlModelMixin):
+    address: Optional[str]
+    cellPhoneNumber: Optional[str]
+    contractAmount: Optional[str]
+    contractAmountCharacter: Optional[str]
+    contractDate: Optional[str]
+    contractDurationDay: Optional[str]
+    contractDurationMonth: Optional[str]
+    contractDurationYear: Optional[str]
+    contractManagerName: Optional[str]
+    contractManagerPosition: Optional[str]
+    contractName: Optional[str]
+    contractNumber: Optional[str]
+    contractSerialNumber: Optional[str]
+    currency: Optional[str]
+    eMailAddress: Optional[str]
+    effectiveDate: Optional[str]
+    lotInfo: List[LOTInfo]
+    pEAddress: Optional[str]
+    pEName: Optional[str]
+    pERepresentativeName: Optional[str]
+    pETELNumber: Optional[str]
+    pETINNumber: Optional[str]
+    penaltyDelayRate: Optional[str]
+    penaltyLimitRate: Optional[str]
+    poBox: Optional[str]
+    supervisingFirm: Optional[str]
+    supplierName: Optional[str]
+    supplierTINNumber: Optional[str]
+    telNumber: Optional[str]
+    tenderRefName: Optional[str]
+    tenderRefNumber: Optional[str]
+    totalTaxeAmount: Optional[str]
+    totalTaxeAmountCharacter: Optional[str]
+    vatAmount: Optional[str]
+    vatRate: Optional[str]
+    warantyMonth: Optional[str]
+    warantyYear: Optional[str]
+    whtAmount: Optional[str]
+    whtRate: Optional[str]
+
+
+@xml_model(many={'contractInfo': ContractInfo})
+class ContractInfoResponse(XmlModelMixin):
+    contractInfo: List[ContractInfo]
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+
+
+# --- Guarantee submissions (send*) ---
+
+@xml_model()
+class AdvancePaymentInfoResponse(XmlModelMixin):
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+
+
+@xml_model()
+class BidSecurityInfoResponse(XmlModelMixin):
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+
+
+@xml_model()
+class CreditLineFacilityResponse(XmlModelMixin):
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+
+
+@xml_model()
+class PerformanceSecurityInfoResponse(XmlModelMixin):
+    resultCode: Optional[str]
+    resultMessage: Optional[str]
+
+
+RESPONSE_MODELS = {
+    'getTenderInformation': TenderInfoResponse,
+    'getContractInformation': ContractInfoResponse,
+    'sendAdvancePaymentInformation': AdvancePaymentInfoResponse,
+    'sendBidSecurityInformation': BidSecurityInfoResponse,
+    'sendCreditLineFacility': CreditLineFacilityResponse,
+    'sendPerformSecurityInformation': PerformanceSecurityInfoResponse,
+}
+
+
+def _local_name(tag: str) -> str:
+    return tag[tag.rfind('}') + 1:]
+
+
+def parse_response(operation: str, content: bytes, status_code: int = 200):
+    """
+    Decode a raw SOAP reply for `operation` into its result model.
+    Raises zeep's Fault for SOAP faults and TransportError for non-SOAP replies,
+    matching what the zeep service proxy would raise.
+    """
+    try:
+        root = etree.fromstring(content, _parser)
+    except etree.XMLSyntaxError:
+        raise TransportError(f"Server returned HTTP status {status_code} without a SOAP envelope",
+                             status_code=status_code, content=content)
+
+    body = root.find('{*}Body')
+    payload = next((child for child in body if isinstance(child.tag, str)), None) if body is not None else None
+    if payload is None:
+        raise TransportError("SOAP envelope has no body", status_code=status_code, content=content)
+
+    if _local_name(payload.tag) == 'Fault':
+        message = payload.findtext('faultstring') or payload.findtext('{*}Reason/{*}Text') or 'Unknown fault occured'
+        code = payload.findtext('faultcode') or payload.findtext('{*}Code/{*}Value')
+        raise Fault(message=message, code=code, detail=payload.find('detail'))
+
+    if status_code >= 400:
+        raise TransportError(f"Server returned HTTP status {status_code}", status_code=status_code, content=content)
+
+    returned = payload.find('{*}return')
+    if returned is None or returned.get(XSI_NIL) == 'true':
+        return None
+    return RESPONSE_MODELS[operation].from_element(returned)
+
+
+def to_primitive(obj):
+    """Convert a call_operation result (model, guardrail dict or zeep object) to plain JSON types."""
+    if isinstance(obj, XmlModelMixin):
+        return obj.to_dict()
+    if isinstance(obj, list):
+        return [to_primitive(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key: to_primitive(value) for key, value in obj.items()}
+    return serialize_object(obj)
@@ -0,0 +1,148 @@
+"""
+Retry policy for SOAP calls, configured per operation.
+
+Every call runs against one Deadline that covers connecting, reading and all
+retries. Read operations (get*) are retried on connection errors, timeouts and
+gateway statuses. Write operations (send*) change state at the hub, which has
+no way to recognise a repeated submission, so they are retried only when the
+connection failed before any of the request was sent (connect timeout,
+refused, unresolvable host). A write that timed out reading the reply or got a
+gateway status may have gone through and is not repeated. Backoff is
+exponential with full jitter and is never allowed to sleep past the deadline.
+
+SOAP faults come back as HTTP 500 and are business errors, so 500 is not retried.
+"""
+import logging
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+from django.conf import settings
+from requests.exceptions import ConnectTimeout, ConnectionError, Timeout
+from urllib3.exceptions import NewConnectionError
+
+from services import metrics
+
+# Total budget for one call, including retries, when the caller does not pass one
+SOAP_DEADLINE = getattr(settings, 'SOAP_DEADLINE', 60)
+# Per-attempt caps; each attempt also gets no more than what is left of the deadline
+SOAP_CONNECT_TIMEOUT = getattr(settings, 'SOAP_CONNECT_TIMEOUT', 5)
+SOAP_TIMEOUT = getattr(settings, 'SOAP_TIMEOUT', 30)
+SOAP_RETRIES = getattr(settings, 'SOAP_RETRIES', 3)
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """The call's time budget ran out before an attempt could be made."""
+
+
+class Deadline:
+    """A point in (monotonic) time by which a call and all of its retries must finish."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, connect: float = SOAP_CONNECT_TIMEOUT, read: float = SOAP_TIMEOUT):
+        """(connect, read) timeouts for the next attempt, capped by the remaining budget."""
+        remaining = self.remaining()
+        return (min(connect, remaining), min(read, remaining))
+
+    def __repr__(self):
+        return f"Deadline({self.seconds}s, {self.remaining():.2f}s left)"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 1 + SOAP_RETRIES
+    backoff_base: float = 0.3
+    backoff_max: float = 5.0
+    retry_statuses: tuple = (502, 503, 504)
+    # False for operations that must not reach the hub twice: repeated only if nothing was sent
+    idempotent: bool = True
+    # Fire a duplicate request when a call is slow (services/hedging.py); reads only
+    hedge: bool = True
+
+    def allows_retry(self, error: Optional[Exception] = None, status: Optional[int] = None) -> bool:
+        """Whether an attempt that raised `error` or returned `status` may be repeated."""
+        if self.attempts <= 1:
+            return False
+        if not self.idempotent:
+            return error is not None and nothing_sent(error)
+        return error is not None or status in self.retry_statuses
+
+    def backoff(self, retry_number: int) -> float:
+        """Full jitter: a random delay up to the exponential cap for this retry."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry_number)))
+
+
+def nothing_sent(error: Exception) -> bool:
+    """True when `error` was raised while connecting, before any of the request reached the hub."""
+    if isinstance(error, ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the connection failure
+    reason = getattr(error.args[0], 'reason', None) if isinstance(error, ConnectionError) and error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+READ_POLICY = RetryPolicy()
+WRITE_POLICY = RetryPolicy(idempotent=False, hedge=False)
+
+
+def policy_for(operation: str) -> RetryPolicy:
+    """
+    Default policy by operation kind, with overrides from settings.SOAP_RETRY_POLICIES,
+    e.g. {'getContractInformation': {'attempts': 2}}.
+    """
+    policy = READ_POLICY if operation.startswith('get') else WRITE_POLICY
+    overrides = getattr(settings, 'SOAP_RETRY_POLICIES', {}).get(operation)
+    return replace(policy, **overrides) if overrides else policy
+
+
+def call_with_retry(attempt: Callable, policy: RetryPolicy, deadline: Deadline, operation: str = ''):
+    """
+    Run `attempt(timeout)` under `policy` until it returns a response whose status is
+    not retryable, the attempts are used up or the deadline would be passed.
+    Returns the last response, or re-raises the last connection/timeout error.
+    """
+    max_attempts = policy.attempts
+    response, error = None, None
+
+    for number in range(max_attempts):
+        if deadline.expired:
+            metrics.increment('soap_deadline_exceeded_total', operation=operation)
+            raise DeadlineExceeded(f"{operation or 'SOAP call'} ran out of its {deadline.seconds}s budget "
+                                   f"after {number} attempt(s)")
+        try:
+            response, error = attempt(deadline.timeout()), None
+        except (ConnectionError, Timeout) as e:
+            response, error = None, e
+            reason = type(e).__name__
+        else:
+            if response.status_code not in policy.retry_statuses:
+                return response
+            reason = f"HTTP {response.status_code}"
+
+        status = response.status_code if response is not None else None
+        if number + 1 >= max_attempts or not policy.allows_retry(error, status):
+            break
+        delay = policy.backoff(number)
+        if delay >= deadline.remaining():
+            break
+        metrics.increment('soap_retries_total', operation=operation, reason=reason)
+        logger.warning(f"Retrying {operation} after {reason} (attempt {number + 1}/{max_attempts}, "
+                       f"sleeping {delay:.2f}s, {deadline.remaining():.2f}s left)")
+        time.sleep(delay)
+
+    if error is not None:
+        raise error
+    return response
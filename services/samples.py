@@ -0,0 +1,116 @@
+"""
+Synthetic hub replies shaped like service.wsdl, for tests, benchmarks and the
+local stand-in upstream. Values are deterministic so runs are comparable.
+"""
+from xml.sax.saxutils import escape
+
+SERVICE_NS = 'http://security.service.hub.roneps.minecofin.rw'
+BANK_NS = 'http://bank.vo.hub.roneps.minecofin.rw/xsd'
+SECURITY_NS = 'http://security.vo.hub.roneps.minecofin.rw/xsd'
+
+ENVELOPE = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soapenv:Body>{body}</soapenv:Body></soapenv:Envelope>'
+)
+
+
+def _elements(prefix, values):
+    return ''.join(f'<{prefix}:{name}>{escape(str(value))}</{prefix}:{name}>' for name, value in values)
+
+
+def contract_info(index, lots=3):
+    lot_xml = ''.join(
+        f'<ax23:lotInfo>{_elements("ax23", [("lotAmount", 250000 + lot), ("lotName", f"Lot {lot + 1} of contract {index}"), ("lotNumber", lot + 1)])}</ax23:lotInfo>'
+        for lot in range(lots)
+    )
+    before = [
+        ('address', f'KN {index} Ave, Kigali'), ('cellPhoneNumber', '+250788000000'),
+        ('contractAmount', f'{1500000 + index}.00'), ('contractAmountCharacter', 'One million five hundred thousand'),
+        ('contractDate', '2026-01-15'), ('contractDurationDay', '0'), ('contractDurationMonth', '6'),
+        ('contractDurationYear', '0'), ('contractManagerName', 'Jean Bosco'), ('contractManagerPosition', 'Manager'),
+        ('contractName', f'Supply of office equipment #{index}'), ('contractNumber', f'C-{index:06d}'),
+        ('contractSerialNumber', str(index)), ('currency', 'RWF'), ('eMailAddress', 'procurement@example.rw'),
+        ('effectiveDate', '2026-02-01'),
+    ]
+    after = [
+        ('pEAddress', 'Kigali'), ('pEName', f'Ministry {index % 17}'), ('pERepresentativeName', 'Alice Uwase'),
+        ('pETELNumber', '+250788111111'), ('pETINNumber', f'1{index % 17:08d}'), ('penaltyDelayRate', '0.1'),
+        ('penaltyLimitRate', '10'), ('poBox', '1234'), ('supervisingFirm', 'Consult Ltd'),
+        ('supplierName', f'Supplier {index % 53} Ltd'), ('supplierTINNumber', f'2{index % 53:08d}'),
+        ('telNumber', '+250788222222'), ('tenderRefName', f'Tender for equipment #{index}'),
+        ('tenderRefNumber', f'T-{index:06d}'), ('totalTaxeAmount', '270000'), ('totalTaxeAmountCharacter', 'Two hundred seventy thousand'),
+        ('vatAmount', '270000'), ('vatRate', '18'), ('warantyMonth', '12'), ('warantyYear', '1'),
+        ('whtAmount', '0'), ('whtRate', '0'),
+    ]
+    return f'<ax23:contractInfo>{_elements("ax23", before)}{lot_xml}{_elements("ax23", after)}</ax23:contractInfo>'
+
+
+def contract_response(contracts=1, lots=3) -> bytes:
+    items = ''.join(contract_info(i, lots) for i in range(contracts))
+    body = (
+        f'<ns:getContractInformationResponse xmlns:ns="{SERVICE_NS}" xmlns:ax23="{BANK_NS}">'
+        f'<ns:return>{items}<ax23:resultCode>0000</ax23:resultCode>'
+        f'<ax23:resultMessage>Success</ax23:resultMessage></ns:return>'
+        f'</ns:getContractInformationResponse>'
+    )
+    return ENVELOPE.format(body=body).encode('utf-8')
+
+
+def tender_response(tenders=1, lots=2) -> bytes:
+    items = []
+    for index in range(tenders):
+        lot_xml = ''.join(
+            f'<ax23:tenderLOTInfo>{_elements("ax23", [("amount", 100000 * (lot + 1)), ("tenderLotDesc", "Desks and chairs"), ("tenderLotName", f"Lot {lot + 1}"), ("tenderLotNumber", lot + 1), ("unit", "RWF")])}</ax23:tenderLOTInfo>'
+            for lot in range(lots)
+        )
+        fields_before = [('PECode', f'PE{index % 17:03d}'), ('PEName', f'Ministry {index % 17}'), ('deadLineDate', '2026-11-30'),
+                         ('onOff', 'ON'), ('openDate', '2026-12-01'), ('publicDate', '2026-10-01'), ('receiveDate', '2026-11-30')]
+        fields_after = [('tenderMethod', 'Open'), ('tenderRefName', f'Tender for desks #{index}'),
+                        ('tenderRefNumber', f'T-{index:06d}'), ('tenderType', 'Goods')]
+        items.append(f'<ax23:tenderNotificationInfo>{_elements("ax23", fields_before)}{lot_xml}{_elements("ax23", fields_after)}</ax23:tenderNotificationInfo>')
+    body = (
+        f'<ns:getTenderInformationResponse xmlns:ns="{SERVICE_NS}" xmlns:ax23="{BANK_NS}">'
+        f'<ns:return><ax23:resultCode>0000</ax23:resultCode><ax23:resultMessage>Success</ax23:resultMessage>'
+        f'{"".join(items)}</ns:return></ns:getTenderInformationResponse>'
+    )
+    return ENVELOPE.format(body=body).encode('utf-8')
+
+
+def result_response(operation, code='0000', message='Success') -> bytes:
+    """Reply for the send* operations, which only carry a result code and message."""
+    body = (
+        f'<ns:{operation}Response xmlns:ns="{SERVICE_NS}" xmlns:ax25="{SECURITY_NS}">'
+        f'<ns:return><ax25:resultCode>{escape(code)}</ax25:resultCode>'
+        f'<ax25:resultMessage>{escape(message)}</ax25:resultMessage></ns:return>'
+        f'</ns:{operation}Response>'
+    )
+    return ENVELOPE.format(body=body).encode('utf-8')
+
+
+def fault_response(message='Invalid credentials', code='soapenv:Client') -> bytes:
+    body = f'<soapenv:Fault><faultcode>{escape(code)}</faultcode><faultstring>{escape(message)}</faultstring></soapenv:Fault>'
+    return ENVELOPE.format(body=body).encode('utf-8')
+
+
+def sample_response(operation: str) -> bytes:
+    if operation == 'getContractInformation':
+        return contract_response()
+    if operation == 'getTenderInformation':
+        return tender_response()
+    return result_response(operation)
+
+
+def form_data(spec) -> dict:
+    """Flat form data filling every field of an OperationSpec with a value the validator accepts."""
+    data = {}
+    for field in spec.fields:
+        element = field['name'].rsplit('__', 1)[-1]
+        if element.endswith('Date'):
+            value = '2026-01-15'
+        elif element == 'amount' or element.endswith('Amount'):
+            value = '1500000.00'
+        else:
+            value = f'{field["label"]} 1'
+        data[field['name']] = [value] if field['many'] else value
+    return data
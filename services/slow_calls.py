@@ -0,0 +1,104 @@
+"""
+Slow-call store: the outliers, kept whole.
+
+Every SOAP call and web request is checked against its threshold: the
+configured one (SLOW_CALL_THRESHOLDS by operation or URL name, else
+SLOW_SOAP_THRESHOLD / SLOW_WEB_THRESHOLD) and, once enough calls have been
+seen, the p99 of that name's recent latencies. A call over either is saved as
+a SlowCall with its own copy of the envelopes, its phase timings and the state
+of the HTTP connection pool and job pool, whatever the request log keeps.
+Severity is the duration over the threshold broken. Only the newest
+SLOW_CALL_RETENTION entries are kept.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+from core.models import SlowCall
+from services import tracing
+from services.hedging import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+SLOW_CALL_THRESHOLDS: Dict[str, float] = getattr(settings, 'SLOW_CALL_THRESHOLDS', {})
+SLOW_SOAP_THRESHOLD = getattr(settings, 'SLOW_SOAP_THRESHOLD', 5.0)
+SLOW_WEB_THRESHOLD = getattr(settings, 'SLOW_WEB_THRESHOLD', 2.0)
+# Calls faster than this are never slow, however they compare to the p99
+SLOW_CALL_FLOOR = getattr(settings, 'SLOW_CALL_FLOOR', 0.5)
+SLOW_CALL_RETENTION = getattr(settings, 'SLOW_CALL_RETENTION', 1000)
+# The p99 only counts once a name has this many recent calls
+P99_MIN_SAMPLES = 100
+
+_latencies = LatencyTracker(window=1000)
+
+
+def check(kind: str, name: str, seconds: float) -> Optional[Tuple[float, float, str]]:
+    """Record the latency; returns (severity, threshold, reason) when the call was slow."""
+    key = f"{kind}:{name}"
+    p99 = _latencies.percentile(key, 99, min_samples=P99_MIN_SAMPLES)
+    _latencies.record(key, seconds)
+
+    static = SLOW_CALL_THRESHOLDS.get(name, SLOW_SOAP_THRESHOLD if kind == SlowCall.KIND_SOAP else SLOW_WEB_THRESHOLD)
+    breaches = []
+    if seconds > static:
+        # A zero threshold keeps every call; its severity is measured against a millisecond
+        breaches.append((round(seconds / max(static, 0.001), 2), static, SlowCall.REASON_THRESHOLD))
+    if p99 and seconds > max(p99, SLOW_CALL_FLOOR):
+        breaches.append((round(seconds / p99, 2), p99, SlowCall.REASON_P99))
+    return max(breaches) if breaches else None
+
+
+def http_pools(session) -> list:
+    """Connections held by a requests session's pools, per host."""
+    pools = []
+    for adapter in session.adapters.values():
+        manager = getattr(adapter, 'poolmanager', None)
+        if manager is None:
+            continue
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                'opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool else 0,
+                'maxsize': pool.pool.maxsize if pool.pool else 0,
+            })
+    return pools
+
+
+def pool_state(session=None) -> Dict:
+    # services.jobs imports the SOAP client, which imports this module
+    from services.jobs import pool_stats
+    state = {'jobs': pool_stats()}
+    if session is not None:
+        state['http'] = http_pools(session)
+    return state
+
+
+def record(kind: str, name: str, seconds: float, session=None, **fields) -> Optional[SlowCall]:
+    """
+    Save the call if it was slow. `fields` are SlowCall fields (status, user,
+    payloads, timings, ...); `session` is the requests session it went through.
+    """
+    breach = check(kind, name, seconds)
+    if breach is None:
+        return None
+    severity, threshold, reason = breach
+    user = fields.pop('user', None)
+    try:
+        slow = SlowCall.objects.create(
+            kind=kind, name=name[:255], duration=seconds, threshold=threshold, reason=reason, severity=severity,
+            user=user if user is not None and user.is_authenticated else None,
+            trace_id=tracing.current_trace_id(), pool_state=pool_state(session), **fields,
+        )
+        expired = SlowCall.objects.order_by('-created_at', '-id').values_list('id', flat=True)[SLOW_CALL_RETENTION:]
+        SlowCall.objects.filter(id__in=list(expired)).delete()
+    except Exception as e:
+        logger.error(f"Failed to store slow call {name}: {e}")
+        return None
+    logger.warning(f"Slow {kind} call {name}: {seconds:.2f}s, {severity:.1f}x its {reason} of {threshold:.2f}s")
+    return slow
@@ -3,6 +3,7 @@ import json
 from dataclasses import dataclass, asdict
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+import threading
 import time
 
 from django.conf import settings
@@ -10,34 +11,37 @@ from django.utils import timezone
 from django.core.serializers.json import DjangoJSONEncoder
 
 import zeep
+from lxml import etree
 from zeep import Client, Settings, xsd
 from zeep.transports import Transport
-from zeep.plugins import HistoryPlugin
 from zeep.helpers import serialize_object
 from requests import Session
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
 
-from core.models import SoapRequestLog
+from core.models import SlowCall, SoapRequestLog
 from services.decorators import require_soap_permission
+from services.validation import get_validator
+from services.results import parse_response, to_primitive
+from services.retry import Deadline, SOAP_DEADLINE, SOAP_TIMEOUT, call_with_retry, policy_for
+from services.hedging import HedgeStats, SOAP_HEDGING, hedged
+from services import metrics, payload_store, read_model, slow_calls, stale_cache, tracing
+# Re-exported: TenderInfo was defined here before moving to services.read_model
+from services.read_model import TenderInfo  # noqa: F401
 
 # Configuration (Could be moved to settings.py)
 WSDL_PATH = getattr(settings, 'SOAP_WSDL_PATH', 'service.wsdl')
-SOAP_TIMEOUT = getattr(settings, 'SOAP_TIMEOUT', 30)
-SOAP_RETRIES = getattr(settings, 'SOAP_RETRIES', 3)
+# Overrides the endpoint in the WSDL, e.g. to point at the soap_standin command during load tests
+SOAP_SERVICE_ADDRESS = getattr(settings, 'SOAP_SERVICE_ADDRESS', None)
+
+# Hardcoded credentials as per final deployment requirements
+SOAP_CREDENTIALS = {
+    'id_val': 'UAP',
+    'password': 'UAP!!009#',
+}
 
 logger = logging.getLogger(__name__)
 
 # --- Data Structures ---
 
-@dataclass
-class TenderInfo:
-    ref_name: str
-    ref_number: str
-    pe_name: Optional[str] = None
-    deadline_date: Optional[str] = None
-    # Add other fields as needed
-
 @dataclass
 class OperationResult:
     result_code: str
@@ -46,89 +50,203 @@ class OperationResult:
 
 # --- Client ---
 
+class PerThreadTimeoutTransport(Transport):
+    """
+    zeep Transport whose operation timeout can be overridden per thread, so the
+    attempts of a hedged call can each set their own without racing on one attribute.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+        self._default_operation_timeout = self._local.value
+
+    @property
+    def operation_timeout(self):
+        return getattr(self._local, 'value', self._default_operation_timeout)
+
+    @operation_timeout.setter
+    def operation_timeout(self, value):
+        self._local.value = value
+
+
 class SoapClient:
-    def __init__(self, wsdl_path: str = WSDL_PATH):
+    def __init__(self, wsdl_path: str = WSDL_PATH, deadline: Optional[Deadline] = None):
+        """
+        `deadline` is the caller's remaining time budget, shared by every call made
+        through this client. Without one, each call gets SOAP_DEADLINE seconds.
+        """
         self.wsdl_path = wsdl_path
-        self.history = HistoryPlugin()
+        self.deadline = deadline
+        # Set when the last lookup was answered from the last-known-good cache
+        self.staleness: Optional[stale_cache.Staleness] = None
         self.client = self._init_client()
 
     def _init_client(self) -> Client:
+        # Retries are handled per operation by services.retry, not by the HTTP adapter
         session = Session()
-        retry = Retry(
-            total=SOAP_RETRIES,
-            read=SOAP_RETRIES,
-            connect=SOAP_RETRIES,
-            backoff_factor=0.3,
-            status_forcelist=(500, 502, 504)
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-
-        transport = Transport(session=session, timeout=SOAP_TIMEOUT)
+
+        transport = PerThreadTimeoutTransport(session=session, timeout=SOAP_TIMEOUT)
         settings = Settings(strict=False, xml_huge_tree=True)
         
-        return Client(self.wsdl_path, transport=transport, settings=settings, plugins=[self.history])
+        client = Client(self.wsdl_path, transport=transport, settings=settings)
+        if SOAP_SERVICE_ADDRESS:
+            client._default_service = client.create_service(client.service._binding.name, SOAP_SERVICE_ADDRESS)
+        return client
 
-    def _log_request(self, operation: str, request_data: Dict, start_time: float, result=None, error=None, user=None):
-        duration = time.time() - start_time
+    def _log_request(self, operation: str, request_data: Dict, start_time: float, result=None, error=None, user=None,
+                     raw_reply: Optional[bytes] = None, hedge_stats: Optional[HedgeStats] = None,
+                     timings: Optional[Dict[str, float]] = None, envelope=None, cache_status: str = ''):
+        # A lookup answered from the last-known-good cache spent no time upstream
+        duration = 0.0 if cache_status else time.time() - start_time
         status = 'SUCCESS' if not error else 'FAILED'
-        
-        # Serialize payloads
-        # Serialize payloads
-        try:
-            req_payload = json.dumps(serialize_object(request_data), cls=DjangoJSONEncoder)
-        except Exception:
-            req_payload = str(request_data)
-        
-        # Capture RAW XML if available
-        try:
-            if self.history.last_sent:
-                req_payload = str(self.history.last_sent['envelope'])
-        except Exception:
-            pass
+        timings = {} if timings is None else timings
 
-        try:
-            res_payload = json.dumps(serialize_object(result), cls=DjangoJSONEncoder) if result else None
-        except Exception:
-            res_payload = str(result)
-            
-        # Capture RAW XML Response if available
-        try:
-            if self.history.last_received:
-                res_payload = str(self.history.last_received['envelope'])
-        except Exception:
-             pass
+        # Serialize payloads: the raw XML exchanged when there is some, JSON otherwise.
+        # `envelope` is the one built for this call; None when building it failed.
+        with metrics.timed(operation, 'log_serialize', timings):
+            req_payload = None
+            try:
+                if envelope is not None:
+                    req_payload = etree.tostring(envelope, encoding='unicode')
+            except Exception:
+                pass
+            if req_payload is None:
+                try:
+                    req_payload = json.dumps(serialize_object(request_data), cls=DjangoJSONEncoder)
+                except Exception:
+                    req_payload = str(request_data)
+
+            if raw_reply:
+                res_payload = raw_reply.decode('utf-8', errors='replace')
+            else:
+                try:
+                    res_payload = json.dumps(to_primitive(result), cls=DjangoJSONEncoder) if result else None
+                except Exception:
+                    res_payload = str(result)
 
         error_msg = str(error) if error else None
+        hedge_stats = hedge_stats or HedgeStats()
+        if not cache_status:
+            metrics.increment('soap_calls_total', operation=operation, status=status)
 
         # We assume usage inside a request context usually, implying request.user might be available differently.
         # But this is a backend service. User need to be passed or context var used.
         # For MVP, we stick to system logging or pass user in 'auth' dict if needed.
         # Here we just log.
         
+        log = None
         try:
-            SoapRequestLog.objects.create(
-                user=user,
-                operation=operation,
-                request_payload=req_payload,
-                response_payload=res_payload,
-                status=status,
-                duration=duration,
-                error_message=error_msg
-            )
+            with metrics.timed(operation, 'log_write'):
+                # Identical envelopes are stored once (credentials masked), the row points at them
+                log = SoapRequestLog.objects.create(
+                    user=user,
+                    operation=operation,
+                    request_blob=payload_store.store(req_payload, credentials=True),
+                    response_blob=payload_store.store(res_payload),
+                    status=status,
+                    duration=duration,
+                    error_message=error_msg,
+                    hedges=hedge_stats.hedges,
+                    hedge_wins=hedge_stats.hedge_wins,
+                    timings=timings,
+                    trace_id=tracing.current_trace_id(),
+                    cache_status=cache_status,
+                )
         except Exception as e:
             logger.error(f"Failed to write SOAP log: {e}")
+        if cache_status:
+            # Nothing went to the hub: no call to count, time or keep as slow
+            return
+        slow_calls.record(SlowCall.KIND_SOAP, operation, duration, session=self.client.transport.session,
+                          status=status, user=user, log=log, request_payload=req_payload or '',
+                          response_payload=res_payload, error_message=error_msg, timings=timings)
+        # Unlike `duration`, this includes writing the log
+        metrics.observe(operation, 'total', time.time() - start_time)
+
+    def call_operation(self, operation_name: str, user=None, use_cache: bool = True, **kwargs) -> Any:
+        """
+        Validate and send `operation_name`. Lookups in stale_cache.SOAP_STALE_OPERATIONS
+        may be answered from the last-known-good cache unless `use_cache` is False.
+        """
+        self.staleness = None
+        timings = {}
+
+        # Guardrail: reject payloads the schema would not accept before anything is sent
+        with metrics.timed(operation_name, 'validate', timings):
+            field_errors = get_validator(self.client, self.wsdl_path, operation_name).validate(kwargs)
+        if field_errors:
+            logger.info(f"Rejected {operation_name} payload locally: {field_errors}")
+            return {
+                "success": False,
+                "error": "Validation failed",
+                "user_message": "Some fields are missing or invalid. Please correct them and try again.",
+                "field_errors": field_errors,
+            }
 
-    def call_operation(self, operation_name: str, user=None, **kwargs) -> Any:
-        service_method = getattr(self.client.service, operation_name)
+        if use_cache and operation_name in stale_cache.SOAP_STALE_OPERATIONS:
+            start_time = time.time()
+            fetched = []
+
+            def fetch():
+                fetched.append(True)
+                return self._call_upstream(operation_name, user, kwargs, self.deadline, timings)
+
+            result, self.staleness = stale_cache.lookup(
+                operation_name, kwargs, fetch=fetch,
+                # Refreshes outlive the caller, so they get a budget of their own
+                background_fetch=lambda: self._call_upstream(operation_name, user, kwargs, Deadline(SOAP_DEADLINE)),
+            )
+            # Calls to the hub log themselves; an answer served from the cache is logged here so every lookup leaves a row
+            if self.staleness or not fetched:
+                self._log_request(operation_name, kwargs, start_time, result=result, user=user, timings=timings,
+                                  cache_status=SoapRequestLog.CACHE_STALE if self.staleness else SoapRequestLog.CACHE_FRESH)
+            return result
+        return self._call_upstream(operation_name, user, kwargs, self.deadline, timings)
+
+    def _call_upstream(self, operation_name: str, user, kwargs: Dict, deadline: Optional[Deadline],
+                       timings: Optional[Dict[str, float]] = None) -> Any:
+        """Send one call to the hub. `timings` collects per-phase milliseconds for the log."""
+        timings = {} if timings is None else timings
+        service = self.client.service
         start_time = time.time()
+        raw_reply = envelope = None
+        deadline = deadline or Deadline(SOAP_DEADLINE)
+        policy = policy_for(operation_name)
+        hedge_stats = HedgeStats()
+
         try:
-            response = service_method(**kwargs)
-            self._log_request(operation_name, kwargs, start_time, result=response, user=user)
+            # The envelope is built once; retries and hedges resend the same one
+            with metrics.timed(operation_name, 'serialize', timings):
+                envelope, http_headers = service._binding._create(
+                    operation_name, (), kwargs, client=self.client, options=service._binding_options)
+
+            def attempt(timeout):
+                # The reply is decoded below into slotted result models rather than zeep object trees
+                address = service._binding_options['address']
+                with tracing.span('soap.http_attempt', tracing.SPAN_KIND_CLIENT, **{'url.full': address, 'soap.timeout': timeout}) as span, \
+                        self.client.transport.settings(timeout=timeout):
+                    response = self.client.transport.post_xml(address, envelope, http_headers)
+                    if span:
+                        span.set(**{'http.response.status_code': response.status_code})
+                    return response
+
+            if SOAP_HEDGING and policy.hedge:
+                attempt = hedged(attempt, operation_name, hedge_stats, deadline)
+
+            with metrics.timed(operation_name, 'http', timings):
+                http_response = call_with_retry(attempt, policy, deadline, operation=operation_name)
+            raw_reply = http_response.content
+            with metrics.timed(operation_name, 'parse', timings):
+                response = parse_response(operation_name, raw_reply, http_response.status_code)
+            with metrics.timed(operation_name, 'sync', timings):
+                read_model.sync_response(operation_name, response)
+            self._log_request(operation_name, kwargs, start_time, result=response, user=user, raw_reply=raw_reply,
+                              hedge_stats=hedge_stats, timings=timings, envelope=envelope)
             return response
         except Exception as e:
-            self._log_request(operation_name, kwargs, start_time, error=e, user=user)
+            self._log_request(operation_name, kwargs, start_time, error=e, user=user, raw_reply=raw_reply,
+                              hedge_stats=hedge_stats, timings=timings, envelope=envelope)
             logger.error(f"SOAP Error in {operation_name}: {e}")
             # Guardrail: Return safe error dict instead of crashing
             return {
@@ -0,0 +1,149 @@
+"""
+Last-known-good cache for tender and contract lookups.
+
+Answers for SOAP_STALE_OPERATIONS are kept in the 'soap' cache. A cached answer
+younger than SOAP_STALE_FRESH_SECONDS is served as is. Up to
+SOAP_STALE_WHILE_REVALIDATE it is served immediately, marked stale, while a
+background refresh fetches a new one. When the hub fails, an answer up to
+SOAP_STALE_IF_ERROR old is served instead of the error. Beyond that the call
+goes to the hub as usual.
+
+Only replies with a success result code are kept, and entries are keyed on the
+whole request, credentials included: a cached answer is served only to a caller
+who sent the same credentials the hub accepted for it.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils.crypto import salted_hmac
+
+from services import metrics, tracing
+from services.read_model import SUCCESS_CODE
+
+SOAP_STALE_OPERATIONS = getattr(settings, 'SOAP_STALE_OPERATIONS', ('getTenderInformation', 'getContractInformation'))
+SOAP_STALE_FRESH_SECONDS = getattr(settings, 'SOAP_STALE_FRESH_SECONDS', 60)
+SOAP_STALE_WHILE_REVALIDATE = getattr(settings, 'SOAP_STALE_WHILE_REVALIDATE', 3600)
+SOAP_STALE_IF_ERROR = getattr(settings, 'SOAP_STALE_IF_ERROR', 86400)
+SOAP_STALE_CACHE_ALIAS = getattr(settings, 'SOAP_STALE_CACHE_ALIAS', 'soap')
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+@dataclass
+class Staleness:
+    """Why and how old the answer served for a lookup is."""
+    REVALIDATING = 'revalidating'
+    UPSTREAM_ERROR = 'upstream_error'
+
+    fetched_at: float
+    reason: str
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+    @property
+    def fetched_at_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.fetched_at, tz=timezone.utc)
+
+
+def get_cache():
+    return caches[SOAP_STALE_CACHE_ALIAS]
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='soap-refresh')
+    return _executor
+
+
+def cache_key(operation: str, kwargs: dict) -> str:
+    # Keyed with SECRET_KEY so the cache files do not hold an unsalted hash of the password
+    request = json.dumps(kwargs, sort_keys=True, default=str)
+    digest = salted_hmac('services.stale_cache', request, algorithm='sha256').hexdigest()
+    return f"soap-lkg:{operation}:{digest}"
+
+
+def is_good(result) -> bool:
+    # Guardrail dicts (errors, validation) and not-found/error result codes are never cached
+    return result is not None and not isinstance(result, dict) and getattr(result, 'resultCode', None) == SUCCESS_CODE
+
+
+def store(key: str, result):
+    get_cache().set(key, {'result': result, 'fetched_at': time.time()},
+                    timeout=max(SOAP_STALE_WHILE_REVALIDATE, SOAP_STALE_IF_ERROR))
+
+
+def _refresh(key: str, fetch: Callable):
+    close_old_connections()
+    try:
+        result = fetch()
+        if is_good(result):
+            store(key, result)
+    except Exception as e:
+        logger.error(f"Background refresh of {key} failed: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        close_old_connections()
+
+
+def refresh_in_background(key: str, fetch: Callable) -> bool:
+    """Start one refresh per key; returns False if one is already running."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+    if getattr(settings, 'SOAP_JOBS_EAGER', False):
+        _refresh(key, fetch)
+    else:
+        get_executor().submit(tracing.propagate(_refresh), key, fetch)
+    return True
+
+
+def lookup(operation: str, kwargs: dict, fetch: Callable, background_fetch: Callable):
+    """
+    Serve `operation` from the last-known-good cache where allowed.
+    `fetch()` calls the hub in the foreground; `background_fetch()` does the same
+    with its own time budget for refreshes. Returns (result, Staleness or None).
+    """
+    key = cache_key(operation, kwargs)
+    entry = get_cache().get(key)
+    age = time.time() - entry['fetched_at'] if entry else None
+
+    if entry and age < SOAP_STALE_FRESH_SECONDS:
+        metrics.increment('soap_cache_events_total', operation=operation, event='fresh')
+        return entry['result'], None
+    if entry and age < SOAP_STALE_WHILE_REVALIDATE:
+        metrics.increment('soap_cache_events_total', operation=operation, event='stale')
+        refresh_in_background(key, background_fetch)
+        return entry['result'], Staleness(entry['fetched_at'], Staleness.REVALIDATING)
+
+    metrics.increment('soap_cache_events_total', operation=operation, event='miss')
+    result = fetch()
+    if is_good(result):
+        store(key, result)
+        return result, None
+    # Only a failed call falls back; a reply saying the record is gone is the answer
+    if entry and age < SOAP_STALE_IF_ERROR and isinstance(result, dict):
+        metrics.increment('soap_cache_events_total', operation=operation, event='error_fallback')
+        logger.warning(f"Serving {operation} from cache ({int(age)}s old) after upstream error")
+        return entry['result'], Staleness(entry['fetched_at'], Staleness.UPSTREAM_ERROR)
+    return result, None
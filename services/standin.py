@@ -0,0 +1,73 @@
+"""
+Local stand-in for the hub, for load tests and offline demos.
+
+Answers every SOAP request with the matching reply from services.samples after
+a configurable delay, and fails a share of requests with a SOAP fault. Point
+the application at it with SOAP_SERVICE_ADDRESS.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services import samples
+
+logger = logging.getLogger(__name__)
+
+# The first element in the SOAP body is named after the operation
+_OPERATION = re.compile(rb'<(?:[\w.-]+:)?Body[^>]*>\s*<(?:[\w.-]+:)?(\w+)')
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.05, jitter=0.0, error_rate=0.0, contracts=1, tenders=1):
+        super().__init__(address, StandinHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.replies = {
+            'getContractInformation': samples.contract_response(contracts),
+            'getTenderInformation': samples.tender_response(tenders),
+        }
+        self.requests = 0
+        self.faults = 0
+        self._lock = threading.Lock()
+
+    def reply_for(self, operation):
+        if operation not in self.replies:
+            self.replies[operation] = samples.result_response(operation)
+        return self.replies[operation]
+
+    def count(self, fault):
+        with self._lock:
+            self.requests += 1
+            self.faults += fault
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        match = _OPERATION.search(body)
+        time.sleep(max(0.0, random.gauss(server.latency, server.jitter)))
+
+        fault = match is None or random.random() < server.error_rate
+        if fault:
+            status, content = 500, samples.fault_response('Service unavailable', 'soapenv:Server')
+        else:
+            status, content = 200, server.reply_for(match.group(1).decode())
+        server.count(fault)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
@@ -0,0 +1,972 @@
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+import openpyxl
+import requests
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from zeep.exceptions import Fault
+
+from core.models import BulkSubmission, Contract, PayloadBlob, Role, SlowCall, SoapJob, SoapRequestLog, Tender
+from services import benchmarks, bulk, fastjson, hedging, loadtest, log_archive, log_partitions, metrics, payload_store, read_model, samples, slow_calls, soap_client, stale_cache, tracing
+from services.registry import OperationRegistry
+from services.results import ContractInfoResponse, parse_response, to_primitive
+from services.retry import READ_POLICY, Deadline, DeadlineExceeded, RetryPolicy, call_with_retry, policy_for
+from services.read_model import TenderInfo
+from services.soap_client import SoapClient
+from services.standin import StandinServer
+from services.validation import get_validator
+
+
+class OperationRegistryTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry = OperationRegistry.from_wsdl('service.wsdl')
+
+    def test_all_operations_registered(self):
+        self.assertEqual(set(self.registry.operation_names), {
+            'getTenderInformation', 'sendAdvancePaymentInformation', 'sendBidSecurityInformation',
+            'getContractInformation', 'sendCreditLineFacility', 'sendPerformSecurityInformation',
+        })
+        self.assertEqual(self.registry.get('sendCreditLineFacility').method_name, 'send_credit_line_facility')
+
+    def test_credentials_are_not_form_fields(self):
+        for spec in self.registry:
+            self.assertNotIn('id', spec.field_names)
+            self.assertNotIn('password', spec.field_names)
+
+    def test_payload_builder_wraps_unbounded_elements(self):
+        spec = self.registry.get('sendPerformSecurityInformation')
+        data = QueryDict(mutable=True)
+        data['issueBankInfo__bankName'] = 'Bank of Kigali'
+        data.setlist('contractInfo__lotInfo__lotName', ['Lot A', 'Lot B'])
+        data.setlist('contractInfo__lotInfo__lotNumber', ['1', '2'])
+        self.assertEqual(spec.client_kwargs(data), {'perform_info': {
+            'issueBankInfo': {'bankName': 'Bank of Kigali'},
+            'contractInfo': {'lotInfo': [
+                {'lotName': 'Lot A', 'lotNumber': '1'},
+                {'lotName': 'Lot B', 'lotNumber': '2'},
+            ]},
+        }})
+
+    def test_get_operations_map_to_client_arguments(self):
+        spec = self.registry.get('getContractInformation')
+        self.assertEqual(spec.field_names, ['contractNumber', 'contractSerialNumber'])
+        self.assertEqual(spec.client_kwargs({'contractNumber': 'C-1', 'contractSerialNumber': '7'}),
+                         {'contract_number': 'C-1', 'serial_number': '7'})
+
+    def test_disk_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'registry.json')
+            OperationRegistry.load('service.wsdl', cache_path)
+            with open(cache_path) as fh:
+                self.assertEqual(len(json.load(fh)['operations']), 6)
+            cached = OperationRegistry.load('service.wsdl', cache_path)
+        spec = cached.get('sendAdvancePaymentInformation')
+        self.assertEqual(spec.fields, self.registry.get('sendAdvancePaymentInformation').fields)
+        self.assertEqual(spec.build_payload({'advancePaymentInfo__amount': '10'}), {'advancePaymentInfo': {'amount': '10'}})
+
+
+class PayloadValidationTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.soap_client = SoapClient()
+
+    def validate(self, operation, payload):
+        return get_validator(self.soap_client.client, self.soap_client.wsdl_path, operation).validate(payload)
+
+    def test_valid_payload(self):
+        payload = {'advancePaymentInfoRequest': {
+            'id': 'UAP', 'password': 'secret', 'contractName': 'Road works',
+            'advancePaymentInfo': {'amount': '1500000.00', 'expireDate': '2026-12-31', 'unit': 'RWF'},
+        }}
+        self.assertEqual(self.validate('sendAdvancePaymentInformation', payload), {})
+
+    def test_errors_use_form_field_names(self):
+        payload = {'advancePaymentInfoRequest': {
+            'advancePaymentInfo': {'amount': '1,500,000', 'expireDate': '31/12/2026', 'colour': 'red'},
+        }}
+        errors = self.validate('sendAdvancePaymentInformation', payload)
+        self.assertEqual(set(errors), {
+            'advancePaymentInfo__amount', 'advancePaymentInfo__expireDate', 'advancePaymentInfo__colour',
+        })
+
+    def test_list_items_are_validated(self):
+        payload = {'performanceSecurityInfoRequest': {
+            'contractInfo': {'lotInfo': [{'lotName': 'A'}, {'lotName': {'nested': 'x'}}]},
+        }}
+        errors = self.validate('sendPerformSecurityInformation', payload)
+        self.assertEqual(list(errors), ['contractInfo__lotInfo__lotName'])
+        self.assertIn('item 2', errors['contractInfo__lotInfo__lotName'])
+
+    def test_required_fields(self):
+        errors = self.validate('getTenderInformation', {'tenderInfoRequest': {'tenderRefName': 'Desks'}})
+        self.assertEqual(errors, {'tenderRefNumber': 'This field is required.'})
+
+    def test_invalid_payload_is_not_sent(self):
+        with patch.object(SoapClient, '_log_request') as log_request:
+            result = self.soap_client.call_operation(
+                'sendBidSecurityInformation',
+                bidSecurityInfoRequest={'bidSecurityInfo': {'startDate': '2026-02-30'}},
+            )
+        self.assertFalse(result['success'])
+        self.assertIn('bidSecurityInfo__startDate', result['field_errors'])
+        log_request.assert_not_called()
+
+
+class FakeReply:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/xml; charset=utf-8'}
+        self.encoding = 'utf-8'
+
+
+class ResultModelTest(TestCase):
+    def test_contract_response_is_typed(self):
+        result = parse_response('getContractInformation', samples.contract_response(contracts=2, lots=3))
+        self.assertIsInstance(result, ContractInfoResponse)
+        self.assertEqual(result.resultCode, '0000')
+        self.assertEqual(len(result.contractInfo), 2)
+        self.assertEqual(result.contractInfo[1].lotInfo[2].lotNumber, '3')
+        self.assertFalse(hasattr(result.contractInfo[0], '__dict__'))
+
+    def test_to_primitive_matches_zeep_shape(self):
+        data = to_primitive(parse_response('getTenderInformation', samples.tender_response()))
+        tender = data['tenderNotificationInfo'][0]
+        self.assertEqual(tender['tenderRefNumber'], 'T-000000')
+        self.assertEqual(tender['tenderLOTInfo'][0]['unit'], 'RWF')
+
+    def test_fault_raises(self):
+        with self.assertRaises(Fault):
+            parse_response('getTenderInformation', samples.fault_response('Invalid credentials'), 500)
+
+    def test_call_operation_returns_model_and_logs_raw_reply(self):
+        soap_client = SoapClient()
+        reply = samples.result_response('sendCreditLineFacility', message='Received')
+        with patch.object(soap_client.client.transport, 'post_xml', return_value=FakeReply(reply)):
+            result = soap_client.call_operation(
+                'sendCreditLineFacility', creditLineFacilityRequest={'tenderRefNumber': 'T-1'}
+            )
+        self.assertEqual(result.resultMessage, 'Received')
+        log = SoapRequestLog.objects.get()
+        self.assertEqual(log.status, 'SUCCESS')
+        self.assertIn('Received', log.response_content)
+        self.assertIn('>T-1</', log.request_content)
+
+    def test_failed_envelope_build_logs_its_own_arguments(self):
+        soap_client = SoapClient()
+        reply = samples.result_response('sendCreditLineFacility', message='Received')
+        with patch.object(soap_client.client.transport, 'post_xml', return_value=FakeReply(reply)):
+            soap_client.call_operation('sendCreditLineFacility', creditLineFacilityRequest={'tenderRefNumber': 'T-1'})
+        with patch.object(soap_client.client.service._binding, '_create', side_effect=TypeError('bad argument')):
+            soap_client.call_operation('sendCreditLineFacility', creditLineFacilityRequest={'tenderRefNumber': 'T-2'})
+        log = SoapRequestLog.objects.latest('id')
+        self.assertEqual(log.status, 'FAILED')
+        self.assertIn('T-2', log.request_content)
+        self.assertNotIn('T-1', log.request_content)
+
+
+class FastJsonTest(SimpleTestCase):
+    def test_models_and_special_types(self):
+        result = parse_response('getContractInformation', samples.contract_response(contracts=2))
+        data = json.loads(fastjson.dumps({'result': result, 'amount': Decimal('1500000.10'),
+                                          'at': datetime.date(2026, 1, 15), 1: 'non-str key'}))
+        self.assertEqual(data['result'], result.to_dict())
+        self.assertEqual(data['amount'], '1500000.10')
+        self.assertEqual(data['at'], '2026-01-15')
+        self.assertEqual(data['1'], 'non-str key')
+
+    def test_stdlib_fallback_matches(self):
+        result = parse_response('getTenderInformation', samples.tender_response())
+        with patch.object(fastjson, 'orjson', None):
+            fallback = fastjson.dumps(result, indent=True)
+        self.assertEqual(json.loads(fallback), json.loads(fastjson.dumps(result)))
+
+
+class RetryPolicyTest(TestCase):
+    def flaky(self, *outcomes):
+        calls = []
+
+        def attempt(timeout):
+            calls.append(timeout)
+            outcome = outcomes[len(calls) - 1]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return FakeReply(b'', status_code=outcome)
+        return attempt, calls
+
+    @patch('services.retry.time.sleep')
+    def test_reads_retry_but_writes_only_before_sending(self, sleep):
+        attempt, calls = self.flaky(requests.ConnectionError(), 503, 200)
+        response = call_with_retry(attempt, policy_for('getTenderInformation'), Deadline(10))
+        self.assertEqual((response.status_code, len(calls)), (200, 3))
+
+        # A gateway status or a read timeout may follow a write the hub went on to process
+        attempt, calls = self.flaky(503, 200)
+        response = call_with_retry(attempt, policy_for('sendCreditLineFacility'), Deadline(10))
+        self.assertEqual((response.status_code, len(calls)), (503, 1))
+        attempt, calls = self.flaky(requests.ReadTimeout(), 200)
+        with self.assertRaises(requests.ReadTimeout):
+            call_with_retry(attempt, policy_for('sendCreditLineFacility'), Deadline(10))
+        self.assertEqual(len(calls), 1)
+
+        refused = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused')))
+        attempt, calls = self.flaky(requests.ConnectTimeout(), refused, 200)
+        response = call_with_retry(attempt, policy_for('sendCreditLineFacility'), Deadline(10))
+        self.assertEqual((response.status_code, len(calls)), (200, 3))
+
+    def test_soap_faults_are_not_retried(self):
+        attempt, calls = self.flaky(500, 200)
+        self.assertEqual(call_with_retry(attempt, policy_for('getTenderInformation'), Deadline(10)).status_code, 500)
+
+    def test_deadline_caps_timeouts_and_backoff(self):
+        deadline = Deadline(0.5)
+        connect, read = deadline.timeout()
+        self.assertLessEqual(read, 0.5)
+        with self.assertRaises(DeadlineExceeded):
+            call_with_retry(lambda timeout: None, READ_POLICY, Deadline(0))
+        # A backoff longer than what is left ends the retries instead of sleeping past the deadline
+        attempt, calls = self.flaky(requests.ConnectionError(), 200)
+        slow = RetryPolicy(backoff_base=60, backoff_max=60)
+        with patch('services.retry.random.uniform', return_value=30), self.assertRaises(requests.ConnectionError):
+            call_with_retry(attempt, slow, Deadline(1))
+        self.assertEqual(len(calls), 1)
+
+    @patch('services.retry.time.sleep')
+    def test_client_retries_write_that_never_connected(self, sleep):
+        soap_client = SoapClient(deadline=Deadline(10))
+        reply = FakeReply(samples.result_response('sendCreditLineFacility'))
+        with patch.object(soap_client.client.transport, 'post_xml',
+                          side_effect=[requests.ConnectTimeout(), reply]) as post_xml:
+            result = soap_client.call_operation(
+                'sendCreditLineFacility', creditLineFacilityRequest={'tenderRefNumber': 'T-1'}
+            )
+        self.assertEqual(result.resultCode, '0000')
+        self.assertEqual(post_xml.call_count, 2)
+        with patch.object(soap_client.client.transport, 'post_xml',
+                          side_effect=[requests.ConnectionError('Connection aborted'), reply]) as post_xml:
+            result = soap_client.call_operation(
+                'sendCreditLineFacility', creditLineFacilityRequest={'tenderRefNumber': 'T-1'}
+            )
+        self.assertIs(result['success'], False)
+        self.assertEqual(post_xml.call_count, 1)
+
+
+class HedgingTest(TestCase):
+    def setUp(self):
+        stale_cache.get_cache().clear()
+        for name, value in (('latency', hedging.LatencyTracker()), ('budget', hedging.HedgeBudget(percent=10, burst=1))):
+            patcher = patch.object(hedging, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for _ in range(hedging.SOAP_HEDGE_MIN_SAMPLES):
+            hedging.latency.record('getTenderInformation', 0.01)
+
+    def stalled_then_fast(self, stall):
+        """First call blocks until released; later calls answer immediately."""
+        release = threading.Event()
+        calls = []
+
+        def attempt(timeout):
+            calls.append(timeout)
+            if len(calls) == 1:
+                release.wait(stall)
+                return FakeReply(b'primary')
+            return FakeReply(b'hedge')
+        return attempt, calls, release
+
+    def test_slow_read_is_hedged_and_hedge_wins(self):
+        attempt, calls, release = self.stalled_then_fast(stall=5)
+        stats = hedging.HedgeStats()
+        response = hedging.hedged(attempt, 'getTenderInformation', stats, Deadline(5))((1, 5))
+        release.set()
+        self.assertEqual(response.content, b'hedge')
+        self.assertEqual((stats.hedges, stats.hedge_wins, len(calls)), (1, 1, 2))
+
+    def test_hedge_gets_only_the_time_left(self):
+        attempt, calls, release = self.stalled_then_fast(stall=5)
+        threads = []
+        wrapped = lambda timeout: threads.append(threading.current_thread().name) or attempt(timeout)
+        deadline = Deadline(2)
+        timeout = deadline.timeout()
+        hedging.hedged(wrapped, 'getTenderInformation', hedging.HedgeStats(), deadline)(timeout)
+        release.set()
+        self.assertEqual(calls[0], timeout)
+        self.assertLess(max(calls[1]), 2)
+        # Only the hedge runs in the pool; the primary never queues behind other hedges
+        self.assertEqual([name.split('_')[0] for name in threads], ['soap-primary', 'soap-hedge'])
+
+    def test_stalled_hedge_does_not_outlive_the_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        deadline = Deadline(0.3)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            hedging.hedged(lambda timeout: release.wait(5), 'getTenderInformation', hedging.HedgeStats(), deadline)((1, 5))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_budget_caps_hedges(self):
+        stats = hedging.HedgeStats()
+        for _ in range(2):
+            attempt, calls, release = self.stalled_then_fast(stall=0.2)
+            hedging.hedged(attempt, 'getTenderInformation', stats, Deadline(5))((1, 5))
+            release.set()
+        # The one-token bucket refills at 10% per request, so only the first call hedges
+        self.assertEqual(stats.hedges, 1)
+
+    def test_no_hedging_without_latency_history(self):
+        attempt, calls, release = self.stalled_then_fast(stall=0.2)
+        stats = hedging.HedgeStats()
+        response = hedging.hedged(attempt, 'getContractInformation', stats, Deadline(5))((1, 5))
+        self.assertEqual((response.content, stats.hedges), (b'primary', 0))
+
+    def test_hedge_counts_are_logged(self):
+        soap_client = SoapClient()
+        replies = [FakeReply(samples.tender_response()), FakeReply(samples.tender_response())]
+        release = threading.Event()
+
+        def post_xml(*args, **kwargs):
+            if len(replies) == 2:
+                reply = replies.pop(0)
+                release.wait(5)
+                return reply
+            return replies.pop(0)
+
+        with patch('services.soap_client.SOAP_HEDGING', True), \
+                patch.object(soap_client.client.transport, 'post_xml', side_effect=post_xml):
+            result = soap_client.call_operation(
+                'getTenderInformation', tenderInfoRequest={'tenderRefName': 'Desks', 'tenderRefNumber': 'T-1'}
+            )
+        release.set()
+        self.assertEqual(result.resultCode, '0000')
+        log = SoapRequestLog.objects.get()
+        self.assertEqual((log.hedges, log.hedge_wins), (1, 1))
+
+
+@override_settings(SOAP_JOBS_EAGER=True)
+class StaleCacheTest(TestCase):
+    request = {'contractInfoRequest': {'id': 'UAP', 'password': 'secret', 'contractNumber': 'C-000000',
+                                       'contractSerialNumber': '0'}}
+
+    def setUp(self):
+        stale_cache.get_cache().clear()
+        self.soap_client = SoapClient()
+
+    def call(self, *replies):
+        with patch.object(self.soap_client.client.transport, 'post_xml', side_effect=list(replies)) as post_xml:
+            result = self.soap_client.call_operation('getContractInformation', **self.request)
+        return result, post_xml.call_count
+
+    def age_cache(self, seconds):
+        key = stale_cache.cache_key('getContractInformation', self.request)
+        entry = stale_cache.get_cache().get(key)
+        entry['fetched_at'] -= seconds
+        stale_cache.get_cache().set(key, entry)
+
+    def test_fresh_answer_is_served_without_calling_hub(self):
+        self.call(FakeReply(samples.contract_response()))
+        result, calls = self.call()
+        self.assertEqual((calls, self.soap_client.staleness), (0, None))
+        self.assertEqual(result.contractInfo[0].contractNumber, 'C-000000')
+        # The cached answer is still on record, with no time spent upstream
+        upstream, cached = SoapRequestLog.objects.order_by('id')
+        self.assertEqual((upstream.cache_status, cached.cache_status), ('', SoapRequestLog.CACHE_FRESH))
+        self.assertEqual((cached.status, cached.duration), ('SUCCESS', 0.0))
+        self.assertIn('C-000000', cached.response_content)
+        self.assertNotIn('secret', cached.request_content)
+
+    def test_stale_answer_is_served_while_refreshing(self):
+        self.call(FakeReply(samples.contract_response(contracts=1)))
+        self.age_cache(stale_cache.SOAP_STALE_FRESH_SECONDS + 1)
+        result, calls = self.call(FakeReply(samples.contract_response(contracts=2)))
+        # The stale answer is returned; the (eager) refresh stores the new one
+        self.assertEqual(len(result.contractInfo), 1)
+        self.assertEqual(self.soap_client.staleness.reason, stale_cache.Staleness.REVALIDATING)
+        self.assertEqual(calls, 1)
+        result, _ = self.call()
+        self.assertEqual(len(result.contractInfo), 2)
+        # Initial fetch, (eager) refresh, the stale answer it was started for, fresh answer
+        self.assertEqual(list(SoapRequestLog.objects.order_by('id').values_list('cache_status', flat=True)),
+                         ['', '', SoapRequestLog.CACHE_STALE, SoapRequestLog.CACHE_FRESH])
+
+    def test_stale_answer_is_served_when_hub_fails(self):
+        self.call(FakeReply(samples.contract_response()))
+        self.age_cache(stale_cache.SOAP_STALE_WHILE_REVALIDATE + 1)
+        result, _ = self.call(FakeReply(samples.fault_response('Service unavailable'), status_code=500))
+        self.assertEqual(result.resultCode, '0000')
+        self.assertEqual(self.soap_client.staleness.reason, stale_cache.Staleness.UPSTREAM_ERROR)
+        # The failed call and the stale answer served in its place are both on record
+        self.assertEqual(list(SoapRequestLog.objects.order_by('-id').values_list('status', 'cache_status')[:2]),
+                         [('SUCCESS', SoapRequestLog.CACHE_STALE), ('FAILED', '')])
+
+        self.age_cache(stale_cache.SOAP_STALE_IF_ERROR)
+        result, _ = self.call(FakeReply(samples.fault_response('Service unavailable'), status_code=500))
+        self.assertFalse(result['success'])
+
+    def test_other_credentials_do_not_share_the_answer(self):
+        self.call(FakeReply(samples.contract_response()))
+        self.request = {'contractInfoRequest': dict(self.request['contractInfoRequest'], password='wrong')}
+        result, calls = self.call(FakeReply(samples.fault_response('Invalid credentials'), status_code=500))
+        self.assertEqual(calls, 1)
+        self.assertFalse(result['success'])
+        self.assertIsNone(self.soap_client.staleness)
+
+    def test_unsuccessful_replies_are_not_kept(self):
+        self.call(FakeReply(samples.result_response('getContractInformation', code='1001', message='Not found')))
+        self.assertIsNone(stale_cache.get_cache().get(stale_cache.cache_key('getContractInformation', self.request)))
+        _, calls = self.call(FakeReply(samples.contract_response()))
+        self.assertEqual(calls, 1)
+        # Once the hub no longer knows the contract, the old answer is not served in its place
+        self.age_cache(stale_cache.SOAP_STALE_WHILE_REVALIDATE + 1)
+        result, _ = self.call(FakeReply(samples.result_response('getContractInformation', code='1001', message='Not found')))
+        self.assertEqual((result.resultCode, self.soap_client.staleness), ('1001', None))
+
+
+@override_settings(SOAP_JOBS_EAGER=True)
+class BulkSubmissionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('bulk', 'bulk@example.com', 'password')
+
+    def workbook(self, rows):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['bidSecurityInfo__securityNumber', 'Security Name', 'bidSecurityInfo__amount',
+                      'bidSecurityInfo__startDate', 'Notes'])
+        for row in rows:
+            sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    def run_bulk(self, content, file_name='guarantees.xlsx'):
+        submission = BulkSubmission.objects.create(
+            user=self.user, operation='sendBidSecurityInformation', file_name=file_name, source=content)
+        reply = FakeReply(samples.result_response('sendBidSecurityInformation', message='Received'))
+        with patch('services.soap_client.Transport.post_xml', return_value=reply):
+            bulk.submit_bulk_submission(submission, {'id_val': 'UAP', 'password': 'secret'})
+        return submission
+
+    def test_rows_run_and_results_are_appended(self):
+        rows = [(f'BS-{n}', 'Bid security', 1500000 + n, datetime.date(2026, 1, 15), 'x') for n in range(30)]
+        rows.append(('BS-bad', 'Bid security', 'not a number', '2026-01-15', None))
+        submission = self.run_bulk(self.workbook(rows))
+
+        self.assertEqual(submission.status, SoapJob.STATUS_SUCCESS)
+        self.assertEqual((submission.total_rows, submission.processed_rows), (31, 31))
+        self.assertEqual((submission.succeeded_rows, submission.failed_rows), (30, 1))
+        self.assertEqual(SoapRequestLog.objects.count(), 30)  # the invalid row is rejected locally
+
+        sheet = openpyxl.load_workbook(io.BytesIO(bytes(submission.result)), read_only=True).active
+        result = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(result[0][-3:], bulk.RESULT_COLUMNS)
+        self.assertEqual(result[1][:3], ('BS-0', 'Bid security', 1500000))
+        self.assertEqual(result[1][5:7], ('0000', 'Received'))
+        self.assertEqual(result[31][5], 'ERROR')
+        self.assertIn('bidSecurityInfo__amount', result[31][6])
+
+    def test_cells_are_converted_to_form_values(self):
+        data = bulk.row_data((datetime.datetime(2026, 1, 15), 250000.0, ' Lot 1; Lot 2 ', None),
+                             {0: 'startDate', 1: 'amount', 2: 'lotName', 3: 'unit'}, many={'lotName'})
+        self.assertEqual(data, {'startDate': '2026-01-15', 'amount': '250000', 'lotName': ['Lot 1', 'Lot 2']})
+
+    def test_csv_round_trip_and_unknown_headers(self):
+        submission = self.run_bulk(b'bidSecurityInfo__securityNumber,bidSecurityInfo__amount\nBS-1,100\n', 'g.csv')
+        self.assertTrue(bytes(submission.result).decode().splitlines()[1].startswith('BS-1,100,0000,Received,'))
+
+        submission = self.run_bulk(b'foo,bar\n1,2\n', 'g.csv')
+        self.assertEqual(submission.status, SoapJob.STATUS_FAILED)
+        self.assertIn('No column matches', submission.error_message)
+
+    def test_oversized_files_are_rejected_while_reading(self):
+        rows = [(f'BS-{n}', 'Bid security', 100) for n in range(6)]
+        consumed = []
+        real_iter_rows = ReadOnlyWorksheet.iter_rows
+
+        def iter_rows(sheet, *args, **kwargs):
+            for row in real_iter_rows(sheet, *args, **kwargs):
+                consumed.append(row)
+                yield row
+
+        with patch('services.bulk.SOAP_BULK_MAX_ROWS', 3), \
+                patch.object(ReadOnlyWorksheet, 'iter_rows', iter_rows), \
+                patch.object(openpyxl.Workbook, 'close', autospec=True, side_effect=openpyxl.Workbook.close) as close:
+            with self.assertRaisesMessage(bulk.BulkFileError, 'more than 3 rows'):
+                bulk.read_table(self.workbook(rows), 'guarantees.xlsx')
+            self.assertEqual(bulk.read_table(self.workbook(rows[:3]), 'guarantees.xlsx')[1][2][0], 'BS-2')
+        # Header and rows up to the first one over the limit, not the rest of the sheet
+        self.assertEqual(len(consumed), 5 + 4)
+        self.assertEqual(close.call_count, 2)
+
+        with patch('services.bulk.SOAP_BULK_MAX_ROWS', 3), self.assertRaises(bulk.BulkFileError):
+            bulk.read_table(b'a\n1\n2\n3\n4\n', 'g.csv')
+
+    def test_lost_submissions_are_expired_and_not_run(self):
+        long_ago = timezone.now() - datetime.timedelta(seconds=bulk.SOAP_BULK_TIMEOUT + 60)
+        running = BulkSubmission.objects.create(user=self.user, operation='sendBidSecurityInformation', file_name='g.csv',
+                                                source=b'bidSecurityInfo__securityNumber\nBS-1\n')
+        queued = BulkSubmission.objects.create(user=self.user, operation='sendBidSecurityInformation', file_name='g.csv',
+                                               source=b'bidSecurityInfo__securityNumber\nBS-1\n')
+        BulkSubmission.objects.update(created_at=long_ago)
+        # Still making progress: kept however old it is
+        BulkSubmission.objects.filter(pk=running.pk).update(status=SoapJob.STATUS_RUNNING, progressed_at=timezone.now())
+        running.refresh_from_db()
+        self.assertEqual(bulk.expire_stale_submission(running).status, SoapJob.STATUS_RUNNING)
+
+        queued.refresh_from_db()
+        queued = bulk.expire_stale_submission(queued)
+        self.assertEqual(queued.status, SoapJob.STATUS_FAILED)
+        self.assertIn('interrupted', queued.error_message)
+        bulk.run_bulk_submission(queued.pk, {'id_val': 'UAP', 'password': 'secret'})
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.processed_rows), (SoapJob.STATUS_FAILED, 0))
+
+
+class ReadModelSyncTest(TestCase):
+    def setUp(self):
+        stale_cache.get_cache().clear()
+
+    def test_successful_lookup_is_mirrored(self):
+        soap_client = SoapClient()
+        with patch.object(soap_client.client.transport, 'post_xml', return_value=FakeReply(samples.tender_response(tenders=2))):
+            soap_client.call_operation('getTenderInformation', tenderInfoRequest={'tenderRefName': 'Desks', 'tenderRefNumber': 'T-1'})
+        tender = Tender.objects.get(ref_number='T-000001')
+        self.assertEqual((tender.pe_name, tender.deadline_date), ('Ministry 1', datetime.date(2026, 11, 30)))
+        self.assertEqual(TenderInfo.from_tender(tender), TenderInfo('Tender for desks #1', 'T-000001', 'Ministry 1', '2026-11-30'))
+
+    def test_failed_lookup_is_not_mirrored(self):
+        result = parse_response('getTenderInformation', samples.tender_response())
+        result.resultCode = '9999'
+        self.assertEqual(read_model.sync_response('getTenderInformation', result), 0)
+        self.assertFalse(Tender.objects.exists())
+
+    def test_lookup_of_one_serial_keeps_the_others_lots(self):
+        first = parse_response('getContractInformation', samples.contract_response(lots=3))
+        read_model.sync_response('getContractInformation', first)
+        second = parse_response('getContractInformation', samples.contract_response(lots=2))
+        second.contractInfo[0].contractSerialNumber = '2'
+        read_model.sync_response('getContractInformation', second)
+        lots = dict(Contract.objects.filter(contract_number='C-000000').annotate(lot_count=Count('lots'))
+                    .values_list('serial_number', 'lot_count'))
+        self.assertEqual(lots, {'0': 3, '2': 2})
+
+
+class BenchmarkTest(TestCase):
+    def test_sample_forms_pass_validation(self):
+        for case in benchmarks.build_cases(['call']):
+            self.assertEqual(case.func().resultCode, '0000', case.name)
+
+    def test_measure_and_compare(self):
+        with patch.object(benchmarks, 'BENCHMARK_MIN_SAMPLE_SECONDS', 0):
+            stats = benchmarks.measure(lambda: sum(range(100)), repeat=3)
+        self.assertEqual((stats['loops'], stats['repeat']), (1, 3))
+        self.assertLessEqual(stats['best_us'], stats['median_us'])
+
+        baseline = {'cases': {'a': {'best_us': 100.0}, 'b': {'best_us': 100.0}}}
+        current = {'cases': {'a': {'best_us': 110.0}, 'b': {'best_us': 150.0}, 'new': {'best_us': 1.0}}}
+        rows = benchmarks.compare(current, baseline, threshold=0.2)
+        self.assertEqual([(row['case'], row['regression']) for row in rows], [('a', False), ('b', True)])
+
+
+class LoadTestTest(TestCase):
+    def test_parse_mix(self):
+        mix = loadtest.parse_mix('api:getTenderInformation=3, web:sendBidSecurityInformation, dashboard=1')
+        self.assertEqual({target.name: weight for target, weight in mix.items()}, {
+            'api:getTenderInformation': 3, 'web:sendBidSecurityInformation': 1, 'dashboard': 1,
+        })
+        for bad in ('api=1', 'dashboard:getTenderInformation', 'api:nope', 'cron', 'export=0'):
+            with self.assertRaises(loadtest.LoadTestError, msg=bad):
+                loadtest.parse_mix(bad)
+
+    def test_run_summarizes_samples(self):
+        class FakeClient:
+            def __init__(self, *args):
+                self.calls = 0
+
+            def send(self, target):
+                self.calls += 1
+                ok = target.kind == 'dashboard' or self.calls % 2
+                return loadtest.Sample(target.name, 0.01, bool(ok), 200, '' if ok else 'failed result', 3, (2, 8, 0))
+
+        mix = {loadtest.Target('api', 'getTenderInformation'): 1, loadtest.Target('dashboard'): 1}
+        report = loadtest.run('http://test', 'u', 'p', mix, duration=0.2, concurrency=2, seed=1, client_factory=FakeClient)
+
+        overall = report['overall']
+        self.assertGreater(overall['requests'], 0)
+        self.assertEqual(overall['db_queries'], {'mean': 3.0, 'max': 3})
+        self.assertEqual(report['targets']['dashboard']['errors'], 0)
+        self.assertEqual(report['worker_saturation']['busy_share_max'], 0.25)
+        self.assertEqual(set(report['targets']), {'api:getTenderInformation', 'dashboard'})
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((loadtest.percentile(values, 50), loadtest.percentile(values, 99)), (50, 99))
+
+    def test_client_talks_to_standin(self):
+        server = StandinServer(('127.0.0.1', 0), latency=0, error_rate=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        address = f"http://127.0.0.1:{server.server_address[1]}/"
+        with patch.object(soap_client, 'SOAP_SERVICE_ADDRESS', address):
+            result = SoapClient().call_operation('getContractInformation', use_cache=False, contractInfoRequest={
+                'contractNumber': 'C-000000', 'contractSerialNumber': '0'})
+        self.assertEqual((result.resultCode, server.requests), ('0000', 1))
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_call_phases_are_logged_and_exported(self):
+        soap_client = SoapClient()
+        reply = FakeReply(samples.result_response('sendCreditLineFacility'))
+        with patch.object(soap_client.client.transport, 'post_xml', return_value=reply):
+            soap_client.call_operation('sendCreditLineFacility', creditLineFacilityRequest={'tenderRefName': 'Desks'})
+
+        timings = SoapRequestLog.objects.get().timings
+        self.assertEqual(set(timings), {'validate', 'serialize', 'http', 'parse', 'sync', 'log_serialize'})
+        exported = metrics.render()
+        for phase in ('serialize', 'http', 'log_write', 'total'):
+            self.assertIn(f'soap_phase_seconds_count{{operation="sendCreditLineFacility",phase="{phase}"}} 1', exported)
+        self.assertIn('soap_calls_total{operation="sendCreditLineFacility",status="SUCCESS"} 1', exported)
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.observe('getTenderInformation', 'http', 0.003)
+        metrics.observe('getTenderInformation', 'http', 120)
+        metrics.increment('soap_retries_total', operation='getTenderInformation', reason='HTTP "503"')
+        exported = metrics.render()
+        self.assertIn('soap_phase_seconds_bucket{operation="getTenderInformation",phase="http",le="0.005"} 1', exported)
+        self.assertIn('soap_phase_seconds_bucket{operation="getTenderInformation",phase="http",le="+Inf"} 2', exported)
+        self.assertIn('reason="HTTP \\"503\\""} 1', exported)
+
+
+class TracingTest(TestCase):
+    def setUp(self):
+        handle, self.export_file = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, self.export_file)
+        for name, value in (('TRACE_EXPORT_FILE', self.export_file), ('TRACE_SAMPLE_RATE', 1.0)):
+            patcher = patch(f'services.tracing.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def exported_spans(self):
+        """Spans exported since the last call."""
+        tracing.flush()
+        with open(self.export_file, 'r+') as f:
+            lines = f.readlines()
+            f.truncate(0)
+        return [span for line in lines for resource in json.loads(line)['resourceSpans']
+                for scope in resource['scopeSpans'] for span in scope['spans']]
+
+    def test_soap_call_layers_share_the_logged_trace(self):
+        user = User.objects.create_superuser('tracer', 'tracer@example.com', 'password')
+        client = SoapClient()
+        reply = FakeReply(samples.result_response('sendCreditLineFacility'))
+        with tracing.trace('test') as root, patch.object(client.client.transport, 'post_xml', return_value=reply):
+            client.send_credit_line_facility('UAP', 'secret', {'tenderRefName': 'Desks'}, user=user)
+
+        self.assertEqual(SoapRequestLog.objects.get().trace_id, root.trace_id)
+        spans = {span['name']: span for span in self.exported_spans()}
+        self.assertTrue({'soap.call', 'soap.validate', 'soap.serialize', 'soap.http', 'soap.http_attempt',
+                         'soap.parse', 'soap.log_write'} <= set(spans))
+        self.assertEqual({span['traceId'] for span in spans.values()}, {root.trace_id})
+        self.assertEqual(spans['soap.http_attempt']['parentSpanId'], spans['soap.http']['spanId'])
+        self.assertEqual(spans['soap.call']['parentSpanId'], root.span_id)
+
+    def test_request_continues_incoming_trace(self):
+        user = User.objects.create_user('traceduser', password='password')
+        user.user_roles.create(role=Role.objects.get(name='Manager'))
+        self.client.force_login(user)
+        trace_id, parent_id = 'a' * 32, 'b' * 16
+        response = self.client.get(reverse('dashboard'), HTTP_TRACEPARENT=f'00-{trace_id}-{parent_id}-01')
+        self.assertEqual(response['X-Trace-Id'], trace_id)
+        spans = {span['name']: span for span in self.exported_spans()}
+        root = spans['GET web/dashboard/']
+        self.assertEqual(root['parentSpanId'], parent_id)
+        self.assertEqual(spans['rbac.user_has_role']['parentSpanId'], root['spanId'])
+
+        # The caller decided not to sample: the id is kept, nothing is exported
+        response = self.client.get(reverse('dashboard'), HTTP_TRACEPARENT=f'00-{"c" * 32}-{parent_id}-00')
+        self.assertEqual(response['X-Trace-Id'], 'c' * 32)
+        self.assertEqual(self.exported_spans(), [])
+
+        # Nor can a caller's sampled flag push past the sample rate
+        with patch('services.tracing.TRACE_SAMPLE_RATE', 0.0):
+            response = self.client.get(reverse('dashboard'), HTTP_TRACEPARENT=f'00-{"d" * 32}-{parent_id}-01')
+        self.assertEqual(response['X-Trace-Id'], 'd' * 32)
+        self.assertEqual(self.exported_spans(), [])
+
+    def test_spans_follow_work_onto_threads(self):
+        def work():
+            with tracing.span('in-thread'):
+                pass
+
+        with tracing.trace('test') as root:
+            thread = threading.Thread(target=tracing.propagate(work))
+            thread.start()
+            thread.join()
+        (span,) = [s for s in self.exported_spans() if s['name'] == 'in-thread']
+        self.assertEqual((span['traceId'], span['parentSpanId']), (root.trace_id, root.span_id))
+
+
+@patch('services.slow_calls._latencies', new_callable=lambda: hedging.LatencyTracker(window=1000))
+class SlowCallTest(TestCase):
+    def test_static_threshold_and_p99(self, _):
+        self.assertIsNone(slow_calls.check('soap', 'getTenderInformation', 2.9))
+        self.assertEqual(slow_calls.check('soap', 'getTenderInformation', 6), (2.0, 3, 'threshold'))
+
+        for _ in range(100):
+            slow_calls.check('soap', 'sendCreditLineFacility', 0.4)
+        # Over the p99, but under the floor
+        self.assertIsNone(slow_calls.check('soap', 'sendCreditLineFacility', 0.45))
+        self.assertEqual(slow_calls.check('soap', 'sendCreditLineFacility', 1.2), (3.0, 0.4, 'p99'))
+
+    @patch.dict('services.slow_calls.SLOW_CALL_THRESHOLDS', {'sendCreditLineFacility': 0})
+    def test_slow_soap_call_keeps_envelopes_and_pool_state(self, _):
+        client = SoapClient()
+        reply = FakeReply(samples.result_response('sendCreditLineFacility'))
+        with patch.object(client.client.transport, 'post_xml', return_value=reply):
+            client.call_operation('sendCreditLineFacility', creditLineFacilityRequest={'tenderRefName': 'Desks'})
+
+        slow = SlowCall.objects.get()
+        self.assertEqual((slow.kind, slow.name, slow.reason, slow.status), ('soap', 'sendCreditLineFacility', 'threshold', 'SUCCESS'))
+        self.assertEqual(slow.log, SoapRequestLog.objects.get())
+        self.assertIn('resultCode', slow.response_payload)
+        self.assertIn('http', slow.timings)
+        self.assertEqual(set(slow.pool_state), {'jobs', 'http'})
+
+    @patch('services.slow_calls.SLOW_WEB_THRESHOLD', 0)
+    @patch('services.slow_calls.SLOW_CALL_RETENTION', 2)
+    def test_slow_web_requests_are_kept_newest_first(self, _):
+        self.client.force_login(User.objects.create_superuser('slowadmin', 'slowadmin@example.com', 'password'))
+        for _ in range(3):
+            self.client.get(reverse('dashboard'), {'page': 1})
+        slow = SlowCall.objects.filter(kind='web')
+        self.assertEqual(slow.count(), 2)
+        self.assertEqual(slow.first().request_payload, 'GET /web/dashboard/?page=1')
+        self.assertIn('queries', slow.first().timings)
+
+        # Unmatched paths share one name instead of each getting a latency window of their own
+        for n in range(3):
+            self.client.get(f'/no-such-page-{n}/')
+        self.assertEqual(set(slow.filter(status='404').values_list('name', flat=True)), {'unresolved'})
+
+
+class LogArchiveTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.user = User.objects.create_user('archived', password='password')
+        now = timezone.now()
+        for days, operation in ((200, 'getTenderInformation'), (200, 'sendCreditLineFacility'), (120, 'getTenderInformation'),
+                                (100, 'getTenderInformation'), (1, 'getTenderInformation')):
+            log = SoapRequestLog.objects.create(user=self.user, operation=operation, request_payload='<r/>',
+                                                status='SUCCESS', duration=0.1, timings={'http': 80})
+            SoapRequestLog.objects.filter(pk=log.pk).update(timestamp=now - datetime.timedelta(days=days))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_archive_by_day_and_operation_then_restore(self):
+        before = {log.id: log.timestamp for log in SoapRequestLog.objects.all()}
+        call_command('archive_logs', older_than=90, chunk_size=2, directory=self.root, stdout=io.StringIO())
+        self.assertEqual(SoapRequestLog.objects.count(), 1)
+
+        files = list(log_archive.archive_files(Path(self.root)))
+        self.assertEqual(len(files), 4)
+        self.assertEqual({f.parent.name for f in files}, {'getTenderInformation', 'sendCreditLineFacility'})
+        rows = list(log_archive.read(files))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['timings'], {'http': 80})
+
+        oldest = min(before.values()).date()
+        out = io.StringIO()
+        call_command('restore_logs', '--from', oldest.isoformat(), '--to', oldest.isoformat(),
+                     '--operation', 'getTenderInformation', directory=self.root, stdout=out)
+        self.assertIn('Restored 1 log row(s)', out.getvalue())
+        # Restoring again is harmless, and timestamps and ids survive the round trip
+        self.assertEqual(log_archive.restore(files), 3)
+        self.assertEqual(log_archive.restore(files), 0)
+        self.assertEqual({log.id: log.timestamp for log in SoapRequestLog.objects.all()}, before)
+
+    def test_interrupted_run_resumes(self):
+        report = log_archive.archive(older_than_days=90, chunk_size=1, root=Path(self.root), max_chunks=2)
+        self.assertEqual((report.rows, report.chunks), (2, 2))
+        report = log_archive.archive(older_than_days=90, chunk_size=1, root=Path(self.root))
+        self.assertEqual(report.rows, 2)
+        self.assertEqual(len(list(log_archive.read(log_archive.archive_files(Path(self.root))))), 4)
+
+    def test_restore_inserts_archived_timestamps_and_counts_what_it_inserted(self):
+        before = {log.id: log.timestamp for log in SoapRequestLog.objects.all()}
+        log_archive.archive(older_than_days=90, root=Path(self.root))
+        files = list(log_archive.archive_files(Path(self.root)))
+        first = next(log_archive.read(files))
+        attach = payload_store.attach
+        raced = []
+
+        def racing_attach(log):
+            if not raced:
+                # Another restore puts one of the rows back after this one checked for it
+                raced.append(SoapRequestLog.objects.create(id=first['id'], operation=first['operation'],
+                                                           status=first['status'], duration=0))
+            attach(log)
+
+        with patch('services.log_archive.payload_store.attach', racing_attach), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(log_archive.restore(files), 3)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+        self.assertTrue(SoapRequestLog._meta.get_field('timestamp').auto_now_add)
+        restored = {log.id: log.timestamp for log in SoapRequestLog.objects.exclude(id=first['id'])}
+        self.assertEqual(restored, {k: v for k, v in before.items() if k != first['id']})
+
+    def test_keep_rows_bounds_the_table(self):
+        log_archive.archive(older_than_days=365, keep_rows=2, root=Path(self.root), write=False)
+        self.assertEqual(SoapRequestLog.objects.count(), 2)
+        self.assertEqual(list(log_archive.archive_files(Path(self.root))), [])
+
+
+class LogPartitionTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.log = SoapRequestLog.objects.create(operation='getTenderInformation', request_payload='<r/>',
+                                                 status='SUCCESS', duration=0.1)
+        SoapRequestLog.objects.filter(pk=self.log.pk).update(timestamp=timezone.now() - datetime.timedelta(days=200))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_month_start(self):
+        utc = datetime.timezone.utc
+        when = datetime.datetime(2026, 11, 30, 23, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=-2)))
+        self.assertEqual(log_partitions.month_start(when), datetime.datetime(2026, 12, 1, tzinfo=utc))
+        self.assertEqual(log_partitions.month_start(when, 1), datetime.datetime(2027, 1, 1, tzinfo=utc))
+        self.assertEqual(log_partitions.month_start(when, -12), datetime.datetime(2025, 12, 1, tzinfo=utc))
+
+    def test_day_range_compares_the_column(self):
+        day = timezone.localtime(SoapRequestLog.objects.get().timestamp).date()
+        self.assertTrue(SoapRequestLog.objects.filter(log_partitions.day_range(day, day)).exists())
+        self.assertFalse(SoapRequestLog.objects.filter(log_partitions.day_range(day + datetime.timedelta(days=1))).exists())
+        sql = str(SoapRequestLog.objects.filter(log_partitions.day_range(day, day)).query)
+        self.assertNotIn('DATE(', sql.upper())
+
+    @skipUnless(connection.vendor != 'postgresql', 'Only unpartitioned databases')
+    def test_nothing_to_do_without_partitions(self):
+        self.assertEqual(log_partitions.ensure_partitions(), [])
+        self.assertEqual(log_partitions.drop_expired(0), [])
+        with self.assertRaises(CommandError):
+            call_command('partition_logs', stdout=io.StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning is PostgreSQL only')
+    def test_expired_partitions_are_archived_and_dropped(self):
+        self.assertTrue(log_partitions.is_partitioned())
+        self.assertEqual(log_partitions.ensure_partitions(), [])
+        months = [p.start for p in log_partitions.partitions() if p.start]
+        self.assertIn(log_partitions.month_start(timezone.now(), 3), months)
+
+        # The test's own inserts leave deferred foreign key checks that would block DROP TABLE
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        # Everything up to next month has expired
+        out = io.StringIO()
+        call_command('partition_logs', drop_older_than=-45, directory=self.root, stdout=out)
+        self.assertIn('after archiving 1 row(s)', out.getvalue())
+        self.assertFalse(SoapRequestLog.objects.exists())
+        self.assertEqual(log_archive.restore(log_archive.archive_files(Path(self.root))), 1)
+        self.assertEqual(SoapRequestLog.objects.get().id, self.log.id)
+
+
+class PayloadStoreTest(TestCase):
+    ENVELOPE = ('<soap-env:Envelope><soap-env:Body><ns0:getTenderInformation><tenderInfoRequest>'
+                '<id>{id}</id><password>{password}</password><tenderRefNumber>T-1</tenderRefNumber>'
+                '</tenderInfoRequest></ns0:getTenderInformation></soap-env:Body></soap-env:Envelope>')
+
+    def test_credentials_are_masked_before_hashing(self):
+        first = payload_store.store(self.ENVELOPE.format(id='UAP', password='UAP!!009#'), credentials=True)
+        second = payload_store.store(self.ENVELOPE.format(id='OTHER', password='s3cret'), credentials=True)
+        self.assertEqual(first.pk, second.pk)
+        content = PayloadBlob.objects.get().content
+        self.assertIn('<id>***</id><password>***</password>', content)
+        self.assertNotIn('UAP', content)
+        self.assertEqual(payload_store.mask_credentials('{"id": "UAP", "password": "a\\"b", "ref": "T-1"}'),
+                         '{"id": "***", "password": "***", "ref": "T-1"}')
+
+    def test_identical_calls_share_payloads(self):
+        soap_client = SoapClient()
+        reply = samples.result_response('sendCreditLineFacility', message='Received')
+        with patch.object(soap_client.client.transport, 'post_xml', return_value=FakeReply(reply)):
+            for _ in range(3):
+                soap_client.call_operation('sendCreditLineFacility', creditLineFacilityRequest={
+                    'id': 'UAP', 'password': 'UAP!!009#', 'tenderRefNumber': 'T-1'})
+        logs = list(SoapRequestLog.objects.select_related('request_blob', 'response_blob'))
+        self.assertEqual(len(logs), 3)
+        self.assertEqual(PayloadBlob.objects.count(), 2)
+        self.assertEqual(len({log.request_blob_id for log in logs}), 1)
+        self.assertIn('T-1', logs[0].request_content)
+        self.assertNotIn('UAP!!009#', logs[0].request_content)
+        self.assertIn('<wsa:MessageID>***</wsa:MessageID>', logs[0].request_content)
+        self.assertEqual(logs[0].request_payload, '')
+
+        out = io.StringIO()
+        call_command('dedup_payloads', stdout=out)
+        self.assertIn('3 log row(s), 2 distinct payload(s)', out.getvalue())
+        self.assertIn('3.0x smaller', out.getvalue())
+
+    def test_convert_and_collect_garbage(self):
+        for _ in range(2):
+            SoapRequestLog.objects.create(operation='getTenderInformation', request_payload=self.ENVELOPE.format(id='UAP', password='x'),
+                                          response_payload='<fault/>', status='FAILED', duration=0.1)
+        self.assertEqual(payload_store.convert(chunk_size=1), 2)
+        self.assertEqual(PayloadBlob.objects.count(), 2)
+        log = SoapRequestLog.objects.select_related('response_blob').first()
+        self.assertEqual((log.response_payload, log.response_content), (None, '<fault/>'))
+
+        orphan = payload_store.store('<unused/>')
+        PayloadBlob.objects.update(last_used=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(payload_store.collect_garbage(), 1)
+        self.assertFalse(PayloadBlob.objects.filter(pk=orphan.pk).exists())
+
+        # Payloads handed out within the grace period are kept, referenced or not
+        payload_store.store('<unused/>')
+        SoapRequestLog.objects.all().delete()
+        self.assertEqual(payload_store.collect_garbage(), 2)
+        self.assertEqual(list(PayloadBlob.objects.values_list('content', flat=True)), ['<unused/>'])
+
+    def test_archives_carry_the_payloads(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        log = SoapRequestLog.objects.create(operation='getTenderInformation', status='SUCCESS', duration=0.1,
+                                            request_blob=payload_store.store('<r/>'), response_blob=payload_store.store('<ok/>'))
+        SoapRequestLog.objects.filter(pk=log.pk).update(timestamp=timezone.now() - datetime.timedelta(days=200))
+        log_archive.archive(older_than_days=90, root=root)
+        PayloadBlob.objects.update(last_used=timezone.now() - datetime.timedelta(days=2))
+        payload_store.collect_garbage()
+        self.assertFalse(PayloadBlob.objects.exists())
+
+        self.assertEqual(log_archive.restore(log_archive.archive_files(root)), 1)
+        restored = SoapRequestLog.objects.select_related('request_blob', 'response_blob').get()
+        self.assertEqual((restored.request_content, restored.response_content), ('<r/>', '<ok/>'))
+        self.assertIsNotNone(restored.response_blob_id)
@@ -0,0 +1,230 @@
+"""
+Lightweight request tracing, exported as OpenTelemetry (OTLP/JSON) spans.
+
+Every web or API request gets a trace id (core.middleware.TracingMiddleware),
+taken from an incoming W3C traceparent header when there is one. The id is
+stored on the SoapRequestLog rows the request produces. A share of requests,
+TRACE_SAMPLE_RATE, is sampled, continued traces included: span() then records
+the request's layers (role checks, SOAP permission, payload build, envelope,
+HTTP attempts, reply parsing, log write) and a background thread exports them
+every TRACE_EXPORT_INTERVAL seconds. Exports go as JSON lines to
+TRACE_EXPORT_FILE, or to an OTLP/HTTP collector at TRACE_EXPORT_URL (e.g.
+http://collector:4318/v1/traces). With neither set, nothing is sampled.
+
+The current span lives in a context variable, so asyncio tasks inherit it.
+Work handed to thread pools must be wrapped with propagate().
+
+Unsampled requests pay for one context variable lookup per span() call.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = getattr(settings, 'TRACE_SAMPLE_RATE', 0.01)
+TRACE_EXPORT_FILE = getattr(settings, 'TRACE_EXPORT_FILE', None)
+TRACE_EXPORT_URL = getattr(settings, 'TRACE_EXPORT_URL', None)
+TRACE_EXPORT_INTERVAL = getattr(settings, 'TRACE_EXPORT_INTERVAL', 5)
+TRACE_SERVICE_NAME = getattr(settings, 'TRACE_SERVICE_NAME', 'umucyo-gui')
+# Spans waiting for export beyond this are dropped, oldest first
+TRACE_MAX_PENDING = 10000
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# OTLP enums
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    sampled: bool
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict = field(default_factory=dict)
+    status: int = STATUS_UNSET
+    status_message: str = ''
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)[:500]
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('trace_span', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def exporting() -> bool:
+    return bool(TRACE_EXPORT_FILE or TRACE_EXPORT_URL)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> str:
+    span = _current.get()
+    return span.trace_id if span else ''
+
+
+@contextmanager
+def trace(name: str, traceparent: Optional[str] = None, kind: int = SPAN_KIND_SERVER, **attributes):
+    """
+    Start a trace (or continue the caller's, given its traceparent header) and
+    make its root span current. Yields the span, sampled or not: at
+    TRACE_SAMPLE_RATE, and never when the caller's header says not to.
+    """
+    match = _TRACEPARENT.match(traceparent or '')
+    if match:
+        trace_id, parent_id = match.group(1), match.group(2)
+        # Any client can send the header, so its sampled flag can only veto: the rate still applies
+        sampled = int(match.group(3), 16) & 1 == 1
+    else:
+        trace_id, parent_id = _new_id(128), None
+        sampled = True
+    sampled = sampled and exporting() and random.random() < TRACE_SAMPLE_RATE
+    root = Span(trace_id, _new_id(64), parent_id, name, sampled, kind, time.time_ns(), attributes=attributes)
+    with _activate(root):
+        yield root
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """A child of the current span, as a context manager yielding it; a no-op outside sampled traces."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return nullcontext()
+    return _activate(Span(parent.trace_id, _new_id(64), parent.span_id, name, True, kind, time.time_ns(),
+                          attributes=attributes))
+
+
+@contextmanager
+def _activate(current: Span):
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end_ns = time.time_ns()
+        if current.sampled:
+            _exporter.add(current)
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind func to the caller's trace context, for running it on another thread."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+# --- Export ---
+
+def _attribute(key, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def otlp_json(spans: List[Span]) -> Dict:
+    """An OTLP ExportTraceServiceRequest in its JSON encoding."""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [_attribute('service.name', TRACE_SERVICE_NAME)]},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [{
+                'traceId': s.trace_id,
+                'spanId': s.span_id,
+                **({'parentSpanId': s.parent_id} if s.parent_id else {}),
+                'name': s.name,
+                'kind': s.kind,
+                'startTimeUnixNano': str(s.start_ns),
+                'endTimeUnixNano': str(s.end_ns),
+                'attributes': [_attribute(k, v) for k, v in s.attributes.items() if v is not None],
+                'status': {'code': s.status, **({'message': s.status_message} if s.status_message else {})},
+            } for s in spans],
+        }],
+    }]}
+
+
+class _Exporter:
+    """Batches finished spans and ships them from a daemon thread."""
+
+    def __init__(self):
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+
+    def add(self, finished: Span):
+        with self._lock:
+            self._pending.append(finished)
+            if len(self._pending) > TRACE_MAX_PENDING:
+                del self._pending[0]
+                self.dropped += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(TRACE_EXPORT_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        body = json.dumps(otlp_json(batch), separators=(',', ':'))
+        try:
+            with self._write_lock:
+                if TRACE_EXPORT_FILE:
+                    with open(TRACE_EXPORT_FILE, 'a') as f:
+                        f.write(body + '\n')
+                if TRACE_EXPORT_URL:
+                    requests.post(TRACE_EXPORT_URL, data=body, headers={'Content-Type': 'application/json'},
+                                  timeout=5).raise_for_status()
+        except Exception as e:
+            logger.warning(f"Could not export {len(batch)} spans: {e}")
+
+
+_exporter = _Exporter()
+
+
+def flush():
+    """Export pending spans now (tests, shutdown)."""
+    _exporter.flush()
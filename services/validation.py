@@ -0,0 +1,161 @@
+import re
+import threading
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from zeep import xsd
+
+# Every element in service.wsdl is an optional xs:string, so the schema alone only
+# constrains structure. Formats and mandatory elements the hub enforces are layered
+# on top by element name.
+DEFAULT_REQUIRED_FIELDS = {
+    'getTenderInformation': ['tenderRefName', 'tenderRefNumber'],
+    'getContractInformation': ['contractNumber', 'contractSerialNumber'],
+}
+
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_SCALAR_TYPES = (str, int, float, Decimal, date)
+
+
+def _is_date_element(name: str) -> bool:
+    return name.endswith('Date')
+
+
+def _is_amount_element(name: str) -> bool:
+    return name == 'amount' or name.endswith('Amount')
+
+
+def _check_scalar(name: str, value: Any) -> Optional[str]:
+    if not isinstance(value, _SCALAR_TYPES) or isinstance(value, bool):
+        return "Expected a single text value."
+    if value == '' or isinstance(value, (date, datetime)):
+        return None
+    text = str(value).strip()
+    if _is_date_element(name):
+        if not _DATE_PATTERN.match(text):
+            return "Enter a date as YYYY-MM-DD."
+        try:
+            date.fromisoformat(text)
+        except ValueError:
+            return "Enter a valid calendar date."
+    elif _is_amount_element(name):
+        try:
+            amount = Decimal(text)
+        except InvalidOperation:
+            return "Enter a number without separators, e.g. 1500000.00."
+        if not amount.is_finite():
+            return "Enter a number without separators, e.g. 1500000.00."
+    return None
+
+
+class PayloadValidator:
+    """
+    Validator for one operation's request element, compiled from the zeep schema.
+
+    The compiled tree maps each element name to (children, accepts_multiple), where
+    children is None for simple types. Errors are keyed by the flattened field names
+    used by the operation forms, e.g. 'advancePaymentInfo__expireDate'.
+    """
+
+    def __init__(self, operation: str, request_element: str, tree: Dict, required: List[str]):
+        self.operation = operation
+        self.request_element = request_element
+        self.tree = tree
+        self.required = [tuple(name.split('__')) for name in required]
+
+    @classmethod
+    def compile(cls, operation: str, body_type) -> 'PayloadValidator':
+        request_element, element = body_type.elements[0]
+        required = getattr(settings, 'SOAP_REQUIRED_FIELDS', {}).get(
+            operation, DEFAULT_REQUIRED_FIELDS.get(operation, [])
+        )
+        return cls(operation, request_element, cls._compile_type(element.type), required)
+
+    @classmethod
+    def _compile_type(cls, complex_type) -> Dict:
+        tree = {}
+        for name, element in complex_type.elements:
+            children = cls._compile_type(element.type) if isinstance(element.type, xsd.ComplexType) else None
+            tree[name] = (children, bool(element.accepts_multiple))
+        return tree
+
+    def validate(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        """Validate the kwargs passed to call_operation; returns {field_name: message}."""
+        errors: Dict[str, str] = {}
+        unexpected = set(payload) - {self.request_element}
+        for name in unexpected:
+            errors[name] = "Unknown element."
+        body = payload.get(self.request_element)
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            errors[self.request_element] = "Expected a group of fields."
+            return errors
+
+        self._validate_node(self.tree, body, (), errors)
+        for path in self.required:
+            if self._is_blank(body, path):
+                errors.setdefault('__'.join(path), "This field is required.")
+        return errors
+
+    def _validate_node(self, tree, data, prefix, errors, item=None):
+        for name, value in data.items():
+            field_name = '__'.join(prefix + (name,))
+            suffix = f" (item {item + 1})" if item is not None else ''
+            if name not in tree:
+                errors.setdefault(field_name, "Unknown element." + suffix)
+                continue
+            if value is None:
+                continue
+            children, many = tree[name]
+            if many and isinstance(value, (list, tuple)):
+                values = list(enumerate(value))
+            elif isinstance(value, (list, tuple)):
+                errors.setdefault(field_name, "Only one value is allowed." + suffix)
+                continue
+            else:
+                values = [(item, value)]
+
+            for index, single in values:
+                item_suffix = f" (item {index + 1})" if index is not None else ''
+                if single is None:
+                    continue
+                if children is None:
+                    message = _check_scalar(name, single)
+                    if message:
+                        errors.setdefault(field_name, message + item_suffix)
+                elif isinstance(single, dict):
+                    self._validate_node(children, single, prefix + (name,), errors, index)
+                else:
+                    errors.setdefault(field_name, "Expected a group of fields." + item_suffix)
+
+    @staticmethod
+    def _is_blank(data, path) -> bool:
+        node = data
+        for key in path:
+            if isinstance(node, (list, tuple)):
+                node = node[0] if node else None
+            if not isinstance(node, dict):
+                return True
+            node = node.get(key)
+        return node is None or (isinstance(node, str) and not node.strip())
+
+
+_validators: Dict[tuple, PayloadValidator] = {}
+_validators_lock = threading.Lock()
+
+
+def get_validator(client, wsdl_path: str, operation: str) -> PayloadValidator:
+    """Compiled validator for an operation, built once per process from the zeep client's schema."""
+    key = (wsdl_path, operation)
+    validator = _validators.get(key)
+    if validator is None:
+        with _validators_lock:
+            validator = _validators.get(key)
+            if validator is None:
+                body_type = client.service._binding._operations[operation].input.body.type
+                validator = _validators[key] = PayloadValidator.compile(operation, body_type)
+    return validator
@@ -0,0 +1,161 @@
+"""
+One poller per process for the dashboard's live feed.
+
+Open DashboardStreamView responses subscribe here rather than querying the
+database themselves: a single thread reads the SoapRequestLog rows added since
+its last poll, renders each row once and hands it to every subscriber's queue
+on that subscriber's event loop. The thread runs only while someone is
+subscribed and releases its database connection between polls, so the feed
+costs one connection per process at most, however many dashboards are open.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from core.models import SoapRequestLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+# Rows a subscriber may fall behind by before its stream is ended; the browser reconnects and catches up
+QUEUE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Entry:
+    id: int
+    user_id: Optional[int]
+    html: str
+
+
+@dataclass(eq=False)
+class Subscription:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    overflowed: bool = False
+
+    def put(self, entry: Entry):
+        # Runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+def render(logs) -> List[Entry]:
+    return [Entry(log.id, log.user_id, render_to_string('web/partials/log_row.html', {'log': log})) for log in logs]
+
+
+def fetch_after(last_id: int) -> List[Entry]:
+    return render(SoapRequestLog.objects.select_related('user').filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+
+
+async def backlog(after: int) -> List[Entry]:
+    """The newest BATCH_SIZE rows after `after`, oldest first: what a reconnecting client missed."""
+    logs = [log async for log in SoapRequestLog.objects.select_related('user').filter(id__gt=after).order_by('-id')[:BATCH_SIZE]]
+    return render(reversed(logs))
+
+
+class LogFeed:
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self) -> Optional[Subscription]:
+        """
+        Follow the rows added from now on. None when DASHBOARD_STREAM_MAX_CLIENTS
+        streams are already open in this process.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            if len(self.subscribers) >= getattr(settings, 'DASHBOARD_STREAM_MAX_CLIENTS', 200):
+                return None
+            self.subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='dashboard-feed', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def _poll(self):
+        try:
+            last_id = SoapRequestLog.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+            while True:
+                with self._lock:
+                    if not self.subscribers:
+                        self._thread = None
+                        return
+                    subscribers = list(self.subscribers)
+                try:
+                    entries = fetch_after(last_id)
+                except Exception as e:
+                    logger.error(f"Dashboard feed poll failed: {e}")
+                    entries = []
+                close_old_connections()
+                for entry in entries:
+                    for subscription in subscribers:
+                        try:
+                            subscription.loop.call_soon_threadsafe(subscription.put, entry)
+                        except RuntimeError:  # its loop has closed
+                            self.unsubscribe(subscription)
+                    last_id = entry.id
+                if len(entries) < BATCH_SIZE:
+                    time.sleep(getattr(settings, 'DASHBOARD_STREAM_POLL_SECONDS', 2))
+        except Exception:
+            with self._lock:
+                self._thread = None
+            raise
+        finally:
+            connection.close()
+
+
+feed = LogFeed()
+
+
+async def events(subscription: Subscription, after: Optional[int] = None, user_id: Optional[int] = None):
+    """
+    Server-sent events for `subscription`: first what was missed since `after`, then
+    new rows, only user_id's when given. Ends after DASHBOARD_STREAM_MAX_SECONDS, or
+    once the subscriber has fallen QUEUE_SIZE rows behind.
+    """
+    poll_interval = getattr(settings, 'DASHBOARD_STREAM_POLL_SECONDS', 2)
+    heartbeat_interval = getattr(settings, 'DASHBOARD_STREAM_HEARTBEAT_SECONDS', 15)
+    ends_at = time.monotonic() + getattr(settings, 'DASHBOARD_STREAM_MAX_SECONDS', 300)
+    last_sent = after or 0
+
+    def event(entry):
+        data = "\n".join(f"data: {line}" for line in entry.html.strip().splitlines())
+        return f"id: {entry.id}\nevent: log\n{data}\n\n"
+
+    try:
+        yield f"retry: {poll_interval * 1000}\n\n"
+        # Read after subscribing, so rows the poller hands out meanwhile are either here or queued
+        for entry in (await backlog(after) if after is not None else []):
+            if user_id is None or entry.user_id == user_id:
+                yield event(entry)
+            last_sent = entry.id
+        while (remaining := ends_at - time.monotonic()) > 0:
+            try:
+                entry = await asyncio.wait_for(subscription.queue.get(), timeout=min(heartbeat_interval, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if entry.id > last_sent and (user_id is None or entry.user_id == user_id):
+                yield event(entry)
+            last_sent = max(last_sent, entry.id)
+            if subscription.overflowed and subscription.queue.empty():
+                break
+    finally:
+        feed.unsubscribe(subscription)
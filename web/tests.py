@@ -1,9 +1,16 @@
-from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
 from django.contrib.auth.models import User
-from core.models import Role, UserRole
+from core.models import Role, UserRole, SoapJob, SoapRequestLog, BulkSubmission, Tender, TenderLot, Contract, ContractLot
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from web import log_feed
 from web.views import UserCreateView, UserUpdateView
+from core.testing import QueryBudgetTestMixin
+import asyncio
 import logging
+from unittest.mock import patch
+from datetime import timedelta
+from django.utils import timezone
 
 # Configure logging to show up in test output
 logging.basicConfig(level=logging.INFO)
@@ -11,9 +18,9 @@ logging.basicConfig(level=logging.INFO)
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
 class RoleAssignmentViewTest(TestCase):
     def setUp(self):
-        # Create Roles
-        self.role_admin = Role.objects.create(name='Admin')
-        self.role_manager = Role.objects.create(name='Manager')
+        # Roles seeded by core migration 0005
+        self.role_admin = Role.objects.get(name='Admin')
+        self.role_manager = Role.objects.get(name='Manager')
         
         # Create Admin User for login
         self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
@@ -111,3 +118,281 @@ class RoleAssignmentViewTest(TestCase):
         self.assertEqual(roles.count(), 1)
         self.assertEqual(roles.first().role, self.role_admin)
         print("SUCCESS: Roles updated correctly.")
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class OperationJobTest(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('jobadmin', 'jobadmin@example.com', 'password')
+        self.client.force_login(self.admin_user)
+        self.url = reverse('operation_execute', kwargs={'operation': 'getTenderInformation'})
+        self.form = {'tenderRefName': 'Supply of desks', 'tenderRefNumber': 'T-001'}
+
+    @patch('services.jobs.SoapClient')
+    def test_post_returns_pending_fragment(self, client_cls):
+        with patch('services.jobs.get_executor') as get_executor:
+            response = self.client.post(self.url, self.form)
+        job = SoapJob.objects.get()
+        self.assertEqual(job.status, SoapJob.STATUS_PENDING)
+        self.assertContains(response, reverse('operation_job_status', kwargs={'pk': job.pk}))
+        get_executor.return_value.submit.assert_called_once()
+        client_cls.assert_not_called()
+
+    @override_settings(SOAP_JOBS_EAGER=True)
+    @patch('services.jobs.SoapClient')
+    def test_job_result_is_stored_and_polled(self, client_cls):
+        client_cls.return_value.get_tender_information.return_value = {'resultCode': '0000'}
+        client_cls.return_value.staleness = None
+        self.client.post(self.url, self.form)
+        job = SoapJob.objects.get()
+        self.assertEqual(job.status, SoapJob.STATUS_SUCCESS)
+        _, kwargs = client_cls.return_value.get_tender_information.call_args
+        self.assertEqual(kwargs['ref_name'], 'Supply of desks')
+        self.assertEqual(kwargs['ref_number'], 'T-001')
+
+        response = self.client.get(reverse('operation_job_status', kwargs={'pk': job.pk}))
+        self.assertContains(response, '0000')
+        self.assertNotContains(response, 'hx-trigger')
+        self.assertNotContains(response, 'Saved data from')
+
+    def test_stale_result_is_marked(self):
+        job = SoapJob.objects.create(
+            user=self.admin_user, operation='getTenderInformation', status=SoapJob.STATUS_SUCCESS,
+            result='{"resultCode": "0000"}', stale_fetched_at=timezone.now() - timedelta(minutes=5),
+            stale_reason='upstream_error',
+        )
+        response = self.client.get(reverse('operation_job_status', kwargs={'pk': job.pk}))
+        self.assertContains(response, 'Saved data from 5')
+        self.assertContains(response, 'The hub is not responding')
+
+    def test_other_users_cannot_poll_job(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        job = SoapJob.objects.create(user=other, operation='getTenderInformation')
+        response = self.client.get(reverse('operation_job_status', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, 200)  # superusers may inspect any job
+        self.client.force_login(User.objects.create_user('third', 'third@example.com', 'password'))
+        response = self.client.get(reverse('operation_job_status', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+                   DASHBOARD_STREAM_POLL_SECONDS=0.05, DASHBOARD_STREAM_MAX_SECONDS=1)
+class DashboardStreamTest(TransactionTestCase):
+    # The feed's poller reads from its own thread, so the rows must be committed
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = User.objects.create_user('streamer', 'streamer@example.com', 'password')
+        self.other = User.objects.create_user('bystander', 'bystander@example.com', 'password')
+        self.old = SoapRequestLog.objects.create(user=self.user, operation='getTenderInformation', request_payload='<a/>', status='SUCCESS', duration=0.1)
+        self.mine = SoapRequestLog.objects.create(user=self.user, operation='getContractInformation', request_payload='<b/>', status='SUCCESS', duration=0.2)
+        self.theirs = SoapRequestLog.objects.create(user=self.other, operation='sendBidSecurityInformation', request_payload='<c/>', status='FAILED', duration=0.3)
+
+    async def read_stream(self, url, **headers):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url, headers=headers)
+        body = ''
+        async for chunk in response.streaming_content:
+            body += chunk.decode() if isinstance(chunk, bytes) else chunk
+        return response, body
+
+    async def test_stream_resumes_after_last_event_id(self):
+        url = reverse('dashboard_stream')
+        response, body = await self.read_stream(url, **{'Last-Event-ID': str(self.old.id)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertNotIn(f'id: {self.old.id}\n', body)
+        self.assertIn(f'id: {self.mine.id}\n', body)
+        self.assertIn('getContractInformation', body)
+
+    async def test_stream_filters_to_own_logs(self):
+        url = reverse('dashboard_stream') + f'?last_id={self.old.id}&mine=1'
+        response, body = await self.read_stream(url)
+        self.assertIn(f'id: {self.mine.id}\n', body)
+        self.assertNotIn(f'id: {self.theirs.id}\n', body)
+
+    async def test_stream_requires_login(self):
+        response = await self.async_client.get(reverse('dashboard_stream'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_without_cursor_starts_at_newest_row(self):
+        response, body = await self.read_stream(reverse('dashboard_stream'))
+        self.assertNotIn('event: log', body)
+
+    async def test_dashboard_resumes_after_newest_row_outside_window(self):
+        await SoapRequestLog.objects.aupdate(timestamp=timezone.now() - timedelta(days=60))
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertEqual(list(response.context['logs']), [])
+        self.assertEqual(response.context['stream_last_id'], self.theirs.id)
+        self.assertContains(response, f'last_id={self.theirs.id}')
+
+    async def test_one_poller_serves_every_stream(self):
+        url = reverse('dashboard_stream')
+
+        async def add_log():
+            await asyncio.sleep(0.3)
+            self.assertEqual(len(log_feed.feed.subscribers), 2)
+            return await SoapRequestLog.objects.acreate(user=self.other, operation='getTenderInformation',
+                                                        request_payload='<d/>', status='SUCCESS', duration=0.1)
+
+        with patch('web.log_feed.fetch_after', wraps=log_feed.fetch_after) as fetch:
+            (_, first), (_, second), new = await asyncio.gather(self.read_stream(url), self.read_stream(url), add_log())
+        self.assertIn(f'id: {new.id}\n', first)
+        self.assertIn(f'id: {new.id}\n', second)
+        self.assertNotIn(f'id: {self.theirs.id}\n', first)
+        # The poller stops with its last subscriber
+        self.assertEqual(log_feed.feed.subscribers, set())
+        await asyncio.sleep(0.1)
+        calls = fetch.call_count
+        await asyncio.sleep(0.1)
+        self.assertEqual(fetch.call_count, calls)
+
+    @override_settings(DASHBOARD_STREAM_MAX_CLIENTS=0)
+    async def test_streams_are_capped(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard_stream'))
+        self.assertEqual(response.status_code, 503)
+
+    def test_no_feed_under_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('dashboard_stream')).status_code, 204)
+        response = self.client.get(reverse('dashboard'))
+        self.assertNotContains(response, 'sse-connect')
+
+
+class BulkSubmissionViewTest(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('bulkadmin', 'bulkadmin@example.com', 'password')
+        self.client.force_login(self.admin_user)
+        self.url = reverse('bulk_submission')
+
+    def upload(self, content, name='guarantees.csv'):
+        upload = SimpleUploadedFile(name, content, content_type='text/csv')
+        return self.client.post(self.url, {'operation': 'sendBidSecurityInformation', 'file': upload})
+
+    @patch('web.views.submit_bulk_submission')
+    def test_upload_queues_submission(self, submit):
+        response = self.upload(b'bidSecurityInfo__securityNumber,bidSecurityInfo__amount\nBS-1,100\nBS-2,200\n')
+        submission = BulkSubmission.objects.get()
+        self.assertRedirects(response, reverse('bulk_submission_detail', kwargs={'pk': submission.pk}))
+        self.assertEqual((submission.total_rows, submission.user), (2, self.admin_user))
+        submit.assert_called_once()
+
+        response = self.client.get(reverse('bulk_submission_detail', kwargs={'pk': submission.pk}), HTTP_HX_REQUEST='true')
+        self.assertContains(response, '0 of 2 rows processed')
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+    def test_unknown_headers_are_rejected(self):
+        response = self.upload(b'foo,bar\n1,2\n', 'bad.csv')
+        self.assertRedirects(response, self.url)
+        self.assertFalse(BulkSubmission.objects.exists())
+
+
+class ReferenceAutocompleteTest(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('refadmin', 'refadmin@example.com', 'password')
+        self.client.force_login(self.admin_user)
+        now = timezone.now()
+        tender = Tender.objects.create(ref_number='RPPA/2026/014', ref_name='Road works', pe_name='RTDA',
+                                       data={}, synced_at=now)
+        TenderLot.objects.create(tender=tender, lot_number='1', lot_name='Lot one')
+        Tender.objects.create(ref_number='MINAGRI/RPPA/2026/002', ref_name='Seeds', data={}, synced_at=now)
+        contract = Contract.objects.create(contract_number='C-2026-07', serial_number='S1', contract_name='Bridge',
+                                           pe_name='RTDA', pe_tin_number='100000001', supplier_name='Acme',
+                                           supplier_tin_number='200000002', tender_ref_number='RPPA/2026/014',
+                                           data={}, synced_at=now)
+        ContractLot.objects.create(contract=contract, lot_number='1', lot_name='Lot one')
+        ContractLot.objects.create(contract=contract, lot_number='2', lot_name='Lot two')
+
+    def suggest(self, field, value):
+        return self.client.get(reverse('reference_suggestions'), {'field': field, field: value})
+
+    def test_prefix_matches_come_before_substring_matches(self):
+        response = self.suggest('tenderNotificationInfo__tenderRefNumber', 'rppa')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=60')
+        content = response.content.decode()
+        self.assertLess(content.index('"RPPA/2026/014"'), content.index('"MINAGRI/RPPA/2026/002"'))
+        self.assertContains(response, 'Road works - RTDA')
+
+    def test_only_reference_fields_are_suggested(self):
+        self.assertNotContains(self.suggest('contractNumber', 'RP'), '<option')
+        self.assertNotContains(self.suggest('supplierInfo__supplierName', 'Acme'), '<option')
+        self.assertContains(self.suggest('contractNumber', 'c-20'), 'value="C-2026-07"')
+
+    def test_prefill_uses_local_record(self):
+        with patch('services.soap_client.SoapClient.call_operation') as call:
+            response = self.client.get(reverse('reference_prefill'),
+                                       {'field': 'contractInfo__contractNumber', 'value': 'C-2026-07'})
+        call.assert_not_called()
+        fields = response.json()['fields']
+        self.assertEqual(fields['supplierTINNumber'], '200000002')
+        self.assertEqual(fields['tenderRefNumber'], 'RPPA/2026/014')
+        self.assertNotIn('lotNumber', fields)  # two lots: left for the user to choose
+
+        fields = self.client.get(reverse('reference_prefill'), {'field': 'tenderRefNumber', 'value': 'RPPA/2026/014'}).json()['fields']
+        self.assertEqual((fields['pEName'], fields['tenderLotNumber']), ('RTDA', '1'))
+        self.assertEqual(self.client.get(reverse('reference_prefill'), {'field': 'tenderRefNumber', 'value': 'nope'}).json(), {'fields': {}})
+
+    def test_form_wires_reference_fields(self):
+        response = self.client.get(reverse('operation_execute', kwargs={'operation': 'sendPerformSecurityInformation'}))
+        self.assertContains(response, 'list="suggest-contractInfo__contractNumber"')
+        self.assertContains(response, 'list="suggest-contractInfo__tenderRefNumber"')
+        self.assertNotContains(response, 'list="suggest-contractInfo__supplierName"')
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='budgetadmin', password='password')
+        UserRole.objects.create(user=self.user, role=Role.objects.get(name='Admin'))
+        self.client.force_login(self.user)
+        self.add_logs(3)
+
+    def add_logs(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'author{SoapRequestLog.objects.count()}', password='password')
+            SoapRequestLog.objects.create(user=author, operation='getTenderInformation', request_payload='<r/>',
+                                          status='SUCCESS', duration=0.1)
+
+    def test_dashboard_does_not_query_per_row(self):
+        self.assertQueryCountStable(lambda: self.client.get(reverse('dashboard')), lambda: self.add_logs(10))
+        self.assertWithinQueryBudget(self.client.get(reverse('dashboard')))
+
+    def test_export_does_not_query_per_row(self):
+        self.assertQueryCountStable(lambda: self.client.get(reverse('dashboard_export_excel')), lambda: self.add_logs(10))
+
+    def test_roles_are_looked_up_once_per_request(self):
+        with self.assertMaxQueries(20) as queries:
+            response = self.client.get(reverse('operation_list'))
+        self.assertContains(response, 'Open Form')
+        self.assertEqual(sum('core_userrole' in q['sql'] for q in queries.captured_queries), 1)
+        self.assertWithinQueryBudget(response)
+
+
+class LogDateBoundsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='boundsadmin', password='password')
+        UserRole.objects.create(user=self.user, role=Role.objects.get(name='Admin'))
+        self.client.force_login(self.user)
+        self.recent = SoapRequestLog.objects.create(user=self.user, operation='getTenderInformation', request_payload='<r/>',
+                                                    status='SUCCESS', duration=0.1)
+        self.old = SoapRequestLog.objects.create(user=self.user, operation='getContractInformation', request_payload='<r/>',
+                                                 status='SUCCESS', duration=0.1)
+        SoapRequestLog.objects.filter(pk=self.old.pk).update(timestamp=timezone.now() - timedelta(days=60))
+
+    def test_dashboard_lists_only_its_window(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual([log.pk for log in response.context['logs']], [self.recent.pk])
+        self.assertContains(response, 'last 30 days')
+
+    def test_export_date_range(self):
+        import openpyxl
+        from io import BytesIO
+        day = (timezone.localtime() - timedelta(days=60)).date().isoformat()
+        response = self.client.get(reverse('dashboard_export_excel'), {'from': day, 'to': day})
+        rows = list(openpyxl.load_workbook(BytesIO(response.content)).active.values)
+        self.assertEqual([row[0] for row in rows[1:]], [self.old.pk])
+
+        response = self.client.get(reverse('dashboard_export_excel'))
+        self.assertEqual(len(list(openpyxl.load_workbook(BytesIO(response.content)).active.values)), 3)
+        self.assertEqual(self.client.get(reverse('dashboard_export_excel'), {'from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('dashboard_export_excel'), {'to': '2026-02-30'}).status_code, 400)
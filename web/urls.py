@@ -1,6 +1,6 @@
 from django.urls import path, include
 from django.contrib.auth.views import LogoutView
-from .views import CustomLoginView, DashboardView, OperationListView, OperationExecuteView, UserListView, UserUpdateView, UserCreateView, UserToggleActiveView, TestSingleSoapView, ExportReadLogsExcelView
+from .views import CustomLoginView, DashboardView, DashboardStreamView, OperationListView, OperationExecuteView, OperationJobStatusView, ReferenceSuggestionsView, ReferencePrefillView, BulkSubmissionView, BulkSubmissionDetailView, BulkSubmissionDownloadView, BulkTemplateView, UserListView, UserUpdateView, UserCreateView, UserToggleActiveView, TestSingleSoapView, ExportReadLogsExcelView
 
 urlpatterns = [
     path('test-soap/', TestSingleSoapView.as_view(), name='test_soap'),
@@ -8,8 +8,16 @@ urlpatterns = [
     path('login/', CustomLoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/stream/', DashboardStreamView.as_view(), name='dashboard_stream'),
     path('dashboard/export-excel/', ExportReadLogsExcelView.as_view(), name='dashboard_export_excel'),
     path('operations/', OperationListView.as_view(), name='operation_list'),
+    path('operations/jobs/<int:pk>/', OperationJobStatusView.as_view(), name='operation_job_status'),
+    path('operations/references/suggest/', ReferenceSuggestionsView.as_view(), name='reference_suggestions'),
+    path('operations/references/prefill/', ReferencePrefillView.as_view(), name='reference_prefill'),
+    path('operations/bulk/', BulkSubmissionView.as_view(), name='bulk_submission'),
+    path('operations/bulk/<int:pk>/', BulkSubmissionDetailView.as_view(), name='bulk_submission_detail'),
+    path('operations/bulk/<int:pk>/download/', BulkSubmissionDownloadView.as_view(), name='bulk_submission_download'),
+    path('operations/bulk/template/<str:operation>/', BulkTemplateView.as_view(), name='bulk_template'),
     path('operations/<str:operation>/', OperationExecuteView.as_view(), name='operation_execute'),
     path('users/', UserListView.as_view(), name='user_list'),
     path('users/create/', UserCreateView.as_view(), name='user_create'),
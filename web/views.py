@@ -1,24 +1,45 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.dateparse import parse_date
+from django.utils import timezone
 from django.views.generic import ListView, TemplateView, View, UpdateView, CreateView
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.models import User
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.db import transaction
 from django.core.exceptions import PermissionDenied
-import json
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from datetime import timedelta
 import openpyxl
-from zeep.helpers import serialize_object
-from services.soap_client import SoapClient
-from core.models import SoapRequestLog, UserRole, Role, RoleOperation
+from services.soap_client import SOAP_CREDENTIALS, SoapClient
+from services.jobs import submit_operation_job, expire_stale_job
+from services.registry import get_registry
+from services.autocomplete import prefill, reference_kind, suggest
+from services.log_partitions import day_range
+from services.bulk import BulkFileError, expire_stale_submission, map_columns, read_table, submit_bulk_submission, template_workbook
+from core.models import BulkSubmission, SoapRequestLog, SoapJob, UserRole, Role, RoleOperation
 from core.utils import user_has_role
 from .forms_custom import CustomUserCreationForm
+from . import log_feed
 import logging
 
 logger = logging.getLogger(__name__)
+# Largest spreadsheet accepted for bulk submission
+BULK_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+# Days of logs the dashboard lists; older ones are in the Excel export and the API
+DASHBOARD_WINDOW_DAYS = getattr(settings, 'DASHBOARD_WINDOW_DAYS', 30)
+
+def live_feed_available(request):
+    """
+    The dashboard feed holds its connection open, which only works under an ASGI
+    server (uvicorn): a WSGI server has to drain the whole stream before sending any of it.
+    """
+    return isinstance(request, ASGIRequest)
 
 class CustomLoginView(LoginView):
     template_name = 'web/login.html'
@@ -30,11 +51,61 @@ class DashboardView(LoginRequiredMixin, ListView):
     ordering = ['-timestamp']
     paginate_by = 20
 
+    def get_queryset(self):
+        # A bounded range lets PostgreSQL skip the log partitions of older months
+        since = timezone.now() - timedelta(days=DASHBOARD_WINDOW_DAYS)
+        queryset = super().get_queryset().select_related('user').filter(timestamp__gte=since)
+        if self.request.GET.get('mine'):
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add summary stats if needed, or just keep it simple
+        context['mine'] = bool(self.request.GET.get('mine'))
+        context['window_days'] = DASHBOARD_WINDOW_DAYS
+        # The live feed only makes sense on the first page. It resumes after the newest row
+        # in the table rather than on the page, which may be empty when the window is.
+        page_obj = context.get('page_obj')
+        if live_feed_available(self.request) and (page_obj is None or page_obj.number == 1):
+            context['stream_last_id'] = SoapRequestLog.objects.aggregate(last_id=Max('id'))['last_id'] or 0
         return context
 
+class DashboardStreamView(View):
+    """
+    Server-sent events feed of new SoapRequestLog rows for the dashboard table.
+
+    Streams share one database poller per process (web/log_feed.py), and up to
+    DASHBOARD_STREAM_MAX_CLIENTS of them are served at once. Each event carries the
+    log id, so browsers resume via Last-Event-ID after a reconnect. Connections are
+    closed after DASHBOARD_STREAM_MAX_SECONDS and re-opened by the client.
+    Without a cursor the feed starts at the newest row; it never replays history.
+    Under WSGI it answers 204, which tells EventSource not to reconnect.
+    """
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        if not live_feed_available(request):
+            return HttpResponse(status=204)
+
+        last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            last_id = None
+
+        subscription = log_feed.feed.subscribe()
+        if subscription is None:
+            response = HttpResponse(status=503)
+            response['Retry-After'] = '30'
+            return response
+        user_id = user.id if request.GET.get('mine') else None
+        response = StreamingHttpResponse(log_feed.events(subscription, last_id, user_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
 class ExportReadLogsExcelView(LoginRequiredMixin, View):
     def dispatch(self, request, *args, **kwargs):
         if not user_has_role(request.user, ['Admin', 'Manager']):
@@ -51,25 +122,37 @@ class ExportReadLogsExcelView(LoginRequiredMixin, View):
         headers = ['ID', 'User', 'Operation', 'Status', 'Duration (s)', 'Timestamp', 'Error Message']
         ws.append(headers)
 
-        # Fetch data
-        logs = SoapRequestLog.objects.all().order_by('-timestamp')
+        # Optional ?from=&to= days (YYYY-MM-DD, inclusive) limit the export to the matching partitions
+        bounds = {}
+        for name in ('from', 'to'):
+            value = request.GET.get(name)
+            if value:
+                try:
+                    bounds[name] = parse_date(value)
+                except ValueError:  # well formed but impossible, e.g. 2026-02-30
+                    bounds[name] = None
+                if bounds[name] is None:
+                    return HttpResponse(f"Invalid '{name}' date, use YYYY-MM-DD.", status=400)
+
+        # Fetch data: plain tuples with the username joined in, streamed in chunks
+        logs = SoapRequestLog.objects.filter(day_range(bounds.get('from'), bounds.get('to'))).order_by('-timestamp').values_list(
+            'id', 'user__username', 'operation', 'status', 'duration', 'timestamp', 'error_message',
+        ).iterator(chunk_size=2000)
 
         # Write data rows
-        for log in logs:
-            username = log.user.username if log.user else 'System/Unknown'
+        for log_id, username, operation, status, duration, timestamp, error_message in logs:
             # Remove any timezone info for Excel compatibility if needed, or convert to string
-            timestamp_str = log.timestamp.strftime('%Y-%m-%d %H:%M:%S') if log.timestamp else ''
-            
-            row = [
-                log.id,
-                username,
-                log.operation,
-                log.status,
-                log.duration,
+            timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S') if timestamp else ''
+
+            ws.append([
+                log_id,
+                username or 'System/Unknown',
+                operation,
+                status,
+                duration,
                 timestamp_str,
-                log.error_message or ''
-            ]
-            ws.append(row)
+                error_message or ''
+            ])
 
         # Prepare response
         response = HttpResponse(
@@ -85,14 +168,8 @@ class OperationListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['operations'] = [
-            'getTenderInformation',
-            'sendAdvancePaymentInformation',
-            'sendBidSecurityInformation',
-            'getContractInformation',
-            'sendCreditLineFacility',
-            'sendPerformSecurityInformation',
-        ]
+        context['operations'] = get_registry().operation_names
+        context['can_execute'] = user_has_role(self.request.user, ['Admin', 'Underwriter'])
         return context
 
 class OperationExecuteView(LoginRequiredMixin, View):
@@ -103,283 +180,174 @@ class OperationExecuteView(LoginRequiredMixin, View):
              raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
     
-    # Metadata for fields. In a real app, this could be introspected or config-driven.
-    FIELD_CONFIG = {
-        'getTenderInformation': [
-            {'name': 'ref_name', 'label': 'Tender Ref Name', 'required': True},
-            {'name': 'ref_number', 'label': 'Tender Ref Number', 'required': True},
-        ],
-        'getContractInformation': [
-             {'name': 'contract_number', 'label': 'Contract Number', 'required': True},
-             {'name': 'contract_serial_number', 'label': 'Contract Serial Number', 'required': True},
-        ],
-        'sendAdvancePaymentInformation': [
-            # Top Level
-            {'name': 'contractName', 'label': 'Contract Name'},
-            {'name': 'contractNumber', 'label': 'Contract Number'},
-            {'name': 'contractSerialNumber', 'label': 'Contract Serial Number'},
-            {'name': 'contractDate', 'label': 'Contract Date (YYYY-MM-DD)'},
-            # AdvancePaymentInfo
-            {'name': 'advancePaymentInfo__accountNumber', 'label': 'Account Number'},
-            {'name': 'advancePaymentInfo__address', 'label': 'Address'},
-            {'name': 'advancePaymentInfo__amount', 'label': 'Amount'},
-            {'name': 'advancePaymentInfo__amountCharacter', 'label': 'Amount (Words)'},
-            {'name': 'advancePaymentInfo__expireDate', 'label': 'Expire Date (YYYY-MM-DD)'},
-            {'name': 'advancePaymentInfo__guaranteeNumber', 'label': 'Guarantee Number'},
-            {'name': 'advancePaymentInfo__issueDate', 'label': 'Issue Date (YYYY-MM-DD)'},
-            {'name': 'advancePaymentInfo__name', 'label': 'Beneficiary Name'},
-            {'name': 'advancePaymentInfo__position', 'label': 'Position'},
-            {'name': 'advancePaymentInfo__startDate', 'label': 'Start Date (YYYY-MM-DD)'},
-            {'name': 'advancePaymentInfo__status', 'label': 'Status'},
-            {'name': 'advancePaymentInfo__unit', 'label': 'Currency Unit'},
-            # IssueBankInfo
-            {'name': 'issueBankInfo__bankName', 'label': 'Bank Name'},
-            {'name': 'issueBankInfo__bankBranchName', 'label': 'Bank Branch Name'},
-            {'name': 'issueBankInfo__bankTINNumber', 'label': 'Bank TIN'},
-            {'name': 'issueBankInfo__branchAddress', 'label': 'Branch Address'},
-            {'name': 'issueBankInfo__branchManagerName', 'label': 'Branch Manager Name'},
-            {'name': 'issueBankInfo__securityRepresentiveName', 'label': 'Security Rep Name'},
-            {'name': 'issueBankInfo__telNumber', 'label': 'Tel Number'},
-            {'name': 'issueBankInfo__faxNumber', 'label': 'Update Fax Number'},
-            {'name': 'issueBankInfo__email', 'label': 'Email'},
-            {'name': 'issueBankInfo__comment', 'label': 'Comment'},
-            # ProcuringEntityInfo
-            {'name': 'procuringEnityInfo__pEName', 'label': 'PE Name'},
-            {'name': 'procuringEnityInfo__pETINNumber', 'label': 'PE TIN'},
-            {'name': 'procuringEnityInfo__addressPE', 'label': 'PE Address'},
-            {'name': 'procuringEnityInfo__chargerNameInPE', 'label': 'PE Charger Name'},
-            # SupplierInfo
-            {'name': 'supplierInfo__supplierName', 'label': 'Supplier Name'},
-            {'name': 'supplierInfo__supplierTINNumber', 'label': 'Supplier TIN'},
-            {'name': 'supplierInfo__addressSupplier', 'label': 'Supplier Address'},
-            {'name': 'supplierInfo__supplierRepresentiveName', 'label': 'Supplier Rep Name'},
-        ],
-        'sendBidSecurityInformation': [
-            # BidSecurityInfo
-            {'name': 'bidSecurityInfo__amount', 'label': 'Amount'},
-            {'name': 'bidSecurityInfo__amountCharacter', 'label': 'Amount (Words)'},
-            {'name': 'bidSecurityInfo__expireDate', 'label': 'Expire Date (YYYY-MM-DD)'},
-            {'name': 'bidSecurityInfo__securityName', 'label': 'Security Name'},
-            {'name': 'bidSecurityInfo__securityNumber', 'label': 'Security Number'},
-            {'name': 'bidSecurityInfo__startDate', 'label': 'Start Date (YYYY-MM-DD)'},
-            {'name': 'bidSecurityInfo__status', 'label': 'Status'},
-            {'name': 'bidSecurityInfo__unit', 'label': 'Currency Unit'},
-             # IssueBankInfo (Reused fields usually, but defined explicitly per op for clarity)
-            {'name': 'issueBankInfo__bankName', 'label': 'Bank Name'},
-            {'name': 'issueBankInfo__bankBranchName', 'label': 'Bank Branch Name'},
-            {'name': 'issueBankInfo__bankTINNumber', 'label': 'Bank TIN'},
-            {'name': 'issueBankInfo__branchAddress', 'label': 'Branch Address'},
-            {'name': 'issueBankInfo__branchManagerName', 'label': 'Branch Manager Name'},
-            {'name': 'issueBankInfo__securityRepresentiveName', 'label': 'Security Rep Name'},
-            {'name': 'issueBankInfo__telNumber', 'label': 'Tel Number'},
-            {'name': 'issueBankInfo__faxNumber', 'label': 'Fax Number'},
-            {'name': 'issueBankInfo__email', 'label': 'Email'},
-            {'name': 'issueBankInfo__comment', 'label': 'Comment'},
-            # SupplierInfo
-            {'name': 'supplierInfo__supplierName', 'label': 'Supplier Name'},
-            {'name': 'supplierInfo__supplierTINNumber', 'label': 'Supplier TIN'},
-            {'name': 'supplierInfo__addressSupplier', 'label': 'Supplier Address'},
-            {'name': 'supplierInfo__supplierRepresentiveName', 'label': 'Supplier Rep Name'},
-            # TenderNotificationInfo
-            {'name': 'tenderNotificationInfo__tenderRefName', 'label': 'Tender Ref Name'},
-            {'name': 'tenderNotificationInfo__tenderRefNumber', 'label': 'Tender Ref Number'},
-            {'name': 'tenderNotificationInfo__tenderLotName', 'label': 'Tender Lot Name'},
-            {'name': 'tenderNotificationInfo__tenderLotNumber', 'label': 'Tender Lot Number'},
-        ],
-        'sendCreditLineFacility': [
-             # Top Level
-            {'name': 'tenderRefName', 'label': 'Tender Ref Name'},
-            {'name': 'tenderRefNumber', 'label': 'Tender Ref Number'},
-            # CreditLineFacilityInfo
-            {'name': 'creditLineFacilityInfo__accountNumber', 'label': 'Account Number'},
-            {'name': 'creditLineFacilityInfo__amount', 'label': 'Amount'},
-            {'name': 'creditLineFacilityInfo__amountCharacter', 'label': 'Amount (Words)'},
-            {'name': 'creditLineFacilityInfo__creditLineNumber', 'label': 'Credit Line Number'},
-            {'name': 'creditLineFacilityInfo__fromDate', 'label': 'From Date (YYYY-MM-DD)'},
-            {'name': 'creditLineFacilityInfo__toDate', 'label': 'To Date (YYYY-MM-DD)'},
-            {'name': 'creditLineFacilityInfo__unit', 'label': 'Currency Unit'},
-             # IssueBankInfo
-            {'name': 'issueBankInfo__bankName', 'label': 'Bank Name'},
-            {'name': 'issueBankInfo__bankBranchName', 'label': 'Bank Branch Name'},
-            {'name': 'issueBankInfo__bankTINNumber', 'label': 'Bank TIN'},
-            {'name': 'issueBankInfo__branchAddress', 'label': 'Branch Address'},
-            {'name': 'issueBankInfo__branchManagerName', 'label': 'Branch Manager Name'},
-            {'name': 'issueBankInfo__securityRepresentiveName', 'label': 'Security Rep Name'},
-            {'name': 'issueBankInfo__telNumber', 'label': 'Tel Number'},
-            {'name': 'issueBankInfo__faxNumber', 'label': 'Fax Number'},
-            {'name': 'issueBankInfo__email', 'label': 'Email'},
-            {'name': 'issueBankInfo__comment', 'label': 'Comment'},
-             # SupplierInfo
-            {'name': 'supplierInfo__supplierName', 'label': 'Supplier Name'},
-            {'name': 'supplierInfo__supplierTINNumber', 'label': 'Supplier TIN'},
-            {'name': 'supplierInfo__addressSupplier', 'label': 'Supplier Address'},
-            {'name': 'supplierInfo__supplierRepresentiveName', 'label': 'Supplier Rep Name'},
-        ],
-        'sendPerformSecurityInformation': [
-            # PerformanceSecurityInfo
-            {'name': 'performanceSecurityInfo__amount', 'label': 'Amount'},
-            {'name': 'performanceSecurityInfo__amountCharacter', 'label': 'Amount (Words)'},
-            {'name': 'performanceSecurityInfo__expireDate', 'label': 'Expire Date (YYYY-MM-DD)'},
-            {'name': 'performanceSecurityInfo__securityName', 'label': 'Security Name'},
-            {'name': 'performanceSecurityInfo__securityNumber', 'label': 'Security Number'},
-            {'name': 'performanceSecurityInfo__startDate', 'label': 'Start Date (YYYY-MM-DD)'},
-            {'name': 'performanceSecurityInfo__status', 'label': 'Status'},
-            {'name': 'performanceSecurityInfo__unit', 'label': 'Currency Unit'},
-             # IssueBankInfo
-            {'name': 'issueBankInfo__bankName', 'label': 'Bank Name'},
-            {'name': 'issueBankInfo__bankBranchName', 'label': 'Bank Branch Name'},
-            {'name': 'issueBankInfo__bankTINNumber', 'label': 'Bank TIN'},
-            {'name': 'issueBankInfo__branchAddress', 'label': 'Branch Address'},
-            {'name': 'issueBankInfo__branchManagerName', 'label': 'Branch Manager Name'},
-            {'name': 'issueBankInfo__securityRepresentiveName', 'label': 'Security Rep Name'},
-            {'name': 'issueBankInfo__telNumber', 'label': 'Tel Number'},
-            {'name': 'issueBankInfo__faxNumber', 'label': 'Fax Number'},
-            {'name': 'issueBankInfo__email', 'label': 'Email'},
-            {'name': 'issueBankInfo__comment', 'label': 'Comment'},
-             # ContractInfo
-            {'name': 'contractInfo__contractName', 'label': 'Contract Name'},
-            {'name': 'contractInfo__contractNumber', 'label': 'Contract Number'},
-            {'name': 'contractInfo__contractSerialNumber', 'label': 'Contract Serial Number'},
-            {'name': 'contractInfo__contractDate', 'label': 'Contract Date (YYYY-MM-DD)'},
-            {'name': 'contractInfo__address', 'label': 'Contract Address'},
-            {'name': 'contractInfo__cellPhoneNumber', 'label': 'Contract Cell Phone'},
-            {'name': 'contractInfo__eMailAddress', 'label': 'Contract Email'},
-            {'name': 'contractInfo__pEName', 'label': 'Contract PE Name'},
-            {'name': 'contractInfo__pETINNumber', 'label': 'Contract PE TIN'},
-            {'name': 'contractInfo__supplierName', 'label': 'Contract Supplier Name'},
-            {'name': 'contractInfo__supplierTINNumber', 'label': 'Contract Supplier TIN'},
-            {'name': 'contractInfo__tenderRefName', 'label': 'Contract Tender Ref Name'},
-            {'name': 'contractInfo__tenderRefNumber', 'label': 'Contract Tender Ref Number'},
-            # Simplified LotInfo for ContractInfo - supporting one lot for MVP
-            {'name': 'contractInfo__lotInfo__lotName', 'label': 'Lot Name'},
-            {'name': 'contractInfo__lotInfo__lotNumber', 'label': 'Lot Number'},
-        ]
-    }
-
     def get(self, request, operation):
-        fields = self.FIELD_CONFIG.get(operation, [
+        spec = get_registry().get(operation)
+        fields = [{**f, 'reference': reference_kind(f['name'])} for f in spec.fields] if spec else [
             {'name': 'payload_json', 'label': 'Payload (JSON)', 'type': 'textarea', 'required': True}
-        ])
+        ]
         return render(request, self.template_name, {
             'operation': operation,
-            'fields': fields
+            'fields': fields,
         })
 
-    def reconstruct_complex_objects(self, data, operation_config):
-        """
-        Reconstructs nested dictionaries from flat data based on FIELD_CONFIG naming convention (key__subkey).
-        Handles basic nesting and simple list wrapping if keys imply index-like behavior (not yet implemented fully, using dict nesting).
-        """
-        result = {}
-        # We explicitly process only fields defined in configuration to avoid polluting the payload with auth fields or others
-        allowed_fields = [f['name'] for f in operation_config]
-        
-        for field in allowed_fields:
-            value = data.get(field)
-            # Filter out empty values to avoid sending empty strings for optional fields? 
-            # WSDL usually prefers missing element or nillable. Zeep handles None as nillable if schema says so.
-            # But empty string "" might be valid. Let's send what user typed if it's there.
-            if value is None: 
-                continue
-
-            if '__' in field:
-                parts = field.split('__')
-                current = result
-                for i, part in enumerate(parts[:-1]):
-                    if part not in current:
-                        current[part] = {}
-                    current = current[part]
-                current[parts[-1]] = value
-            else:
-                result[field] = value
-        
-        # Special handling: if we have lotInfo as a dict, but WSDL expects list, we might need to wrap it.
-        # But 'zeep' usually auto-wraps dicts into lists if the element is maxOccurs > 1.
-        # However, for nested matching, let's verify.
-        # For this MVP, we rely on Zeep's dictionary mapping.
-        
-        return result
-
     def post(self, request, operation):
         # 1. Prepare Arguments
-        # 1. Prepare Arguments
-        # Hardcoded credentials as per final deployment requirements
-        kwargs = {
-            'id_val': 'UAP',
-            'password': 'UAP!!009#',
-        }
-        
-        # 2. Map Operation Name to Python Method
-        method_map = {
-            'getTenderInformation': 'get_tender_information',
-            'sendAdvancePaymentInformation': 'send_advance_payment_information',
-            'sendBidSecurityInformation': 'send_bid_security_information',
-            'getContractInformation': 'get_contract_information',
-            'sendCreditLineFacility': 'send_credit_line_facility',
-            'sendPerformSecurityInformation': 'send_perform_security_information',
-        }
+        kwargs = dict(SOAP_CREDENTIALS)
         
-        method_name = method_map.get(operation)
-        if not method_name:
+        # 2. Look up the operation; field names and nesting come from the WSDL registry
+        spec = get_registry().get(operation)
+        if not spec:
              return self.render_result(error=f"Unknown operation: {operation}")
 
-        # 3. Extract Fields and Reconstruct Objects
-        op_config = self.FIELD_CONFIG.get(operation, [])
-        
-        # We need to pass arguments expected by the SOAP method.
-        # Reconstruct the complex object (the payload dict)
-        # Note: Some methods take flattened args (getTenderInfo) and others take a dict (sendAdvance...).
-        # We need to adapt.
-        
-        reconstructed_data = self.reconstruct_complex_objects(request.POST, op_config)
-        
         try:
-            if operation == 'getTenderInformation':
-                # This one takes specific args in client method
-                kwargs['ref_name'] = reconstructed_data.get('ref_name')
-                kwargs['ref_number'] = reconstructed_data.get('ref_number')
-            
-            elif operation == 'getContractInformation':
-                 kwargs['contract_number'] = reconstructed_data.get('contract_number')
-                 kwargs['serial_number'] = reconstructed_data.get('contract_serial_number')
-
-            elif operation == 'sendAdvancePaymentInformation':
-                # Method expects payment_info dict
-                # The reconstruct_complex_objects gave us a flat-ish dict structure but we need to ensure top-level args vs nested
-                # our reconstructor made: {'contractName': ..., 'advancePaymentInfo': {...}}
-                # The 'send_advance_payment_information' method signature in soap_client.py is:
-                # def send_advance_payment_information(self, id_val, password, payment_info, user=None)
-                # where payment_info is the AdvancePaymentInfoRequest dict.
-                # So we pass the entire reconstructed data as 'payment_info'.
-                kwargs['payment_info'] = reconstructed_data
-
-            elif operation == 'sendBidSecurityInformation':
-                kwargs['bid_info'] = reconstructed_data
-
-            elif operation == 'sendCreditLineFacility':
-                kwargs['credit_info'] = reconstructed_data
-                
-            elif operation == 'sendPerformSecurityInformation':
-                kwargs['perform_info'] = reconstructed_data
+            # 3. Build the method arguments (nested request dict for send*, scalars for get*)
+            kwargs.update(spec.client_kwargs(request.POST))
 
-            # 4. Execute
-            client = SoapClient()
-            method = getattr(client, method_name)
-            result_obj = method(user=request.user, **kwargs)
-            
-            # Serialize
-            result_json = json.dumps(serialize_object(result_obj), indent=2, default=str)
-            return self.render_result(result=result_json)
+            # 4. Hand off to the worker pool; the pending fragment polls for the result
+            job = submit_operation_job(request.user, operation, spec.method_name, kwargs)
+            if job.is_finished:
+                return self.render_result(result=job.result, error=job.error_message, job=job)
+            return render(request, 'web/partials/operation_pending.html', {'job': job})
 
         except Exception as e:
             return self.render_result(error=str(e))
 
-    def render_result(self, result=None, error=None):
+    def render_result(self, result=None, error=None, job=None):
         return render(self.request, 'web/partials/operation_result.html', {
             'result': result,
-            'error': error
+            'error': error,
+            'job': job,
+        })
+
+class ReferenceSuggestionsView(LoginRequiredMixin, View):
+    """Datalist options for a tender/contract reference field, from the local read model."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not user_has_role(request.user, ['Admin', 'Underwriter']):
+             raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request):
+        # htmx sends the field's own value under its name
+        field = request.GET.get('field', '')
+        suggestions = suggest(reference_kind(field), request.GET.get(field, ''))
+        response = render(request, 'web/partials/reference_suggestions.html', {'suggestions': suggestions})
+        # Typing back over the same prefix is answered by the browser
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+
+class ReferencePrefillView(ReferenceSuggestionsView):
+    """Related form values for a chosen reference: {"fields": {element: value}}."""
+
+    def get(self, request):
+        field = request.GET.get('field', '')
+        return JsonResponse({'fields': prefill(reference_kind(field), request.GET.get('value', ''))})
+
+class OperationJobStatusView(LoginRequiredMixin, View):
+    """Polled by operation_pending.html until the job has a result."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(SoapJob, pk=pk)
+        if job.user_id != request.user.id and not request.user.is_superuser:
+            raise PermissionDenied
+
+        job = expire_stale_job(job)
+        if not job.is_finished:
+            return render(request, 'web/partials/operation_pending.html', {'job': job})
+        return render(request, 'web/partials/operation_result.html', {
+            'result': job.result,
+            'error': job.error_message,
+            'job': job,
+        })
+
+class BulkSubmissionView(LoginRequiredMixin, View):
+    """Upload a spreadsheet of send* requests to run in the background."""
+    template_name = 'web/bulk_submission.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not user_has_role(request.user, ['Admin', 'Underwriter']):
+             raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_operations(self):
+        return [name for name in get_registry().operation_names if name.startswith('send')]
+
+    def get(self, request):
+        return render(request, self.template_name, {
+            'operations': self.get_operations(),
+            'submissions': BulkSubmission.objects.filter(user=request.user).defer('source', 'result').order_by('-created_at')[:10],
         })
 
+    def post(self, request):
+        operation = request.POST.get('operation')
+        upload = request.FILES.get('file')
+        if operation not in self.get_operations() or upload is None:
+            messages.error(request, "Choose an operation and a file to upload.")
+            return redirect('bulk_submission')
+        if not upload.name.lower().endswith(('.xlsx', '.csv')) or upload.size > BULK_UPLOAD_MAX_BYTES:
+            messages.error(request, "Upload an .xlsx or .csv file of at most 10 MB.")
+            return redirect('bulk_submission')
+
+        content = upload.read()
+        try:
+            # Check the headers now so a wrong file is reported before anything is queued
+            header, rows = read_table(content, upload.name)
+            map_columns(header, get_registry().get(operation))
+        except BulkFileError as e:
+            messages.error(request, str(e))
+            return redirect('bulk_submission')
+
+        submission = BulkSubmission.objects.create(
+            user=request.user, operation=operation, file_name=upload.name, source=content, total_rows=len(rows)
+        )
+        submit_bulk_submission(submission, SOAP_CREDENTIALS)
+        logger.info(f"User {request.user.username} queued bulk {operation} #{submission.pk} ({len(rows)} rows)")
+        return redirect('bulk_submission_detail', pk=submission.pk)
+
+class BulkSubmissionDetailView(LoginRequiredMixin, View):
+    """Progress page; the progress fragment is polled over HTMX until the run finishes."""
+
+    def get(self, request, pk):
+        submission = get_object_or_404(BulkSubmission.objects.defer('source', 'result'), pk=pk)
+        if submission.user_id != request.user.id and not request.user.is_superuser:
+            raise PermissionDenied
+        submission = expire_stale_submission(submission)
+        template = 'web/partials/bulk_progress.html' if request.headers.get('HX-Request') else 'web/bulk_submission_detail.html'
+        return render(request, template, {'submission': submission})
+
+class BulkSubmissionDownloadView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        submission = get_object_or_404(BulkSubmission, pk=pk)
+        if submission.user_id != request.user.id and not request.user.is_superuser:
+            raise PermissionDenied
+        if submission.result is None:
+            raise Http404("No result file yet")
+        base_name = submission.file_name.rsplit('.', 1)[0]
+        if submission.file_name.lower().endswith('.csv'):
+            response = HttpResponse(bytes(submission.result), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{base_name}_results.csv"'
+        else:
+            response = HttpResponse(
+                bytes(submission.result),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{base_name}_results.xlsx"'
+        return response
+
+class BulkTemplateView(LoginRequiredMixin, View):
+    """Empty workbook with the header row an operation's upload expects."""
+
+    def get(self, request, operation):
+        spec = get_registry().get(operation)
+        if spec is None:
+            raise Http404("Unknown operation")
+        response = HttpResponse(
+            template_workbook(spec),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{operation}_template.xlsx"'
+        return response
+
 class UserListView(LoginRequiredMixin, ListView):
     model = User
     template_name = 'web/user_list.html'